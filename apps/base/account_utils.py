@@ -2,13 +2,25 @@ import re
 import secrets
 import string
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils import timezone
 from django.template.loader import render_to_string
-from django.conf import settings
 
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from apps.base.choices import OTPPurposeChoices
+from apps.base.outbox import aqueue_email, queue_email
+from apps.users.cache import bump_user_list_generation, invalidate_user_detail
+from apps.users.counters import VERIFIED, adjust_counters
+from apps.users.models import OneTimePassword
+from apps.users.otp import aconsume_otp, astore_otps, build_otp, consume_otp, store_otps
+from apps.users.revocation import RevocableRefreshToken
+from apps.users.tokens import TOKEN_VERSION_CLAIM, cache_token_version, token_claims
+
 User = get_user_model()
 
 def email_validator(email: str) -> bool:
@@ -63,25 +75,24 @@ def generate_otp(length: int = 6) -> str:
     """
     return "".join(secrets.choice(string.digits) for _ in range(length))
 
-def set_user_otp(user, length: int = 6) -> str:
+def set_user_otp(user, length: int = 6, purpose: str = OTPPurposeChoices.EMAIL_VERIFICATION) -> str:
     """
-    Generate and set OTP for a user with timestamp and verification status.
+    Generate and store an OTP for a user and purpose.
     
-    Creates a new OTP for the user, sets the creation timestamp, marks as unverified,
-    and saves the user instance with only the necessary field updates.
+    Creates a new OTP and upserts its hash into the OneTimePassword store,
+    replacing any previous code for the same purpose. The users table is
+    not touched.
     
     Args:
         user: Django User model instance to set OTP for.
         length (int, optional): Length of the OTP to generate. Defaults to 6.
+        purpose (str, optional): OTPPurposeChoices value. Defaults to email verification.
         
     Returns:
         str: The generated OTP that was set for the user.
         
     Side Effects:
-        - Sets user.otp to the generated OTP
-        - Sets user.otp_created_at to current timestamp
-        - Sets user.otp_verified to False
-        - Saves user instance with updated fields only
+        - Upserts one OneTimePassword row with the hashed code and expiry
         
     Example:
         >>> user = User.objects.get(id=1)
@@ -90,71 +101,51 @@ def set_user_otp(user, length: int = 6) -> str:
         OTP set: 123456
         
     Note:
-        Only updates specific fields to optimize database performance.
+        A single INSERT ... ON CONFLICT, so issuing a code is one query.
     """
     otp = generate_otp(length)
-    user.otp = otp
-    user.otp_created_at = timezone.now()
-    user.otp_verified = False
-    user.save(update_fields=["otp", "otp_created_at", "otp_verified"])
+    store_otps([build_otp(user, purpose, otp)])
+    return otp
+
+async def aset_user_otp(user, length: int = 6, purpose: str = OTPPurposeChoices.EMAIL_VERIFICATION) -> str:
+    """See set_user_otp()."""
+    otp = generate_otp(length)
+    await astore_otps([build_otp(user, purpose, otp)])
     return otp
 
-def clear_user_otp(user):
+def clear_user_otp(user, purpose: str = OTPPurposeChoices.EMAIL_VERIFICATION):
     """
-    Clear OTP data from user instance.
-    
-    Removes OTP and timestamp data from the user, typically called after
-    successful verification or when OTP expires.
+    Remove a user's OTP for the given purpose.
     
     Args:
         user: Django User model instance to clear OTP data from.
+        purpose (str, optional): OTPPurposeChoices value. Defaults to email verification.
         
     Returns:
         None
         
-    Side Effects:
-        - Sets user.otp to None
-        - Sets user.otp_created_at to None
-        - Saves user instance with updated fields only
-        
     Example:
         >>> clear_user_otp(user)
-        >>> print(user.otp)
-        None
-        
-    Note:
-        Does not clear otp_verified field - only the OTP and timestamp.
     """
-    user.otp = None
-    user.otp_created_at = None
-    user.save(update_fields=["otp", "otp_created_at"])
+    OneTimePassword.objects.filter(user=user, purpose=purpose).delete()
 
 
-def verfiy_user_otp(user, otp: str) -> bool:
+def verfiy_user_otp(user, otp: str, purpose: str = OTPPurposeChoices.EMAIL_VERIFICATION) -> bool:
     """
-    Verify user-provided OTP against stored OTP with expiry validation.
+    Verify and consume a user-provided OTP.
     
-    Validates that the provided OTP matches the user's stored OTP and that
-    the OTP hasn't expired (15-minute window from creation).
+    Validates that the provided OTP matches the stored hash for the user and
+    purpose and hasn't expired. A matching OTP is deleted so it cannot be
+    used twice.
     
     Args:
-        user: Django User model instance with OTP data.
-        otp (str): The OTP string to verify against stored OTP.
+        user: Django User model instance.
+        otp (str): The OTP string to verify.
+        purpose (str, optional): OTPPurposeChoices value. Defaults to email verification.
         
     Returns:
         bool: True if OTP is valid and not expired, False otherwise.
         
-    Validation Process:
-        1. Checks if user has an OTP set
-        2. Compares provided OTP with stored OTP
-        3. Validates OTP creation timestamp exists
-        4. Checks if OTP is within 15-minute expiry window
-        5. Sets otp_verified to True if validation passes
-        
-    Side Effects:
-        - Sets user.otp_verified to True on successful verification
-        - Saves user instance with updated otp_verified field
-        
     Example:
         >>> is_valid = verfiy_user_otp(user, "123456")
         >>> if is_valid:
@@ -163,56 +154,105 @@ def verfiy_user_otp(user, otp: str) -> bool:
         ...     print("Invalid or expired OTP")
         
     Note:
-        OTP expires 15 minutes after otp_created_at timestamp.
+        OTPs expire OTP_EXPIRY_MINUTES after they are issued.
     """
-    if not user.otp or user.otp != otp:
-        return False
-    
-    if not user.otp_created_at:
-        return False
-    
-    expiry_time = user.otp_created_at + timezone.timedelta(minutes=15)
-    if timezone.now() > expiry_time:
-        return False
-    
-    user.otp_verified = True
-    user.save(update_fields=["otp_verified"])
-    return True
+    return consume_otp(user.email, otp, purpose) is not None
+
+
+def activate_verified_user(user_id):
+    """
+    Mark a user's email as verified and activate the account.
+
+    Uses a single UPDATE (two for an already verified user) instead of
+    save(), so the cached detail payload is dropped, the user lists are
+    invalidated and the verification counters are moved explicitly.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        newly_verified = User.objects.alive().filter(pk=user_id, otp_verified=False).update(
+            otp_verified=True, is_active=True, updated=now,
+        )
+        if newly_verified:
+            adjust_counters({(VERIFIED, "verified"): 1, (VERIFIED, "unverified"): -1})
+        else:
+            User.objects.filter(pk=user_id).update(is_active=True, updated=now)
+    invalidate_user_detail(user_id)
+    transaction.on_commit(bump_user_list_generation)
+
+
+async def aactivate_verified_user(user_id):
+    """See activate_verified_user()."""
+    # Transactions are sync-only in Django.
+    await sync_to_async(activate_verified_user)(user_id)
+
+def build_otp_email(user, otp: str, purpose: str) -> dict:
+    """
+    Render the OTP email for a user.
+
+    Args:
+        user: Django User model instance of the recipient.
+        otp (str): The one-time password to include in the email.
+        purpose (str): Human readable purpose, e.g. "email verification".
+
+    Returns:
+        dict: ``to_email``, ``subject`` and ``body`` ready for the email outbox.
+    """
+    context = {
+        "user": user,
+        "otp": otp,
+        "purpose": purpose,
+        "expiry": "5 minutes"
+    }
+    return {
+        "to_email": user.email,
+        "subject": f"Your OTP for {purpose}",
+        "body": render_to_string("emails/otp_email.html", context),
+    }
+
 
 def send_otp_email(user_id: int, otp: str, purpose: str):
+    """
+    Render the OTP email for a user and queue it in the email outbox.
+
+    Delivery happens out of band in the ``process_email_outbox`` worker, so
+    the caller only pays for rendering the template and one INSERT.
+
+    Args:
+        user_id: User instance or primary key of the recipient.
+        otp (str): The one-time password to include in the email.
+        purpose (str): Human readable purpose, e.g. "email verification".
+
+    Returns:
+        EmailOutbox: The queued outbox row.
+
+    Raises:
+        ValueError: If no user exists for the given ID.
+        RuntimeError: If the email could not be queued.
+    """
     try:
         if isinstance(user_id, User):
             user = user_id
         else:
             user = User.objects.get(id=user_id)
-            
-        subject = f"Your OTP for {purpose}"
-        context = {
-            "user": user,
-            "otp": otp,
-            "purpose": purpose,
-            "expiry": "5 minutes"    
-        }
-        template_path = "emails/otp_email.html"
-        html_message = render_to_string(template_path, context)
-        
-        # ✅ Correct way: Import and use EmailMessage class
-        from django.core.mail import EmailMessage
-        
-        email_message = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email]
-        )
-        email_message.content_subtype = "html"  # Set content type to HTML
-        email_message.send()
-        
+
+        return queue_email(**build_otp_email(user, otp, purpose))
+
     except User.DoesNotExist:
         raise ValueError("User with the given ID does not exist.")
     except Exception as e:
         raise RuntimeError(f"Failed to send OTP email: {str(e)}")
 
+async def asend_otp_email(user, otp: str, purpose: str):
+    """
+    Async counterpart of send_otp_email().
+
+    Takes the user instance directly; the async views always have it loaded.
+    """
+    try:
+        return await aqueue_email(**build_otp_email(user, otp, purpose))
+    except Exception as e:
+        raise RuntimeError(f"Failed to send OTP email: {str(e)}")
+
 def get_tokens_for_user(user):
     """
     Generate JWT access and refresh tokens for user authentication.
@@ -240,15 +280,68 @@ def get_tokens_for_user(user):
         Requires rest_framework_simplejwt to be installed and configured.
         
     Note:
-        Token expiration times are controlled by SimpleJWT settings.
+        Token expiration times are controlled by SimpleJWT settings. The
+        tokens carry the claims from apps.users.tokens.token_claims so they
+        can be authenticated without a database lookup.
     """
     refresh = RefreshToken.for_user(user)
+    for claim, value in token_claims(user).items():
+        refresh[claim] = value
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token)
     }
 
 
+def refresh_tokens(raw_refresh: str) -> dict:
+    """
+    Exchange a refresh token for a new access token, rotating the refresh token.
+
+    The token's signature and expiry are checked, then the revocation
+    filter (apps.users.revocation) and its token version claim against the
+    user's row, so a blocked account or a password change invalidates it.
+    The new tokens carry claims re-read from that row, so a refresh token
+    kept alive by rotation never keeps serving stale claims.
+
+    With ROTATE_REFRESH_TOKENS a fresh refresh token is returned as well and,
+    with BLACKLIST_AFTER_ROTATION, the old one is revoked so it can only be
+    used once; of two concurrent refreshes with the same token, one fails.
+
+    Args:
+        raw_refresh (str): The encoded refresh token.
+
+    Returns:
+        dict: ``{'access': ...}`` plus ``'refresh'`` when tokens are rotated.
+
+    Raises:
+        InvalidToken: If the token is malformed, expired, not a refresh
+            token or already revoked.
+        AuthenticationFailed: If the user's tokens were invalidated since
+            the token was issued.
+    """
+    try:
+        refresh = RevocableRefreshToken(raw_refresh)
+    except TokenError as e:
+        raise InvalidToken(e.args[0])
+
+    user = User.objects.filter(pk=refresh.get(jwt_settings.USER_ID_CLAIM), is_active=True).first()
+    if user is None or refresh.get(TOKEN_VERSION_CLAIM) != user.token_version:
+        raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+    cache_token_version(user.pk, user.token_version)
+
+    for claim, value in token_claims(user).items():
+        refresh[claim] = value
+    tokens = {'access': str(refresh.access_token)}
+    if jwt_settings.ROTATE_REFRESH_TOKENS:
+        if jwt_settings.BLACKLIST_AFTER_ROTATION:
+            refresh.blacklist()
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        tokens['refresh'] = str(refresh)
+    return tokens
+
+
 def initiate_password_reset(email):
     """
     Initiate password reset process by generating and sending OTP.
@@ -264,13 +357,13 @@ def initiate_password_reset(email):
         
     Process Flow:
         1. Normalizes email (lowercase, stripped whitespace)
-        2. Finds active user (excludes DELETED status, requires is_active=True)
+        2. Finds active user (not soft-deleted, requires is_active=True)
         3. Generates and sets OTP for user
         4. Sends OTP email with "password reset" purpose
         5. Returns OTP on success, None on failure
         
     User Filtering:
-        - Excludes users with status='DELETED'
+        - Excludes soft-deleted users
         - Only includes users with is_active=True
         - Case-insensitive email matching
         
@@ -286,9 +379,9 @@ def initiate_password_reset(email):
         to avoid revealing user existence.
     """
     try:
-        user = User.objects.exclude(status='DELETED').get(email=email.lower().strip(), is_active=True)
-        otp = set_user_otp(user)
-        if send_otp_email(user.id, otp, "password reset"):
+        user = User.objects.alive().get(email=email.lower().strip(), is_active=True)
+        otp = set_user_otp(user, purpose=OTPPurposeChoices.PASSWORD_RESET)
+        if send_otp_email(user, otp, "password reset"):
             return otp
         return None
     except User.DoesNotExist:
@@ -312,16 +405,16 @@ def complete_password_reset(email, otp, new_password):
         bool: True if password reset was successful, False otherwise.
         
     Process Flow:
-        1. Finds user by email (same filtering as initiate_password_reset)
-        2. Verifies provided OTP using verfiy_user_otp()
+        1. Looks up the live password reset OTP and its user in one query
+           (same user filtering as initiate_password_reset)
+        2. Verifies and consumes the OTP using consume_otp()
         3. Sets new password using Django's set_password() method
-        4. Clears OTP data from user
-        5. Returns success status
+        4. Returns success status
         
     Security Features:
         - Uses Django's built-in password hashing via set_password()
-        - Validates OTP expiry (15-minute window)
-        - Clears OTP after successful reset
+        - Validates OTP expiry (OTP_EXPIRY_MINUTES)
+        - Consumes the OTP so it cannot be reused
         - Same user filtering as initiation
         
     Example:
@@ -340,12 +433,45 @@ def complete_password_reset(email, otp, new_password):
         to maintain security through consistent response behavior.
     """
     try:
-        user = User.objects.exclude(status='DELETED').get(email=email.lower().strip(), is_active=True)
-        if not verfiy_user_otp(user, otp):
+        row = consume_otp(
+            email.lower().strip(), otp, OTPPurposeChoices.PASSWORD_RESET, active_only=True, with_user=True
+        )
+        if row is None:
             return False
+        user = row.user
         user.set_password(new_password)
         user.save(update_fields=["password"])
-        clear_user_otp(user)
+        return True
+    except User.DoesNotExist:
+        return False
+    except Exception as e:
+        return False
+
+
+async def ainitiate_password_reset(email):
+    """See initiate_password_reset()."""
+    try:
+        user = await User.objects.alive().aget(email=email.lower().strip(), is_active=True)
+        otp = await aset_user_otp(user, purpose=OTPPurposeChoices.PASSWORD_RESET)
+        if await asend_otp_email(user, otp, "password reset"):
+            return otp
+        return None
+    except User.DoesNotExist:
+        return None
+    except Exception as e:
+        return None
+
+async def acomplete_password_reset(email, otp, new_password):
+    """See complete_password_reset()."""
+    try:
+        row = await aconsume_otp(
+            email.lower().strip(), otp, OTPPurposeChoices.PASSWORD_RESET, active_only=True, with_user=True
+        )
+        if row is None:
+            return False
+        user = row.user
+        await user.aset_password(new_password)
+        await user.asave(update_fields=["password"])
         return True
     except User.DoesNotExist:
         return False
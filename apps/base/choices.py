@@ -16,4 +16,14 @@ class UserTypeChoices(models.TextChoices):
     ADMIN = "admin", "Admin"
     STAFF = "staff", "Staff"
     STUDENT = "student", "Student"
-    
\ No newline at end of file
+    
+
+class EmailDeliveryStatusChoices(models.TextChoices):
+    PENDING = "pending", "Pending"
+    SENT = "sent", "Sent"
+    FAILED = "failed", "Failed"
+
+
+class OTPPurposeChoices(models.TextChoices):
+    EMAIL_VERIFICATION = "email_verification", "Email Verification"
+    PASSWORD_RESET = "password_reset", "Password Reset"
@@ -0,0 +1,51 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over ``parts``; anything that changes the representation belongs in them."""
+    digest = hashlib.md5("\x1f".join(str(part) for part in parts).encode(), usedforsecurity=False)
+    return "W/" + quote_etag(digest.hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for read actions of a DRF view.
+
+    Call ``not_modified()`` with the resource's validators before doing any
+    expensive work; return its response when it gives one (304, or 412 for
+    a failed precondition). The validators are also set on the final
+    response, which is marked ``private, no-cache`` so clients keep it but
+    revalidate on every use.
+    """
+    validators = None
+
+    def not_modified(self, *parts, last_modified=None):
+        """
+        Args:
+            *parts: What identifies the representation, e.g. a row's
+                ``updated``. The request path and the negotiated format
+                are always included.
+            last_modified (datetime, optional): Sent as Last-Modified.
+
+        Returns:
+            HttpResponse or None: The 304/412 response, or None to go on.
+        """
+        request = self.request
+        etag = make_etag(request.get_full_path(), request.accepted_renderer.format, *parts)
+        timestamp = int(timegm(last_modified.utctimetuple())) if last_modified else None
+        self.validators = (etag, timestamp)
+        return get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.validators is not None and response.status_code in (200, 304):
+            etag, timestamp = self.validators
+            response.headers["ETag"] = etag
+            if timestamp is not None:
+                response.headers["Last-Modified"] = http_date(timestamp)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
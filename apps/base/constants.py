@@ -0,0 +1,13 @@
+from apps.base.choices import StatusChoices
+
+
+# Moving a user into one of these statuses invalidates every token issued to them.
+TOKEN_REVOKING_STATUSES = (
+    StatusChoices.BLOCKED,
+    StatusChoices.SUSPENDED,
+    StatusChoices.DELETED,
+)
+
+# Fields tokens carry (apps.users.tokens.token_claims) or that grant
+# privileges; changing one invalidates every token issued to the user.
+TOKEN_CLAIM_FIELDS = ("email", "user_type", "is_staff", "is_superuser")
@@ -0,0 +1,241 @@
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_PIN_COOKIE = "primary_pin"
+PRIMARY_PIN_KEY = "db:primary-pin:{user_id}"
+
+# Lag of a PostgreSQL standby in seconds. A standby that has replayed all it
+# received is caught up even when the last replayed commit is old (an idle
+# primary); a server that is not in recovery has no lag at all.
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# Routing state of the request being handled, set by ReplicaRoutingMiddleware.
+_routing = ContextVar("db_routing", default=None)
+
+
+def replica_setting(name: str):
+    return settings.DATABASE_REPLICAS[name]
+
+
+def replica_aliases() -> list:
+    """Configured replica aliases; by default every database but ``default``."""
+    aliases = replica_setting("ALIASES")
+    if aliases is None:
+        aliases = [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+    return list(aliases)
+
+
+class RoutingState:
+    """Where the current request may read from, and whether it has written."""
+    __slots__ = ("read_alias", "wrote")
+
+    def __init__(self):
+        self.read_alias = None
+        self.wrote = False
+
+
+def replica_lag(connection) -> float:
+    """
+    Seconds ``connection``'s database is behind its primary.
+
+    Only PostgreSQL streaming replicas can be measured; other backends
+    (e.g. a copied SQLite file) are taken to be current.
+    """
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+class ReplicaHealth:
+    """
+    Per-process record of which replicas are fit to read from.
+
+    A replica's lag is measured at most every LAG_CHECK_INTERVAL seconds, by
+    the first request that needs it after that. A replica more than MAX_LAG
+    seconds behind, or one that cannot be reached, is skipped until a later
+    check finds it caught up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}  # alias -> (monotonic time, healthy)
+
+    def is_healthy(self, alias: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            checked = self._checked.get(alias)
+            if checked is not None and now - checked[0] < replica_setting("LAG_CHECK_INTERVAL"):
+                return checked[1]
+            # Claim the check so concurrent requests keep the previous verdict meanwhile.
+            self._checked[alias] = (now, checked[1] if checked else False)
+        healthy = self.check(alias)
+        with self._lock:
+            self._checked[alias] = (now, healthy)
+        return healthy
+
+    def check(self, alias: str) -> bool:
+        try:
+            lag = replica_lag(connections[alias])
+        except DatabaseError:
+            logger.warning("Replica %s is unreachable; reading from the primary.", alias, exc_info=True)
+            return False
+        if lag > replica_setting("MAX_LAG"):
+            logger.warning("Replica %s is %.1fs behind; reading from the primary.", alias, lag)
+            return False
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._checked.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def choose_replica():
+    """A random healthy replica alias, or None when there is none."""
+    healthy = [alias for alias in replica_aliases() if replica_health.is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+def is_pinned(request) -> bool:
+    """Whether the client wrote within the last STICKY_SECONDS (see pin_to_primary)."""
+    if request.COOKIES.get(PRIMARY_PIN_COOKIE):
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_authenticated and cache.get(PRIMARY_PIN_KEY.format(user_id=user.pk)))
+
+
+def pin_to_primary(request, response):
+    """
+    Keep the client's reads on the primary for STICKY_SECONDS.
+
+    The client is remembered by a cookie, and by user in the cache when the
+    request was authenticated, so reads from another device or from a
+    client that drops cookies are pinned too.
+    """
+    sticky = replica_setting("STICKY_SECONDS")
+    response.set_cookie(PRIMARY_PIN_COOKIE, "1", max_age=sticky, httponly=True, samesite="Lax")
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        cache.set(PRIMARY_PIN_KEY.format(user_id=user.pk), True, sticky)
+
+
+def use_replica(request):
+    """
+    Let the rest of ``request`` read from a replica.
+
+    Does nothing outside ReplicaRoutingMiddleware, without replicas, for
+    clients pinned to the primary, after the request has written, or when
+    every replica is lagging.
+    """
+    state = _routing.get()
+    if state is None or state.wrote or not replica_aliases() or is_pinned(request):
+        return
+    state.read_alias = choose_replica()
+
+
+class ReplicaRouter:
+    """
+    Database router sending opted-in reads to a read replica.
+
+    Reads go to the replica chosen by use_replica() for the current request
+    and to ``default`` otherwise; writes always go to ``default``. Every
+    write is noted, so the request stops reading from the replica and the
+    client is pinned to the primary afterwards.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or state.wrote:
+            return None
+        return state.read_alias
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Track database writes per request for ReplicaRouter.
+
+    Requests start out reading from the primary; views opt in to replicas
+    with use_replica() (see ReplicaReadMixin). When replicas are configured,
+    a request that wrote pins its client to the primary for STICKY_SECONDS,
+    so it reads its own writes while the replicas catch up.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response, state)
+
+    def finish(self, request, response, state):
+        if state.wrote and replica_aliases():
+            pin_to_primary(request, response)
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Let the ``replica_actions`` of a DRF view read from a replica.
+
+    The switch happens after authentication, permission and throttle
+    checks, so those still read the primary, and only for safe methods.
+    """
+    replica_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and request.method in SAFE_METHODS:
+            use_replica(request)
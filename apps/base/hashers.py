@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count taken from PASSWORD_HASHING.
+
+    Keeps Django's algorithm name so existing hashes stay valid; hashes with
+    a different iteration count are upgraded on the next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING["PBKDF2_ITERATIONS"] or PBKDF2PasswordHasher.iterations
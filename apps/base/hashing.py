@@ -0,0 +1,176 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from apps.base.metrics import timed
+
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The server is busy, please try again shortly."
+    default_code = "hashing_unavailable"
+
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+def _reset_after_fork():
+    global _executor, _slots, _lock
+    _lock = threading.Lock()
+    _executor = None
+    _slots = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _init_worker():
+    django.setup()
+
+
+def hashing_setting(name: str):
+    return settings.PASSWORD_HASHING[name]
+
+
+def _get_pool():
+    """
+    Lazily start this process's hashing pool.
+
+    Returns:
+        tuple: ``(executor, slots)``, or ``(None, None)`` when WORKERS is 0
+        and hashing runs inline on the calling thread.
+    """
+    global _executor, _slots
+    workers = hashing_setting("WORKERS")
+    if workers <= 0:
+        return None, None
+
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _slots = threading.BoundedSemaphore(workers + hashing_setting("MAX_PENDING"))
+                # Spawned, not forked: the web server's threads (and their
+                # locks) must not be copied into the workers.
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker,
+                )
+    return _executor, _slots
+
+
+def _run(fn, *args):
+    """
+    Run ``fn`` in the hashing pool and wait for the result.
+
+    A bounded number of hashes may be queued; once the pool is saturated
+    callers wait up to QUEUE_TIMEOUT seconds for a slot and then get
+    HashingUnavailable (503) instead of piling up behind the pool.
+    """
+    executor, slots = _get_pool()
+    with timed("hash"):
+        if executor is None:
+            return fn(*args)
+
+        if not slots.acquire(timeout=hashing_setting("QUEUE_TIMEOUT")):
+            raise HashingUnavailable()
+        try:
+            return executor.submit(fn, *args).result()
+        finally:
+            slots.release()
+
+
+async def _arun(fn, *args):
+    """
+    Async counterpart of ``_run``.
+
+    The event loop must never block on the queue, so a saturated pool is
+    rejected immediately with HashingUnavailable.
+    """
+    executor, slots = _get_pool()
+    with timed("hash"):
+        if executor is None:
+            return await sync_to_async(fn, thread_sensitive=False)(*args)
+
+        if not slots.acquire(blocking=False):
+            raise HashingUnavailable()
+        try:
+            return await asyncio.wrap_future(executor.submit(fn, *args))
+        finally:
+            slots.release()
+
+
+def verify_password(raw_password: str, encoded: str) -> tuple:
+    """
+    Check a password against an encoded hash off the request thread.
+
+    Returns:
+        tuple: ``(is_correct, must_update)``; ``must_update`` is True when
+        the hash was made with a different hasher or cost than the current
+        profile and should be replaced.
+    """
+    if raw_password is None or not encoded:
+        return False, False
+    return _run(hashers.verify_password, raw_password, encoded)
+
+
+def make_password(raw_password) -> str:
+    """Hash a password with the preferred hasher off the request thread."""
+    if raw_password is None:
+        return hashers.make_password(None)
+    return _run(hashers.make_password, raw_password)
+
+
+async def averify_password(raw_password: str, encoded: str) -> tuple:
+    """See verify_password()."""
+    if raw_password is None or not encoded:
+        return False, False
+    return await _arun(hashers.verify_password, raw_password, encoded)
+
+
+async def amake_password(raw_password) -> str:
+    """See make_password()."""
+    if raw_password is None:
+        return hashers.make_password(None)
+    return await _arun(hashers.make_password, raw_password)
+
+
+def hash_many(passwords: list) -> list:
+    """
+    Hash many passwords, spreading the work across the pool.
+
+    Unlike ``make_password`` this waits for capacity rather than failing,
+    and holds one queue slot per chunk so logins can still get through.
+    """
+    executor, slots = _get_pool()
+    if executor is None:
+        return [hashers.make_password(password) for password in passwords]
+
+    chunk_size = max(1, len(passwords) // (hashing_setting("WORKERS") * 4))
+    chunks = [passwords[start:start + chunk_size] for start in range(0, len(passwords), chunk_size)]
+    results = []
+    for start in range(0, len(chunks), hashing_setting("WORKERS")):
+        wave = chunks[start:start + hashing_setting("WORKERS")]
+        for _ in wave:
+            slots.acquire()
+        try:
+            futures = [executor.submit(_hash_chunk, chunk) for chunk in wave]
+            for future in futures:
+                results.extend(future.result())
+        finally:
+            for _ in wave:
+                slots.release()
+    return results
+
+
+def _hash_chunk(passwords: list) -> list:
+    return [hashers.make_password(password) for password in passwords]
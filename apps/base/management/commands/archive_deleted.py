@@ -0,0 +1,33 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.archive import archivable_models, archive_deleted
+
+
+class Command(BaseCommand):
+    help = "Move long soft-deleted rows to the archive table. Run periodically, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.ARCHIVE_DELETED_AFTER_DAYS,
+            help="Archive rows deleted more than this many days ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows moved per transaction.")
+        parser.add_argument("--model", action="append", help="Only this model (app_label.Model); repeatable.")
+
+    def handle(self, *args, **options):
+        models = archivable_models()
+        if options["model"]:
+            try:
+                selected = [apps.get_model(label) for label in options["model"]]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            unsupported = [model._meta.label for model in selected if model not in models]
+            if unsupported:
+                raise CommandError(f"No soft delete on: {', '.join(unsupported)}")
+            models = selected
+
+        for model in models:
+            archived = archive_deleted(model, options["days"], batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Archived {archived} {model._meta.label} row(s)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from drf_spectacular.validation import validate_schema
+
+from apps.base.schema import generate_schema, schema_version, write_schema_artifacts
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema once and write it as versioned JSON/YAML files for /api/schema/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--validate", action="store_true", help="Validate the schema before writing it.")
+
+    def handle(self, *args, **options):
+        schema = generate_schema()
+        if options["validate"]:
+            try:
+                validate_schema(schema)
+            except Exception as e:
+                raise CommandError(f"Invalid OpenAPI schema: {e}")
+
+        for path in write_schema_artifacts(schema):
+            self.stdout.write(f"Wrote {path}")
+        self.stdout.write(self.style.SUCCESS(f"OpenAPI schema {schema_version()} built."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.outbox import process_outbox, run_worker
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox in batches over a reused connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the due emails once and exit.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Emails per send_messages call.")
+        parser.add_argument("--interval", type=float, default=None, help="Seconds to sleep when the outbox is empty.")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            try:
+                sent = process_outbox(batch_size=options["batch_size"])
+            except Exception as e:
+                raise CommandError(f"Email outbox delivery failed: {e}")
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s)."))
+            return
+
+        self.stdout.write("Email outbox worker started.")
+        try:
+            run_worker(batch_size=options["batch_size"], poll_interval=options["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Email outbox worker stopped.")
@@ -0,0 +1,27 @@
+from django.db import models
+from django.db.models import Q
+
+from apps.base.choices import StatusChoices
+
+# Rows that are not soft-deleted. Partial indexes use this exact predicate as
+# their condition, so queries filtered through ``alive()`` can use them.
+ALIVE = ~Q(status=StatusChoices.DELETED)
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def alive(self):
+        """Rows that have not been soft-deleted."""
+        return self.filter(ALIVE)
+
+    def deleted(self):
+        """Soft-deleted rows only."""
+        return self.filter(status=StatusChoices.DELETED)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Default manager of every BaseModel.
+
+    Returns all rows, deleted ones included, so admin, uniqueness checks and
+    archival still see them; API lookups go through ``alive()``.
+    """
@@ -0,0 +1,191 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Profile of the request being handled, set only for sampled requests.
+_current_profile = ContextVar("request_profile", default=None)
+
+
+def metrics_setting(name: str):
+    return settings.METRICS[name]
+
+
+def label_value(value) -> str:
+    """``value`` escaped for a quoted Prometheus label (routes can hold backslashes)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestProfile:
+    """
+    Timings collected while handling one sampled request.
+
+    ``spans`` holds the time spent in named sections (e.g. "hash",
+    "serialize"); ``queries`` maps each SQL template to how often it ran,
+    which is what duplicate/N+1 detection works from.
+    """
+
+    def __init__(self):
+        self.sql_time = 0.0
+        self.query_count = 0
+        self.queries = {}
+        self.spans = {}
+        self._depth = {}
+
+    @property
+    def duplicate_count(self) -> int:
+        return sum(count - 1 for count in self.queries.values() if count > 1)
+
+
+def start_profile():
+    return _current_profile.set(RequestProfile())
+
+
+def end_profile(token):
+    profile = _current_profile.get()
+    _current_profile.reset(token)
+    return profile
+
+
+@contextmanager
+def timed(name: str):
+    """
+    Add the time spent in the block to the current request's ``name`` span.
+
+    Does nothing when the request is not sampled. Nested blocks with the
+    same name are only counted once, by the outermost one.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    depth = profile._depth.get(name, 0)
+    profile._depth[name] = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile._depth[name] = depth
+        if depth == 0:
+            profile.spans[name] = profile.spans.get(name, 0.0) + time.perf_counter() - start
+
+
+def query_wrapper(execute, sql, params, many, context):
+    """
+    Database execute wrapper recording query count and time.
+
+    Installed on every connection (see BaseConfig.ready); unsampled requests
+    pay a single context variable lookup per query.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.sql_time += time.perf_counter() - start
+        profile.query_count += 1
+        profile.queries[sql] = profile.queries.get(sql, 0) + 1
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_wrapper)
+
+
+class MetricsRegistry:
+    """
+    In-process store of request metrics, rendered in the Prometheus text format.
+
+    Each worker process keeps its own numbers; scrape every worker (or sum
+    them in Prometheus) when running several.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (method, route, status) -> [bucket counts..., +Inf count, sum]
+            self._latency = {}
+            # (name, route) -> value
+            self._counters = {}
+
+    def _inc(self, name: str, route: str, value: float):
+        key = (name, route)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe_request(self, method: str, route: str, status: int, duration: float, profile=None):
+        with self._lock:
+            key = (method, route, str(status))
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+            histogram[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+            histogram[-1] += duration
+
+            if profile is not None:
+                self._inc("http_sampled_requests_total", route, 1)
+                self._inc("http_db_queries_total", route, profile.query_count)
+                self._inc("http_db_duplicate_queries_total", route, profile.duplicate_count)
+                self._inc("http_db_seconds_total", route, profile.sql_time)
+                for span, seconds in profile.spans.items():
+                    self._inc(f"http_{span}_seconds_total", route, seconds)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            latency = {key: list(values) for key, values in self._latency.items()}
+            counters = dict(self._counters)
+
+        for (method, route, status), histogram in sorted(latency.items()):
+            labels = f'method="{label_value(method)}",route="{label_value(route)}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+        current = None
+        for (name, route), value in sorted(counters.items()):
+            if name != current:
+                lines.append(f"# TYPE {name} counter")
+                current = name
+            lines.append(f'{name}{{route="{label_value(route)}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def server_timing(profile, total: float) -> str:
+    """``Server-Timing`` header value for a sampled request."""
+    parts = [f'db;dur={profile.sql_time * 1000:.1f};desc="{profile.query_count} queries"']
+    parts += [f"{span};dur={seconds * 1000:.1f}" for span, seconds in profile.spans.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def report_duplicates(route: str, profile):
+    """Log SQL that ran often enough in one request to look like an N+1."""
+    threshold = metrics_setting("DUPLICATE_QUERY_THRESHOLD")
+    for sql, count in profile.queries.items():
+        if count >= threshold:
+            logger.warning("%s ran the same query %s times: %s", route, count, sql[:500])
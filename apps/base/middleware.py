@@ -0,0 +1,157 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from apps.base.metrics import end_profile, metrics_setting, registry, report_duplicates, server_timing, start_profile
+
+try:
+    import brotli
+except ImportError:  # optional; responses are gzipped instead
+    brotli = None
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows ``coding``.
+
+    q-values are honoured (``gzip;q=0`` refuses gzip), and ``*`` covers
+    codings the header does not name.
+    """
+    wildcard = False
+    for item in accept_encoding.split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.lower() == coding:
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return wildcard
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency for every request and a detailed profile for a sample.
+
+    Every request lands in the per-route latency histogram, which costs two
+    clock reads and a dict update. A SAMPLE_RATE fraction of requests is
+    also profiled: SQL count and time, duplicate queries, and hashing and
+    serializer time. Those requests get a ``Server-Timing`` header when
+    SERVER_TIMING is enabled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile = end_profile(token) if token else None
+        return self.finish(request, response, started, profile)
+
+    async def __acall__(self, request):
+        started, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile = end_profile(token) if token else None
+        return self.finish(request, response, started, profile)
+
+    def start(self, request):
+        sampled = metrics_setting("ENABLED") and random.random() < metrics_setting("SAMPLE_RATE")
+        return time.perf_counter(), start_profile() if sampled else None
+
+    def finish(self, request, response, started, profile):
+        if not metrics_setting("ENABLED"):
+            return response
+
+        duration = time.perf_counter() - started
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        registry.observe_request(request.method, route, response.status_code, duration, profile)
+
+        if profile is not None:
+            report_duplicates(route, profile)
+            if metrics_setting("SERVER_TIMING"):
+                response["Server-Timing"] = server_timing(profile, duration)
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress opted-in response bodies of at least COMPRESSION["MIN_LENGTH"] bytes.
+
+    Only responses marked by CompressedActionsMixin are touched, so bodies
+    holding secrets (tokens, OTPs) are never compressed next to request
+    controlled text, which would leak them through the size (BREACH).
+
+    Brotli is used when the ``brotli`` package is installed and the client
+    accepts it, gzip otherwise. Small bodies (single users, errors, 304s)
+    go out as they are: compressing them costs more than it saves. Streamed
+    responses are always gzipped.
+    """
+
+    def process_response(self, request, response):
+        if not getattr(response, "compressible", False):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION["MIN_LENGTH"]:
+            return response
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or not accepts_encoding(accept_encoding, "br")
+        ):
+            if not accepts_encoding(accept_encoding, "gzip"):
+                # GZipMiddleware alone would also take "gzip;q=0" as a yes.
+                patch_vary_headers(response, ("Accept-Encoding",))
+                return response
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed_content = brotli.compress(response.content, quality=settings.COMPRESSION["BROTLI_QUALITY"])
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+        # Same as GZipMiddleware: a transformed body can only carry a weak ETag.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
+
+
+class CompressedActionsMixin:
+    """
+    Let CompressionMiddleware compress GET responses of a DRF view's ``compressed_actions``.
+
+    Meant for large listings; leave out anything whose body carries a
+    secret.
+    """
+    compressed_actions = ()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.action in self.compressed_actions and request.method == "GET":
+            response.compressible = True
+        return response
@@ -1,15 +1,81 @@
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 
-from apps.base.choices import StatusChoices
+from apps.base.choices import EmailDeliveryStatusChoices, StatusChoices
+from apps.base.managers import SoftDeleteManager
 
 class BaseModel(models.Model):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True, unique=True, editable=False)
     status = models.CharField(max_length=20, choices=StatusChoices.choices, default=StatusChoices.DEFAULT)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
-    
-    
+
+    objects = SoftDeleteManager()
+
     class Meta:
         abstract = True
-        
\ No newline at end of file
+
+    def soft_delete(self):
+        """
+        Mark the row deleted instead of removing it.
+
+        ``updated`` doubles as the deletion time; ``manage.py archive_deleted``
+        moves rows deleted long enough ago to ArchivedRecord.
+        """
+        self.status = StatusChoices.DELETED
+        self.save(update_fields=["status", "updated"])
+
+
+class EmailOutbox(BaseModel):
+    """
+    Durable queue of outgoing emails.
+
+    Rows are written in the request path and drained by the
+    ``process_email_outbox`` worker, so no request ever waits on SMTP.
+    """
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default="html")
+    delivery_status = models.CharField(
+        max_length=20,
+        choices=EmailDeliveryStatusChoices.choices,
+        default=EmailDeliveryStatusChoices.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["delivery_status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email}"
+
+
+class ArchivedRecord(models.Model):
+    """
+    Cold storage for soft-deleted rows removed from their own table.
+
+    ``data`` holds the row's column values as they were when archived.
+    Nothing in the request path reads this table.
+    """
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=64)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    deleted_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "object_id"], name="archived_model_object_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
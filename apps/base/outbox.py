@@ -0,0 +1,226 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.base.choices import EmailDeliveryStatusChoices
+from apps.base.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_setting(name: str):
+    return settings.EMAIL_OUTBOX[name]
+
+
+def queue_email(to_email: str, subject: str, body: str, content_subtype: str = "html") -> EmailOutbox:
+    """
+    Persist an email in the outbox for asynchronous delivery.
+
+    Args:
+        to_email (str): Recipient address.
+        subject (str): Email subject line.
+        body (str): Rendered email body.
+        content_subtype (str, optional): MIME subtype of the body. Defaults to "html".
+
+    Returns:
+        EmailOutbox: The queued outbox row.
+
+    Note:
+        The row takes part in the caller's transaction, so an email is only
+        ever delivered for work that was actually committed.
+    """
+    return EmailOutbox.objects.create(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        content_subtype=content_subtype,
+    )
+
+
+async def aqueue_email(to_email: str, subject: str, body: str, content_subtype: str = "html") -> EmailOutbox:
+    """See queue_email()."""
+    return await EmailOutbox.objects.acreate(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        content_subtype=content_subtype,
+    )
+
+
+def queue_emails(messages) -> list:
+    """
+    Persist many emails with a single INSERT.
+
+    Args:
+        messages: Iterable of dicts with ``to_email``, ``subject``, ``body``
+            and optionally ``content_subtype``.
+
+    Returns:
+        list: The created EmailOutbox rows.
+    """
+    rows = [EmailOutbox(**message) for message in messages]
+    return EmailOutbox.objects.bulk_create(rows, batch_size=outbox_setting("BATCH_SIZE"))
+
+
+def claim_due_emails(batch_size: int) -> list:
+    """
+    Lease a batch of due emails to the calling worker.
+
+    Claimed rows get their ``next_attempt_at`` pushed out by the lease
+    duration, so other workers skip them and a crashed worker's batch is
+    picked up again once the lease expires.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = (
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(delivery_status=EmailDeliveryStatusChoices.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        batch = list(due)
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[row.pk for row in batch]).update(
+                attempts=F("attempts") + 1,
+                next_attempt_at=now + timedelta(seconds=outbox_setting("LEASE")),
+            )
+    return batch
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff for the given attempt number, capped at MAX_BACKOFF."""
+    delay = outbox_setting("RETRY_BACKOFF") * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, outbox_setting("MAX_BACKOFF")))
+
+
+def build_message(row: EmailOutbox, connection) -> EmailMessage:
+    message = EmailMessage(
+        subject=row.subject,
+        body=row.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[row.to_email],
+        connection=connection,
+    )
+    message.content_subtype = row.content_subtype
+    return message
+
+
+def reschedule(rows: list, error: str, now):
+    """Back ``rows`` off for another attempt; rows out of attempts are marked FAILED."""
+    max_attempts = outbox_setting("MAX_ATTEMPTS")
+    for row in rows:
+        # Claiming already counted this attempt in the database.
+        attempts = row.attempts + 1
+        row.last_error = error[:2000]
+        if attempts >= max_attempts:
+            row.delivery_status = EmailDeliveryStatusChoices.FAILED
+        row.next_attempt_at = now + retry_delay(attempts)
+    EmailOutbox.objects.bulk_update(rows, ["last_error", "delivery_status", "next_attempt_at"])
+
+
+def deliver_batch(batch: list, connection) -> int:
+    """
+    Send a claimed batch over an already open connection.
+
+    The whole batch goes through one ``send_messages`` call. Only as many
+    rows as the backend reports sent are marked SENT; the rest are
+    rescheduled with backoff. If the backend raises, every row in the batch
+    is rescheduled (delivery is at-least-once) and the exception is re-raised
+    so the caller can reset the connection.
+
+    Returns:
+        int: Number of emails sent.
+    """
+    if not batch:
+        return 0
+
+    now = timezone.now()
+    try:
+        sent = connection.send_messages([build_message(row, connection) for row in batch]) or 0
+    except Exception as e:
+        reschedule(batch, str(e), now)
+        logger.warning("Email outbox batch of %s failed: %s", len(batch), e)
+        raise
+
+    # Backends send in order and report how many went out, not which.
+    sent = min(sent, len(batch))
+    delivered, undelivered = batch[:sent], batch[sent:]
+    if delivered:
+        EmailOutbox.objects.filter(pk__in=[row.pk for row in delivered]).update(
+            delivery_status=EmailDeliveryStatusChoices.SENT,
+            sent_at=now,
+            last_error="",
+        )
+    if undelivered:
+        reschedule(undelivered, "Not sent by the email backend.", now)
+        logger.warning("Email outbox sent %s of %s emails; rescheduled the rest.", sent, len(batch))
+    return sent
+
+
+def process_outbox(batch_size: int = None, connection=None, max_batches: int = None) -> int:
+    """
+    Drain every due email from the outbox.
+
+    Args:
+        batch_size (int, optional): Rows per ``send_messages`` call.
+            Defaults to ``EMAIL_OUTBOX["BATCH_SIZE"]``.
+        connection (optional): Open email backend connection to reuse.
+            A new one is opened (and closed) when omitted.
+        max_batches (int, optional): Stop after this many batches.
+
+    Returns:
+        int: Number of emails sent.
+    """
+    batch_size = batch_size or outbox_setting("BATCH_SIZE")
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_connection(fail_silently=False)
+
+    sent = 0
+    batches = 0
+    try:
+        connection.open()
+        while max_batches is None or batches < max_batches:
+            batch = claim_due_emails(batch_size)
+            if not batch:
+                break
+            sent += deliver_batch(batch, connection)
+            batches += 1
+    finally:
+        if owns_connection:
+            connection.close()
+    return sent
+
+
+def run_worker(batch_size: int = None, poll_interval: float = None, stop=None):
+    """
+    Long running outbox worker.
+
+    Keeps a single backend connection open across batches and only
+    reconnects after a failure, so steady-state delivery pays the SMTP/TLS
+    handshake once rather than once per email.
+
+    Args:
+        batch_size (int, optional): Rows per ``send_messages`` call.
+        poll_interval (float, optional): Seconds to sleep when the outbox is empty.
+        stop (callable, optional): Returns True when the worker should exit.
+    """
+    poll_interval = poll_interval if poll_interval is not None else outbox_setting("POLL_INTERVAL")
+    connection = get_connection(fail_silently=False)
+    try:
+        while not (stop and stop()):
+            try:
+                sent = process_outbox(batch_size=batch_size, connection=connection)
+            except Exception:
+                logger.exception("Email outbox worker error, reconnecting")
+                connection.close()
+                sent = 0
+            if not sent:
+                time.sleep(poll_interval)
+    finally:
+        connection.close()
@@ -0,0 +1,74 @@
+from django.conf import settings
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CreatedCursorPagination(CursorPagination):
+    """
+    Keyset pagination over ``(created, id)``, newest first.
+
+    Each page is an indexed range scan from the cursor position, so deep
+    pages cost the same as the first one regardless of table size.
+    """
+    ordering = ("-created", "-id")
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class RankedPagination(BasePagination):
+    """
+    Page-number pagination for ranked results, without a COUNT.
+
+    Works on anything that can be sliced, e.g. apps.users.search.UserSearch.
+    One extra row is fetched to tell whether a next page exists.
+    """
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    page_query_param = "page"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page = self.get_int(request, self.page_query_param, 1)
+        self.size = min(self.get_int(request, self.page_size_query_param, self.page_size), self.max_page_size)
+        offset = (self.page - 1) * self.size
+        results = list(queryset[offset:offset + self.size + 1])
+        self.has_next = len(results) > self.size
+        return results[:self.size]
+
+    def get_int(self, request, name, default):
+        try:
+            return max(1, int(request.query_params.get(name, default)))
+        except (TypeError, ValueError):
+            return default
+
+    def get_page_link(self, page):
+        if page < 1:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, page)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_page_link(self.page + 1) if self.has_next else None,
+            "previous": self.get_page_link(self.page - 1),
+            "results": data,
+        })
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": name, "required": False, "in": "query", "schema": {"type": "integer"}}
+            for name in (self.page_query_param, self.page_size_query_param)
+        ]
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
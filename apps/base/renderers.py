@@ -0,0 +1,43 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional; rendering falls back to the json module
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    The output is byte-for-byte what JSONRenderer produces with the default
+    settings (compact, UTF-8, U+2028/U+2029 escaped). Anything orjson would
+    encode differently goes through the parent instead: indented output,
+    non-default JSON settings and values orjson rejects. Datetimes and
+    decimals are handed to the DRF encoder, as before. Floats are the
+    exception, though no endpoint returns them: exponents lose their padding
+    (``1e-7``, not ``1e-07``) and NaN/Infinity become ``null`` instead of
+    raising.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not (self.compact and self.ensure_ascii is False and self.strict)
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer: these are valid JSON but break
+        # JavaScript string literals.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -0,0 +1,85 @@
+import gzip
+import hashlib
+import os
+from pathlib import Path
+
+from django.conf import settings
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+SCHEMA_RENDERERS = {
+    "json": OpenApiJsonRenderer,
+    "yaml": OpenApiYamlRenderer,
+}
+
+# path -> (mtime, SchemaArtifact); artifacts are re-read only when rebuilt.
+_artifacts = {}
+
+
+def schema_version() -> str:
+    return spectacular_settings.VERSION or "0.0.0"
+
+
+def artifact_path(fmt: str, version: str = None) -> Path:
+    """Location of the prebuilt schema for an API version, e.g. ``openapi-1.0.0.json``."""
+    return Path(settings.OPENAPI_SCHEMA["DIR"]) / f"openapi-{version or schema_version()}.{fmt}"
+
+
+def generate_schema(api_version: str = None) -> dict:
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(api_version=api_version)
+    return generator.get_schema(request=None, public=True)
+
+
+def write_schema_artifacts(schema: dict, version: str = None) -> list:
+    """
+    Render the schema to JSON and YAML, each with a gzipped copy.
+
+    Files are written to a temporary name and renamed into place, so a
+    running server never serves a half-written artifact.
+
+    Returns:
+        list: Paths of the written files.
+    """
+    written = []
+    for fmt, renderer_class in SCHEMA_RENDERERS.items():
+        content = renderer_class().render(schema, renderer_context={})
+        path = artifact_path(fmt, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for target, data in ((path, content), (path.with_name(path.name + ".gz"), gzip.compress(content, mtime=0))):
+            tmp = target.with_name(target.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, target)
+            written.append(target)
+    return written
+
+
+class SchemaArtifact:
+    def __init__(self, content: bytes, gzipped: bytes):
+        self.content = content
+        self.gzipped = gzipped
+        self.etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+def load_schema_artifact(fmt: str):
+    """
+    Prebuilt schema for the current API version, or None if not built.
+
+    The file contents, gzipped copy and ETag are kept in memory and only
+    re-read when the file's mtime changes.
+    """
+    path = artifact_path(fmt)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    cached = _artifacts.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    content = path.read_bytes()
+    gz_path = path.with_name(path.name + ".gz")
+    gzipped = gz_path.read_bytes() if gz_path.exists() else gzip.compress(content, mtime=0)
+    artifact = SchemaArtifact(content, gzipped)
+    _artifacts[path] = (mtime, artifact)
+    return artifact
@@ -0,0 +1,74 @@
+from rest_framework import serializers
+
+from apps.base.metrics import timed
+
+
+class TimedSerializerMixin:
+    """Report time spent in ``to_representation`` as the request's "serialize" span."""
+
+    def to_representation(self, instance):
+        with timed("serialize"):
+            return super().to_representation(instance)
+
+
+def parse_fieldset(request, available) -> tuple:
+    """
+    Field names selected by the ``?fields=`` and ``?omit=`` query parameters.
+
+    Both take comma separated names; ``fields`` keeps only those, ``omit``
+    then drops names from what is left.
+
+    Args:
+        request: The DRF request.
+        available: The serializer's field names, in output order.
+
+    Returns:
+        tuple or None: The selected names in ``available`` order, or None
+        when neither parameter names a field.
+
+    Raises:
+        ValidationError: If a parameter names an unknown field.
+    """
+    selected = list(available)
+    given = False
+    for param in ("fields", "omit"):
+        raw = request.query_params.get(param, "")
+        names = {name.strip() for name in raw.split(",") if name.strip()}
+        if not names:
+            continue
+        given = True
+        unknown = names.difference(available)
+        if unknown:
+            raise serializers.ValidationError({
+                param: f"Unknown field(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(available)}."
+            })
+        if param == "fields":
+            selected = [name for name in selected if name in names]
+        else:
+            selected = [name for name in selected if name not in names]
+    return tuple(selected) if given else None
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer that can be narrowed to a subset of its fields.
+
+    Pass ``fieldset`` (e.g. from parse_fieldset) to drop the other fields;
+    ``columns(fieldset)`` lists the model columns those fields read, for
+    ``QuerySet.only()``. Fields not backed by a column of the same name
+    are mapped in ``field_columns``.
+    """
+    field_columns = {}
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fieldset is not None:
+            for name in set(self.fields).difference(fieldset):
+                self.fields.pop(name)
+
+    @classmethod
+    def columns(cls, fieldset) -> list:
+        columns = []
+        for name in fieldset:
+            columns.extend(cls.field_columns.get(name, (name,)))
+        return columns
@@ -1,3 +1,206 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from smtplib import SMTPException
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.base.account_utils import get_tokens_for_user
+from apps.base.choices import EmailDeliveryStatusChoices
+from apps.base.metrics import MetricsRegistry
+from apps.base.middleware import CompressionMiddleware, accepts_encoding
+from apps.base.models import EmailOutbox
+from apps.base.outbox import claim_due_emails, deliver_batch, process_outbox, queue_emails
+from apps.base.schema import load_schema_artifact, write_schema_artifacts
+from apps.base.throttling import LoginThrottle, _local_store
+
+OUTBOX = {"BATCH_SIZE": 50, "MAX_ATTEMPTS": 2, "RETRY_BACKOFF": 30, "MAX_BACKOFF": 3600, "LEASE": 300, "POLL_INTERVAL": 0}
+
+
+class FirstOnlyBackend(locmem.EmailBackend):
+    """Accepts only the first message of each batch."""
+
+    def send_messages(self, messages):
+        return super().send_messages(messages[:1])
+
+
+class FailingBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        raise SMTPException("Connection unexpectedly closed")
+
+
+@override_settings(EMAIL_OUTBOX=OUTBOX)
+class EmailOutboxTests(TestCase):
+    """The outbox worker leases batches, marks what was sent and backs off the rest."""
+
+    def setUp(self):
+        queue_emails([{"to_email": f"user{i}@outbox.local", "subject": "OTP", "body": str(i)} for i in range(3)])
+
+    def statuses(self) -> list:
+        return list(EmailOutbox.objects.order_by("to_email").values_list("delivery_status", flat=True))
+
+    def test_claim_leases_batch(self):
+        batch = claim_due_emails(2)
+        self.assertEqual(len(batch), 2)
+        leased = EmailOutbox.objects.filter(pk__in=[row.pk for row in batch])
+        self.assertEqual(set(leased.values_list("attempts", flat=True)), {1})
+        self.assertTrue(all(row.next_attempt_at > timezone.now() + timedelta(seconds=290) for row in leased))
+        # Leased rows are invisible to the next claim.
+        self.assertEqual([row.pk for row in claim_due_emails(10)], [EmailOutbox.objects.exclude(pk__in=leased).get().pk])
+
+    def test_process_sends_everything(self):
+        self.assertEqual(process_outbox(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(self.statuses(), [EmailDeliveryStatusChoices.SENT] * 3)
+
+    def test_only_delivered_rows_are_sent(self):
+        sent = deliver_batch(claim_due_emails(3), FirstOnlyBackend())
+        self.assertEqual(sent, 1)
+        self.assertEqual(self.statuses().count(EmailDeliveryStatusChoices.SENT), 1)
+        retried = EmailOutbox.objects.filter(delivery_status=EmailDeliveryStatusChoices.PENDING)
+        self.assertEqual(retried.count(), 2)
+        for row in retried:
+            self.assertEqual(row.last_error, "Not sent by the email backend.")
+            self.assertAlmostEqual(row.next_attempt_at, timezone.now() + timedelta(seconds=30), delta=timedelta(seconds=5))
+
+    def test_backoff_then_failed(self):
+        with self.assertRaises(SMTPException):
+            deliver_batch(claim_due_emails(3), FailingBackend())
+        self.assertEqual(self.statuses(), [EmailDeliveryStatusChoices.PENDING] * 3)
+        self.assertEqual(claim_due_emails(3), [])  # backing off
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        with self.assertRaises(SMTPException):
+            deliver_batch(claim_due_emails(3), FailingBackend())
+        # MAX_ATTEMPTS reached: given up on, with the last error kept.
+        self.assertEqual(self.statuses(), [EmailDeliveryStatusChoices.FAILED] * 3)
+        self.assertEqual(set(EmailOutbox.objects.values_list("last_error", flat=True)), {"Connection unexpectedly closed"})
+
+
+@override_settings(REST_FRAMEWORK={
+    "NUM_PROXIES": 0, "DEFAULT_THROTTLE_RATES": {"login_ip": "3/min", "login_email": "1/min"},
+})
+class RateThrottleTests(TestCase):
+    """Rejected requests charge no identity; the IP cannot be picked by the client."""
+
+    def setUp(self):
+        _local_store.clear()
+        cache.clear()
+
+    def allowed(self, email, forwarded_for="") -> bool:
+        request = APIRequestFactory().get("/", {"email": email}, HTTP_X_FORWARDED_FOR=forwarded_for)
+        return LoginThrottle().allow_request(request, None)
+
+    def test_rejected_requests_are_not_charged(self):
+        for store in ("local", "cache"):
+            with self.subTest(store=store), self.settings(THROTTLE_STORE=store):
+                self.setUp()
+                self.assertTrue(self.allowed("a@throttle.local"))
+                self.assertFalse(self.allowed("a@throttle.local"))  # email limit; the IP keeps its budget
+                self.assertTrue(self.allowed("b@throttle.local"))
+                self.assertTrue(self.allowed("c@throttle.local"))
+                self.assertFalse(self.allowed("d@throttle.local"))  # IP limit
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for number in range(3):
+            self.assertTrue(self.allowed(f"user{number}@throttle.local", forwarded_for=f"10.0.0.{number}"))
+        self.assertFalse(self.allowed("user9@throttle.local", forwarded_for="10.0.0.9"))
+
+
+def large_response(request):
+    response = HttpResponse(b"x" * 4096)
+    response.compressible = True
+    return response
+
+
+class AcceptEncodingTests(SimpleTestCase):
+    """Codings refused with q=0 are never used."""
+
+    def test_accepts_encoding(self):
+        cases = {
+            "gzip, deflate, br": True,
+            "gzip;q=0, br": False,
+            "GZIP; q=0.5": True,
+            "br;q=0.0": False,
+            "*;q=0.1": True,
+            "*, gzip;q=0": False,
+            "identity": False,
+            "": False,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertIs(accepts_encoding(header, "gzip"), expected)
+
+    def test_compression_honours_refusal(self):
+        middleware = CompressionMiddleware(large_response)
+        for header, encoding in (("gzip", "gzip"), ("gzip;q=0", None), ("br;q=0, gzip;q=0", None)):
+            with self.subTest(header=header):
+                response = middleware(RequestFactory().get("/", HTTP_ACCEPT_ENCODING=header))
+                self.assertEqual(response.get("Content-Encoding"), encoding)
+
+    def test_only_opted_in_responses_are_compressed(self):
+        response = CompressionMiddleware(lambda request: HttpResponse(b"x" * 4096))(
+            RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip, br")
+        )
+        self.assertNotIn("Content-Encoding", response)
+        self.assertNotIn("Vary", response)
+
+
+class MetricsTests(TestCase):
+    """Label values are escaped; staff reach /metrics with a JWT, others need the token."""
+
+    def test_label_values_are_escaped(self):
+        metrics = MetricsRegistry()
+        metrics.observe_request("GET", 'api/v1/users/(?P<pk>[^/.]+)\\"x\ny', 200, 0.01)
+        self.assertIn(r'route="api/v1/users/(?P<pk>[^/.]+)\\\"x\ny"', metrics.render())
+
+    @override_settings(METRICS={**settings.METRICS, "TOKEN": "scrape-secret"})
+    def test_access(self):
+        User = get_user_model()
+        staff = User.objects.create_user(email="staff@metrics.local", password="Metrics-Passw0rd", is_staff=True)
+        user = User.objects.create_user(email="user@metrics.local", password="Metrics-Passw0rd")
+        cases = {
+            "": 403,
+            "Bearer scrape-secret": 200,
+            "Bearer wrong": 403,
+            f"Bearer {get_tokens_for_user(user)['access']}": 403,
+            f"Bearer {get_tokens_for_user(staff)['access']}": 200,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header[:20]):
+                self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION=header).status_code, expected)
+
+
+class PrebuiltSchemaViewTests(TestCase):
+    """If-None-Match is matched tag by tag, not as a substring of the header."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        schema_settings = self.settings(OPENAPI_SCHEMA={**settings.OPENAPI_SCHEMA, "DIR": directory.name, "LIVE": False})
+        schema_settings.enable()
+        self.addCleanup(schema_settings.disable)
+        write_schema_artifacts({"openapi": "3.0.3", "info": {"title": "Test", "version": "1"}, "paths": {}})
+        self.etag = load_schema_artifact("json").etag
+
+    def test_if_none_match(self):
+        cases = {
+            self.etag: 304,
+            f"W/{self.etag}": 304,
+            f'"other", {self.etag}': 304,
+            "*": 304,
+            f'"other"{self.etag}': 200,
+            f'"{self.etag[1:-1]}-v2"': 200,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get("/api/schema/", {"format": "json"}, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, expected)
+                self.assertEqual(response["ETag"], self.etag)
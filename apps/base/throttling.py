@@ -0,0 +1,215 @@
+import hashlib
+import json
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str) -> tuple:
+    """
+    Parse a DRF style rate such as "5/min" or "100/hour".
+
+    Returns:
+        tuple: ``(num_requests, period_seconds)``.
+    """
+    num, period = rate.split("/")
+    return int(num), PERIODS[period[0]]
+
+
+class LocalRateStore:
+    """
+    In-process token buckets.
+
+    Each key holds ``num`` tokens refilled evenly over ``period``. Checks are
+    a dict lookup under a lock, so rejecting abusive traffic costs no I/O.
+    Limits are per process; use CacheRateStore to share them.
+    """
+    prune_every = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._hits = 0
+
+    def hit(self, limits) -> tuple:
+        """
+        Consume one request from every bucket in ``limits``, or from none.
+
+        Args:
+            limits: ``(key, num, period)`` tuples.
+
+        Returns:
+            tuple: ``(allowed, retry_after_seconds)``. A request any bucket
+            rejects uses up none of the others.
+        """
+        now = time.monotonic()
+        with self._lock:
+            buckets = {}
+            retry_after = 0
+            for key, num, period in limits:
+                tokens, updated = self._buckets.get(key, (num, now))
+                tokens = min(num, tokens + (now - updated) * num / period)
+                if tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) * period / num)
+                buckets[key] = tokens
+            allowed = not retry_after
+            for key, tokens in buckets.items():
+                self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+
+            self._hits += 1
+            if self._hits % self.prune_every == 0:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now: float):
+        # A bucket idle for a full day is certainly full again; forget it.
+        idle = [key for key, (_, updated) in self._buckets.items() if now - updated > PERIODS["d"]]
+        for key in idle:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheRateStore:
+    """
+    Sliding-window counters in a Django cache, shared by every process.
+
+    Approximates a true sliding window from the current and previous fixed
+    windows, which needs only two cache keys per client.
+    """
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def hit(self, limits) -> tuple:
+        """See LocalRateStore.hit(); every window is read in one round-trip."""
+        now = time.time()
+        windows = []
+        for key, num, period in limits:
+            window = int(now // period)
+            windows.append((f"{key}:{window}", f"{key}:{window - 1}", num, period, (now % period) / period))
+        counts = self.cache.get_many([key for current, previous, *_ in windows for key in (current, previous)])
+
+        retry_after = 0
+        for current, previous, num, period, elapsed in windows:
+            if counts.get(previous, 0) * (1 - elapsed) + counts.get(current, 0) >= num:
+                retry_after = max(retry_after, math.ceil(period * (1 - elapsed)))
+        if retry_after:
+            return False, retry_after
+
+        for current, _, _, period, _ in windows:
+            if not self.cache.add(current, 1, period * 2):
+                try:
+                    self.cache.incr(current)
+                except ValueError:
+                    self.cache.set(current, 1, period * 2)
+        return True, 0
+
+    def clear(self):
+        pass
+
+
+_local_store = LocalRateStore()
+
+
+def get_rate_store():
+    if settings.THROTTLE_STORE == "cache":
+        return CacheRateStore(settings.THROTTLE_CACHE_ALIAS)
+    return _local_store
+
+
+def get_request_email(request) -> str:
+    """Email a request is about, from the body or the query string."""
+    data = getattr(request, "data", None)
+    if data is None:
+        # Plain Django request (async views): parse the JSON body ourselves.
+        try:
+            data = json.loads(request.body) if request.body else {}
+        except (ValueError, UnicodeDecodeError):
+            data = {}
+    email = data.get("email") if hasattr(data, "get") else None
+    email = email or request.GET.get("email") or ""
+    return str(email).lower().strip()
+
+
+class RateThrottle(BaseThrottle):
+    """
+    Throttle keyed by several identities at once.
+
+    ``rates`` maps an identity source ("ip", "email" or "user") to a scope in
+    ``REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]``. A request is rejected when
+    any of its identities is over its rate, before the view touches the
+    database or the hashing pool, and a rejected request counts against
+    none of them. The IP is REMOTE_ADDR, or the client address from
+    X-Forwarded-For behind ``REST_FRAMEWORK["NUM_PROXIES"]`` proxies.
+    """
+    rates = {}
+
+    def get_identity(self, source: str, request):
+        if source == "ip":
+            return self.get_ident(request)
+        if source == "email":
+            return get_request_email(request) or None
+        if source == "user":
+            user = getattr(request, "user", None)
+            return str(user.pk) if user is not None and user.is_authenticated else None
+        raise ValueError(f"Unknown throttle identity source: {source}")
+
+    def allow_request(self, request, view):
+        limits = []
+        for source, scope in self.rates.items():
+            rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+            identity = self.get_identity(source, request)
+            if not rate or identity is None:
+                continue
+            num, period = parse_rate(rate)
+            digest = hashlib.sha1(identity.encode()).hexdigest()
+            limits.append((f"throttle:{scope}:{digest}", num, period))
+        self.retry_after = 0
+        if not limits:
+            return True
+        # All identities are checked before any is charged.
+        allowed, self.retry_after = get_rate_store().hit(limits)
+        return allowed
+
+    def wait(self):
+        return self.retry_after or None
+
+
+class LoginThrottle(RateThrottle):
+    rates = {"ip": "login_ip", "email": "login_email"}
+
+
+class SignupThrottle(RateThrottle):
+    rates = {"ip": "signup_ip"}
+
+
+class OTPSendThrottle(RateThrottle):
+    rates = {"ip": "otp_send_ip", "email": "otp_send_email"}
+
+
+class OTPSendCooldownThrottle(RateThrottle):
+    """Minimum gap between two OTP emails to the same address."""
+    rates = {"email": "otp_send_cooldown"}
+
+
+class OTPVerifyThrottle(RateThrottle):
+    """Caps guesses at a 6-digit code per address."""
+    rates = {"ip": "otp_verify_ip", "email": "otp_verify_email"}
+
+
+class PasswordResetThrottle(RateThrottle):
+    rates = {"ip": "password_reset_ip", "email": "password_reset_email"}
@@ -1,3 +1,80 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from apps.base.metrics import metrics_setting, registry
+from apps.base.middleware import accepts_encoding
+from apps.base.schema import load_schema_artifact
+
+
+class SchemaUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The API schema has not been built. Run `python manage.py build_openapi_schema`."
+
+
+class PrebuiltSchemaView(SpectacularAPIView):
+    """
+    Serve the OpenAPI schema written by ``build_openapi_schema``.
+
+    Generating the schema walks every view, so it is done once at build time
+    and requests only read the cached artifact, honouring If-None-Match and
+    gzip. With ``OPENAPI_SCHEMA["LIVE"]`` (the dev default) it is generated
+    on every request as before, so schema changes show up immediately.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if settings.OPENAPI_SCHEMA["LIVE"]:
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        artifact = load_schema_artifact(renderer.format)
+        if artifact is None:
+            raise SchemaUnavailable()
+
+        use_gzip = accepts_encoding(request.headers.get("Accept-Encoding", ""), "gzip")
+        # The gzipped body is a different representation, so it gets its own tag.
+        etag = f'{artifact.etag[:-1]}-gzip"' if use_gzip else artifact.etag
+
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                artifact.gzipped if use_gzip else artifact.content,
+                content_type=f"{renderer.media_type}; charset={renderer.charset}" if renderer.charset else renderer.media_type,
+            )
+            response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, None)}"'
+            if use_gzip:
+                response["Content-Encoding"] = "gzip"
+
+        response["ETag"] = etag
+        response["Cache-Control"] = f"public, max-age={settings.OPENAPI_SCHEMA['MAX_AGE']}"
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
+
+
+def is_staff_request(request) -> bool:
+    """Whether a session or any DRF authentication class (e.g. a JWT) identifies a staff user."""
+    if request.user.is_staff:
+        return True
+    authenticators = [authentication() for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        return Request(request, authenticators=authenticators).user.is_staff
+    except AuthenticationFailed:
+        return False
+
+
+def metrics_view(request):
+    """Request metrics in the Prometheus text format, for staff or the METRICS_TOKEN bearer."""
+    token = metrics_setting("TOKEN")
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not ((token and hmac.compare_digest(supplied, token)) or is_staff_request(request)):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,103 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def activity_setting(name: str):
+    return settings.ACTIVITY_BUFFER[name]
+
+
+class ActivityBuffer:
+    """
+    Coalesces ``last_login`` writes.
+
+    Logins only record ``user_id -> timestamp`` in memory. A timer thread
+    writes the buffer with one bulk UPDATE per chunk FLUSH_INTERVAL seconds
+    after the first pending entry, or right away once MAX_PENDING users are
+    waiting, so a burst of logins costs a handful of statements instead of
+    one per login. A user who logs in several times between flushes is
+    written once, with the latest time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def record(self, user_id, when=None):
+        when = when or timezone.now()
+        with self._lock:
+            self._pending[user_id] = max(when, self._pending.get(user_id, when))
+            if len(self._pending) >= activity_setting("MAX_PENDING"):
+                # Flush now, but still off the request thread (which may be
+                # running an async view).
+                self._schedule(0)
+            elif self._timer is None:
+                self._schedule(activity_setting("FLUSH_INTERVAL"))
+
+    def _schedule(self, delay):
+        if self._timer is not None:
+            if delay or not self._timer.interval:
+                return
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self.flush_quietly)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush_quietly(self):
+        """flush() from the timer thread or at exit, where nobody can handle errors."""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush user activity")
+        finally:
+            # This thread opened its own connection; don't leak it.
+            connections.close_all()
+
+    def flush(self) -> int:
+        """
+        Write all pending timestamps.
+
+        Returns:
+            int: Number of users updated.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        User = get_user_model()
+        items = list(pending.items())
+        chunk_size = activity_setting("CHUNK_SIZE")
+        updated = 0
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            last_login = Case(
+                *[When(pk=user_id, then=Value(when)) for user_id, when in chunk],
+                output_field=DateTimeField(),
+            )
+            updated += User.objects.filter(pk__in=[user_id for user_id, _ in chunk]).update(last_login=last_login)
+        return updated
+
+
+activity_buffer = ActivityBuffer()
+atexit.register(activity_buffer.flush_quietly)
+
+
+def record_login(user_id):
+    """Buffer a ``last_login`` update for the user (see ActivityBuffer)."""
+    from rest_framework_simplejwt.settings import api_settings
+
+    if api_settings.UPDATE_LAST_LOGIN:
+        activity_buffer.record(user_id)
@@ -0,0 +1,180 @@
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, Throttled
+
+from apps.base.account_utils import (
+    aactivate_verified_user,
+    acomplete_password_reset,
+    ainitiate_password_reset,
+    asend_otp_email,
+    aset_user_otp,
+    get_tokens_for_user,
+)
+from apps.base.choices import OTPPurposeChoices
+from apps.base.hashing import amake_password
+from apps.base.throttling import (
+    LoginThrottle,
+    OTPSendCooldownThrottle,
+    OTPSendThrottle,
+    OTPVerifyThrottle,
+    PasswordResetThrottle,
+)
+from apps.users.activity import record_login
+from apps.users.cache import cache_user_detail
+from apps.users.otp import aconsume_otp
+from apps.users.serializers import (
+    LoginSerializer,
+    OTPVerificationSerializer,
+    PasswordResetCompleteSerializer,
+    PasswordResetRequestSerializer,
+)
+
+User = get_user_model()
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async JSON view for the hot authentication flows.
+
+    DRF views are synchronous, so these hold a thread for every database
+    round-trip. Under ASGI the views below await the async ORM, the hashing
+    pool and the email outbox instead, and one process can keep thousands of
+    auth requests in flight. Request validation reuses the DRF serializers'
+    field rules and errors are rendered in the same shape DRF uses.
+    """
+
+    throttle_classes = {}
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def check_throttles(self, request):
+        """Reject over-limit clients before any database or hashing work."""
+        for throttle_class in self.throttle_classes.get(request.method, ()):
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                raise Throttled(throttle.wait())
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            self.check_throttles(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except serializers.ValidationError as e:
+            return JsonResponse(serializers.as_serializer_error(e), status=status.HTTP_400_BAD_REQUEST)
+        except APIException as e:
+            response = JsonResponse({"detail": e.detail}, status=e.status_code)
+            if getattr(e, "wait", None):
+                response["Retry-After"] = str(math.ceil(e.wait))
+            return response
+
+    def get_data(self):
+        if not self.request.body:
+            return {}
+        try:
+            return json.loads(self.request.body)
+        except json.JSONDecodeError:
+            raise serializers.ValidationError({"detail": "Invalid JSON body."})
+
+    def validate_fields(self, serializer_class, data) -> dict:
+        """
+        Run a serializer's field-level validation only.
+
+        ``validate()`` on the login and OTP serializers hits the database
+        synchronously, so the async views do those checks themselves.
+        """
+        return serializer_class().to_internal_value(data)
+
+
+class AsyncLoginView(AsyncAPIView):
+    throttle_classes = {"POST": [LoginThrottle]}
+
+    async def post(self, request, *args, **kwargs):
+        data = self.validate_fields(LoginSerializer, self.get_data())
+
+        user = await User.objects.filter(email=data["email"]).afirst()
+        if user is None:
+            # Hash anyway so response timing does not reveal unknown emails.
+            await amake_password(data["password"])
+            raise serializers.ValidationError({"detail": "Invalid credentials."})
+
+        is_correct = await user.acheck_password(data["password"])
+        LoginSerializer().check_user_status(user)
+        if not is_correct:
+            raise serializers.ValidationError({"detail": "Invalid credentials."})
+
+        tokens = get_tokens_for_user(user)
+        record_login(user.pk)
+        return JsonResponse({
+            "user": await sync_to_async(cache_user_detail)(user),
+            "tokens": {
+                "access": tokens['access'],
+                "refresh": tokens['refresh'],
+            }
+        }, status=status.HTTP_200_OK)
+
+
+class AsyncEmailVerificationView(AsyncAPIView):
+    throttle_classes = {
+        "GET": [OTPSendCooldownThrottle, OTPSendThrottle],
+        "POST": [OTPVerifyThrottle],
+    }
+
+    async def get(self, request, *args, **kwargs):
+        email = request.GET.get('email')
+        if not email:
+            return JsonResponse({"detail": "Email is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = await User.objects.alive().filter(email=email).afirst()
+        if user is None:
+            return JsonResponse({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        otp = await aset_user_otp(user)
+        await asend_otp_email(user, otp, "email verification")
+        return JsonResponse({"detail": "OTP sent to your email."}, status=status.HTTP_200_OK)
+
+    async def post(self, request, *args, **kwargs):
+        data = self.validate_fields(OTPVerificationSerializer, self.get_data())
+
+        row = await aconsume_otp(data["email"], data["otp"], OTPPurposeChoices.EMAIL_VERIFICATION)
+        if row is None:
+            raise serializers.ValidationError({"detail": "Invalid or expired OTP."})
+
+        await aactivate_verified_user(row.user_id)
+        return JsonResponse({"detail": "OTP verified successfully."}, status=status.HTTP_200_OK)
+
+
+class AsyncPasswordRequestResetView(AsyncAPIView):
+    throttle_classes = {"POST": [OTPSendCooldownThrottle, PasswordResetThrottle]}
+
+    async def post(self, request, *args, **kwargs):
+        serializer = PasswordResetRequestSerializer(data=self.get_data())
+        serializer.is_valid(raise_exception=True)
+        await ainitiate_password_reset(serializer.validated_data['email'])
+        return JsonResponse({
+            "message": "If an account with this email exists, a password reset link has been sent."
+        }, status=status.HTTP_200_OK)
+
+
+class AsyncPasswordResetConfirmView(AsyncAPIView):
+    throttle_classes = {"POST": [OTPVerifyThrottle]}
+
+    async def post(self, request, *args, **kwargs):
+        serializer = PasswordResetCompleteSerializer(data=self.get_data())
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if not await acomplete_password_reset(data['email'], data['otp'], data['new_password']):
+            raise serializers.ValidationError(
+                {"detail": "Password reset failed. Invalid OTP or user not found."}
+            )
+        return JsonResponse({
+            "message": "Password reset successful. You can now log in with your new password."
+        }, status=status.HTTP_200_OK)
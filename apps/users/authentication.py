@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication as BaseJWTAuthentication
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.base.constants import TOKEN_REVOKING_STATUSES
+from apps.users.revocation import is_revoked
+from apps.users.tokens import TOKEN_VERSION_CLAIM, get_token_version
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from signed token claims.
+
+    Exposes the handful of fields the API needs for permission checks.
+    Views that need the real model call ``get_user_instance`` which loads
+    the row on first access.
+    """
+
+    @cached_property
+    def email(self) -> str:
+        return self.token.get("email", "")
+
+    @cached_property
+    def user_type(self) -> str:
+        return self.token.get("user_type", "")
+
+    @cached_property
+    def status(self) -> str:
+        return self.token.get("status", "")
+
+    @cached_property
+    def token_version(self) -> int:
+        return self.token.get(TOKEN_VERSION_CLAIM)
+
+    @cached_property
+    def instance(self):
+        return get_user_model().objects.get(pk=self.id)
+
+
+class RevocationCheckMixin:
+    """Reject tokens revoked through apps.users.revocation (e.g. on logout)."""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_revoked(validated_token.get(api_settings.JTI_CLAIM)):
+            raise AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+        return validated_token
+
+
+class JWTAuthentication(RevocationCheckMixin, BaseJWTAuthentication):
+    """
+    Default JWT authentication, loading the User row per request.
+
+    The row is at hand, so the token version claim is compared with it
+    directly: tokens issued before a block, suspension, deletion or password
+    change are rejected without another query.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        version = validated_token.get(TOKEN_VERSION_CLAIM)
+        if version is not None and version != user.token_version:
+            raise AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+        return user
+
+
+class StatelessJWTAuthentication(RevocationCheckMixin, JWTStatelessUserAuthentication):
+    """
+    Opt-in JWT authentication that skips the per-request User SELECT.
+
+    The token version claim is compared with the user's current version
+    (cached, see ``apps.users.tokens``), so blocking, suspending or a
+    password change still invalidates outstanding tokens. Enable it with
+    ``JWT_STATELESS_AUTH=True``.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = ClaimsUser(validated_token)
+        if user.token_version is None:
+            raise InvalidToken(_("Token was issued before stateless authentication was enabled"))
+
+        if user.status in TOKEN_REVOKING_STATUSES:
+            raise AuthenticationFailed(_("User account is blocked or suspended."), code="user_inactive")
+
+        if get_token_version(user.id) != user.token_version:
+            raise AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+
+        return user
+
+
+def get_user_instance(user):
+    """Return the User model instance behind a request user."""
+    return user.instance if isinstance(user, ClaimsUser) else user
@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from apps.base.account_utils import build_otp_email, email_validator, generate_otp
+from apps.base.choices import OTPPurposeChoices, UserTypeChoices
+from apps.base.hashing import hash_many
+from apps.base.outbox import queue_emails
+from apps.users.cache import bump_user_list_generation
+from apps.users.counters import adjust_counters, count_users
+from apps.users.otp import build_otp, store_otps
+from apps.users.search import index_users
+
+User = get_user_model()
+
+IMPORT_FIELDS = ("email", "first_name", "last_name", "user_type", "password")
+
+
+def parse_import_file(fileobj, file_format: str) -> list:
+    """
+    Read user rows from an uploaded CSV or JSON file.
+
+    Args:
+        fileobj: Binary or text file-like object.
+        file_format (str): "csv" or "json".
+
+    Returns:
+        list: One dict per row.
+
+    Raises:
+        ValueError: If the format is unsupported or the content is malformed.
+    """
+    content = fileobj.read()
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+
+    if file_format == "csv":
+        return list(csv.DictReader(io.StringIO(content)))
+    if file_format == "json":
+        try:
+            rows = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if isinstance(rows, dict):
+            rows = rows.get("users", [])
+        if not isinstance(rows, list):
+            raise ValueError("JSON content must be a list of users.")
+        return rows
+    raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def validate_rows(rows) -> tuple:
+    """
+    Validate and normalize all rows in a single pass.
+
+    Returns:
+        tuple: ``(valid, report)`` where ``valid`` maps row index to the
+        cleaned row and ``report`` holds one entry per row.
+    """
+    user_types = set(UserTypeChoices.values)
+    seen = set()
+    valid = {}
+    report = []
+
+    for index, raw in enumerate(rows):
+        raw = raw if isinstance(raw, dict) else {}
+        row = {field: str(raw.get(field) or "").strip() for field in IMPORT_FIELDS}
+        # Stored as signups store it; duplicates are found case-insensitively.
+        row["email"] = User.objects.normalize_email(row["email"])
+        row["user_type"] = row["user_type"].lower() or UserTypeChoices.USER
+
+        errors = []
+        if not email_validator(row["email"]):
+            errors.append("Invalid email format.")
+        elif row["email"].lower() in seen:
+            errors.append("Duplicate email in import.")
+        if not row["first_name"]:
+            errors.append("First name is required.")
+        if not row["last_name"]:
+            errors.append("Last name is required.")
+        if row["user_type"] not in user_types:
+            errors.append(f"Invalid user type: {row['user_type']}.")
+        if row["password"] and len(row["password"]) < 8:
+            errors.append("Passwords must be at least 8 characters.")
+
+        seen.add(row["email"].lower())
+        entry = {"row": index, "email": row["email"], "status": "error" if errors else "pending", "errors": errors}
+        report.append(entry)
+        if not errors:
+            valid[index] = row
+
+    return valid, report
+
+
+def import_users(rows, send_invites: bool = True) -> dict:
+    """
+    Create many users at once.
+
+    Rows are validated in one pass, deduplicated (ignoring case) against
+    the table with a single query, hashed in the shared hashing pool and inserted with
+    bulk_create in chunks. Every created user gets an email verification
+    OTP, stored with one upsert per chunk, and the OTP emails are queued in
+    bulk.
+
+    Args:
+        rows: Iterable of dicts with email, first_name, last_name and
+            optionally user_type and password. Rows without a password get an
+            unusable one and set it later through password reset.
+        send_invites (bool, optional): Queue the OTP emails. Defaults to True.
+
+    Returns:
+        dict: ``{"created": int, "failed": int, "results": [...]}`` with one
+        result per input row.
+    """
+    valid, report = validate_rows(list(rows))
+
+    existing = set(
+        User.objects.annotate(email_lower=Lower("email"))
+        .filter(email_lower__in=[row["email"].lower() for row in valid.values()])
+        .values_list("email_lower", flat=True)
+    )
+    for index in [index for index, row in valid.items() if row["email"].lower() in existing]:
+        report[index].update(status="error", errors=["A user with this email already exists."])
+        del valid[index]
+
+    indexes = list(valid)
+    hashed = hash_many([valid[index]["password"] or None for index in indexes])
+
+    users = {}
+    for index, password in zip(indexes, hashed):
+        row = valid[index]
+        users[index] = User(
+            email=row["email"],
+            first_name=row["first_name"],
+            last_name=row["last_name"],
+            user_type=row["user_type"],
+            password=password,
+            is_active=False,
+            is_student=row["user_type"] == UserTypeChoices.STUDENT,
+            otp_verified=False,
+        )
+
+    chunk_size = settings.BULK_IMPORT["CHUNK_SIZE"]
+    created = []
+    for start in range(0, len(indexes), chunk_size):
+        chunk = indexes[start:start + chunk_size]
+        with transaction.atomic():
+            User.objects.bulk_create([users[index] for index in chunk], ignore_conflicts=True)
+            # Rows lost to a concurrent signup are silently skipped by
+            # ignore_conflicts; confirm which ones actually landed.
+            inserted = set(
+                User.objects.filter(pk__in=[users[index].pk for index in chunk]).values_list("pk", flat=True)
+            )
+            landed = [(users[index], generate_otp()) for index in chunk if users[index].pk in inserted]
+            index_users(user for user, _ in landed)
+            adjust_counters(count_users(user for user, _ in landed))
+            store_otps([build_otp(user, OTPPurposeChoices.EMAIL_VERIFICATION, otp) for user, otp in landed])
+            transaction.on_commit(bump_user_list_generation)
+        created.extend(landed)
+
+        for index in chunk:
+            if users[index].pk in inserted:
+                report[index].update(status="created", id=str(users[index].pk))
+            else:
+                report[index].update(status="error", errors=["A user with this email already exists."])
+
+    if send_invites and created:
+        queue_emails(build_otp_email(user, otp, "email verification") for user, otp in created)
+
+    return {
+        "created": len(created),
+        "failed": len(report) - len(created),
+        "results": report,
+    }
@@ -0,0 +1,94 @@
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.base.choices import StatusChoices
+from apps.base.constants import TOKEN_REVOKING_STATUSES
+from apps.users.cache import bump_user_list_generation, invalidate_user_details
+from apps.users.counters import adjust_counters, count_change
+from apps.users.search import index_users, unindex_users
+from apps.users.tokens import cache_token_versions
+
+User = get_user_model()
+
+LOCKED_FIELDS = ("pk", "status", "user_type", "otp_verified", "token_version", "email", "first_name", "last_name")
+
+
+class TooManyUsers(Exception):
+    """More users match than one bulk change may touch (BULK_STATUS["MAX_USERS"])."""
+
+
+def change_status(queryset, status: str) -> dict:
+    """
+    Move every user in ``queryset`` to ``status`` with one UPDATE.
+
+    Users already in ``status`` are left alone. The rows are read (locked)
+    and updated in one transaction, which also moves the stats counters and
+    the search index. Moving users into a token revoking status bumps their
+    ``token_version`` in the same UPDATE, so every token they hold stops
+    working; soft deleting also deactivates, as User.soft_delete() does,
+    and moving users to ACTIVE activates them.
+    Detail caches are dropped and the new token versions published once the
+    transaction commits.
+
+    Args:
+        queryset: Users to change, e.g. ``User.objects.matching(...)``.
+        status (str): A StatusChoices value.
+
+    Returns:
+        dict: ``{"matched", "updated", "unchanged", "tokens_revoked"}`` counts.
+
+    Raises:
+        TooManyUsers: If more than BULK_STATUS["MAX_USERS"] users match;
+            nothing is changed.
+    """
+    limit = settings.BULK_STATUS["MAX_USERS"]
+    revoking = status in TOKEN_REVOKING_STATUSES
+    changes = {"status": status, "updated": timezone.now()}
+    if revoking:
+        changes["token_version"] = F("token_version") + 1
+    if status == StatusChoices.DELETED:
+        changes["is_active"] = False
+    elif status == StatusChoices.ACTIVE:
+        changes["is_active"] = True
+
+    with transaction.atomic():
+        rows = list(queryset.order_by().select_for_update().values(*LOCKED_FIELDS)[:limit + 1])
+        if len(rows) > limit:
+            raise TooManyUsers(f"More than {limit} users match; narrow the selection.")
+        changed = [row for row in rows if row["status"] != status]
+        ids = [row["pk"] for row in changed]
+        if changed:
+            User.objects.filter(pk__in=ids).update(**changes)
+
+            deltas = Counter()
+            for row in changed:
+                counted = {"user_type": row["user_type"], "otp_verified": row["otp_verified"]}
+                deltas.update(count_change({**counted, "status": row["status"]}, {**counted, "status": status}))
+            adjust_counters(deltas)
+
+            if status == StatusChoices.DELETED:
+                unindex_users(ids)
+            else:
+                # Only users coming back from deleted are missing from the index.
+                index_users(
+                    User(pk=row["pk"], status=status, email=row["email"], first_name=row["first_name"], last_name=row["last_name"])
+                    for row in changed if row["status"] == StatusChoices.DELETED
+                )
+
+            transaction.on_commit(lambda: invalidate_user_details(ids))
+            transaction.on_commit(bump_user_list_generation)
+            if revoking:
+                versions = {row["pk"]: row["token_version"] + 1 for row in changed}
+                transaction.on_commit(lambda: cache_token_versions(versions))
+
+    return {
+        "matched": len(rows),
+        "updated": len(changed),
+        "unchanged": len(rows) - len(changed),
+        "tokens_revoked": len(changed) if revoking else 0,
+    }
@@ -0,0 +1,125 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.base.renderers import FastJSONRenderer
+
+
+# Bump when the UserDetailSerializer output changes so stale payloads are never served.
+USER_DETAIL_CACHE_VERSION = 2
+USER_DETAIL_CACHE_KEY = "users:detail:v{version}:{user_id}"
+USER_LIST_GENERATION_KEY = "users:list:generation"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _record(counter: str, amount: int = 1):
+    with _stats_lock:
+        _stats[counter] += amount
+
+
+def cache_stats() -> dict:
+    """Snapshot of this process's user detail cache counters."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def user_detail_key(user_id) -> str:
+    return USER_DETAIL_CACHE_KEY.format(version=USER_DETAIL_CACHE_VERSION, user_id=user_id)
+
+
+def render_user_detail(user) -> tuple:
+    """
+    Serialize a user with UserDetailSerializer.
+
+    Returns:
+        tuple: ``(data, payload)`` where payload is the rendered JSON bytes.
+    """
+    from apps.users.serializers import UserDetailSerializer
+
+    data = UserDetailSerializer(user).data
+    return data, FastJSONRenderer().render(data)
+
+
+def cache_user_detail(user) -> dict:
+    """
+    Serialize ``user`` and store the rendered payload in the cache.
+
+    Returns:
+        dict: The serialized data, for callers that embed it in a larger response.
+    """
+    data, payload = render_user_detail(user)
+    cache.set(user_detail_key(user.pk), (payload, user.updated), settings.USER_DETAIL_CACHE_TIMEOUT)
+    return data
+
+
+def get_user_detail_payload(user_id, loader) -> tuple:
+    """
+    Rendered UserDetailSerializer JSON for a user, served from cache.
+
+    Args:
+        user_id: Primary key of the user.
+        loader (callable): Returns the User instance on a cache miss. Any
+            exception it raises (e.g. Http404) propagates unchanged.
+
+    Returns:
+        tuple: ``(payload, updated)``, the JSON bytes and the user's
+        ``updated`` timestamp they were rendered from (for conditional GET).
+    """
+    key = user_detail_key(user_id)
+    cached = cache.get(key)
+    if cached is not None:
+        _record("hits")
+        return cached
+
+    _record("misses")
+    user = loader()
+    _, payload = render_user_detail(user)
+    # A lagging replica could put back a row an invalidation just dropped;
+    # only rows read from the primary are cached.
+    if user._state.db == DEFAULT_DB_ALIAS:
+        cache.set(key, (payload, user.updated), settings.USER_DETAIL_CACHE_TIMEOUT)
+    return payload, user.updated
+
+
+def invalidate_user_detail(user_id):
+    if cache.delete(user_detail_key(user_id)):
+        _record("evictions")
+
+
+def invalidate_user_details(user_ids):
+    """Drop the cached payloads of many users in one cache round-trip."""
+    keys = [user_detail_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+        _record("evictions", len(keys))
+
+
+def user_list_generation() -> int:
+    """
+    Version of every user list, bumped by bump_user_list_generation().
+
+    A single cache read, whatever the size of the table. The key expires
+    after USER_LIST_GENERATION_TIMEOUT seconds, which bounds how long a
+    process that missed a bump (an unshared cache) serves an old version.
+    An expired or lost key starts again from the clock, above any value an
+    earlier ETag can carry.
+    """
+    generation = cache.get(USER_LIST_GENERATION_KEY)
+    if generation is None:
+        generation = time.time_ns()
+        if not cache.add(USER_LIST_GENERATION_KEY, generation, settings.USER_LIST_GENERATION_TIMEOUT):
+            generation = cache.get(USER_LIST_GENERATION_KEY, generation)
+    return generation
+
+
+def bump_user_list_generation():
+    """Invalidate every user list; call after any committed write that lists can show."""
+    try:
+        cache.incr(USER_LIST_GENERATION_KEY)
+    except ValueError:
+        cache.set(USER_LIST_GENERATION_KEY, time.time_ns(), settings.USER_LIST_GENERATION_TIMEOUT)
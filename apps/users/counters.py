@@ -0,0 +1,180 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.base.choices import StatusChoices, UserTypeChoices
+
+STATUS = "status"
+USER_TYPE = "user_type"
+VERIFIED = "verified"
+SIGNUPS = "signups"
+# Columns a counter bucket is derived from; created never changes after insert.
+COUNTED_FIELDS = ("status", "user_type", "otp_verified")
+
+
+def user_buckets(status, user_type, otp_verified) -> list:
+    """
+    Counter buckets a user with these values falls in.
+
+    Every user counts towards its status. Type and verification only
+    describe alive users, so deleted users drop out of those buckets.
+    Signups are counted separately (see signup_bucket).
+    """
+    buckets = [(STATUS, status)]
+    if status != StatusChoices.DELETED:
+        buckets += [(USER_TYPE, user_type), (VERIFIED, "verified" if otp_verified else "unverified")]
+    return buckets
+
+
+def signup_bucket(created) -> tuple:
+    return SIGNUPS, timezone.localdate(created).isoformat()
+
+
+def count_users(users, sign: int = 1) -> Counter:
+    """Deltas for adding (``sign=1``) or removing (``sign=-1``) saved users."""
+    deltas = Counter()
+    for user in users:
+        for bucket in user_buckets(user.status, user.user_type, user.otp_verified) + [signup_bucket(user.created)]:
+            deltas[bucket] += sign
+    return deltas
+
+
+def count_change(before: dict, after: dict) -> Counter:
+    """Deltas for a user whose COUNTED_FIELDS went from ``before`` to ``after``."""
+    deltas = Counter()
+    for bucket in user_buckets(**before):
+        deltas[bucket] -= 1
+    for bucket in user_buckets(**after):
+        deltas[bucket] += 1
+    return deltas
+
+
+def adjust_counters(deltas):
+    """
+    Apply counter deltas in the current transaction.
+
+    Existing buckets are incremented with a single UPDATE; missing ones
+    (e.g. the first signup of a day) are inserted. Call it in the same
+    transaction as the write being counted, so both commit or neither does.
+    """
+    from apps.users.models import UserCounter
+
+    deltas = {bucket: delta for bucket, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    matches = Q()
+    for dimension, bucket in deltas:
+        matches |= Q(dimension=dimension, bucket=bucket)
+    increment = Case(
+        *[When(dimension=dimension, bucket=bucket, then=Value(delta)) for (dimension, bucket), delta in deltas.items()],
+        output_field=BigIntegerField(),
+    )
+    updated = UserCounter.objects.filter(matches).update(value=F("value") + increment)
+    if updated == len(deltas):
+        return
+
+    existing = set(UserCounter.objects.filter(matches).values_list("dimension", "bucket"))
+    missing = {bucket: delta for bucket, delta in deltas.items() if bucket not in existing}
+    try:
+        with transaction.atomic():
+            UserCounter.objects.bulk_create(
+                [UserCounter(dimension=dimension, bucket=bucket, value=delta) for (dimension, bucket), delta in missing.items()]
+            )
+    except IntegrityError:
+        # Inserted by a concurrent transaction in the meantime; they exist now.
+        adjust_counters(missing)
+
+
+def fixed_buckets() -> list:
+    """Buckets that always exist (at zero if need be), so counting them is a plain UPDATE."""
+    return (
+        [(STATUS, choice) for choice in StatusChoices.values]
+        + [(USER_TYPE, choice) for choice in UserTypeChoices.values]
+        + [(VERIFIED, "verified"), (VERIFIED, "unverified")]
+    )
+
+
+def recount() -> Counter:
+    """Every counter computed from the user table, in four GROUP BY queries."""
+    User = get_user_model()
+    counts = Counter(dict.fromkeys(fixed_buckets(), 0))
+    for status, total in User.objects.order_by().values_list("status").annotate(total=Count("pk")):
+        counts[STATUS, status] = total
+    alive = User.objects.alive().order_by()
+    for user_type, total in alive.values_list("user_type").annotate(total=Count("pk")):
+        counts[USER_TYPE, user_type] = total
+    for otp_verified, total in alive.values_list("otp_verified").annotate(total=Count("pk")):
+        counts[VERIFIED, "verified" if otp_verified else "unverified"] = total
+    for day, total in User.objects.order_by().values_list(TruncDate("created")).annotate(total=Count("pk")):
+        counts[SIGNUPS, day.isoformat()] = total
+    return counts
+
+
+def reconcile_counters() -> dict:
+    """
+    Replace every counter with a fresh recount.
+
+    The existing counter rows are locked first, so writes counted
+    concurrently wait and are applied on top of the new values.
+
+    Returns:
+        dict: ``{(dimension, bucket): (old, new)}`` for every counter that
+        was off.
+    """
+    from apps.users.models import UserCounter
+
+    with transaction.atomic():
+        stored = {
+            (dimension, bucket): value
+            for dimension, bucket, value in UserCounter.objects.select_for_update().values_list("dimension", "bucket", "value")
+        }
+        counts = recount()
+        drift = {
+            bucket: (stored.get(bucket, 0), counts.get(bucket, 0))
+            for bucket in stored.keys() | counts.keys()
+            if stored.get(bucket, 0) != counts.get(bucket, 0)
+        }
+        if drift or stored.keys() != counts.keys():
+            UserCounter.objects.all().delete()
+            UserCounter.objects.bulk_create(
+                [UserCounter(dimension=dimension, bucket=bucket, value=value) for (dimension, bucket), value in counts.items()]
+            )
+    return drift
+
+
+def user_stats(days: int) -> dict:
+    """
+    Dashboard totals read from the counters, in one query.
+
+    Args:
+        days (int): Number of days of signups to return, today included.
+
+    Returns:
+        dict: Alive user total, totals per status, user type and
+        verification, and daily signups (oldest first, zero-filled).
+    """
+    from apps.users.models import UserCounter
+
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+    rows = UserCounter.objects.filter(
+        ~Q(dimension=SIGNUPS) | Q(dimension=SIGNUPS, bucket__gte=first_day.isoformat())
+    ).values_list("dimension", "bucket", "value")
+    counts = {(dimension, bucket): value for dimension, bucket, value in rows}
+
+    user_types = {choice: counts.get((USER_TYPE, choice), 0) for choice in UserTypeChoices.values}
+    return {
+        "total": sum(user_types.values()),
+        "status": {choice: counts.get((STATUS, choice), 0) for choice in StatusChoices.values},
+        "user_type": user_types,
+        "verified": {key: counts.get((VERIFIED, key), 0) for key in ("verified", "unverified")},
+        "signups": [
+            {"date": day.isoformat(), "count": counts.get((SIGNUPS, day.isoformat()), 0)}
+            for day in (first_day + timedelta(days=offset) for offset in range(days))
+        ],
+    }
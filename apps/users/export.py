@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from apps.base.renderers import orjson
+from apps.users.serializers import UserListValues
+
+User = get_user_model()
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+# Spreadsheet apps run cells starting with these as formulas.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def export_queryset(**filters):
+    """Users to export, oldest first; ``filters`` as for ``User.objects.matching()``."""
+    return User.objects.matching(**filters).order_by("created", "id")
+
+
+def iter_rows(queryset, chunk_size=None):
+    """
+    ``UserSerializer`` field values as lists, read through a server-side
+    cursor (on backends that have one) ``chunk_size`` rows at a time.
+    """
+    fields = UserListValues.fields
+    id_index = fields.index("id")
+    rows = UserListValues.annotate(queryset, fields).values_list(*fields)
+    for row in rows.iterator(chunk_size=chunk_size or settings.USER_EXPORT["CHUNK_SIZE"]):
+        row = list(row)
+        row[id_index] = str(row[id_index])
+        yield row
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows, batch_size: int = 500):
+    """CSV text with a header line, yielded in batches of ``batch_size`` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(UserListValues.fields)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _json_line(item) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(item)
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def iter_ndjson(rows, batch_size: int = 500):
+    """One JSON object per line, yielded in batches of ``batch_size`` rows."""
+    fields = UserListValues.fields
+    lines = []
+    for row in rows:
+        lines.append(_json_line(dict(zip(fields, row))))
+        if len(lines) == batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def export_users(file_format: str, queryset, chunk_size=None):
+    """
+    Stream ``queryset`` as CSV or NDJSON.
+
+    Memory stays flat at any table size: rows come off the cursor in
+    chunks and are written out in small batches.
+
+    Args:
+        file_format (str): ``"csv"`` or ``"ndjson"``.
+        queryset: Users to export, e.g. from export_queryset().
+        chunk_size (int, optional): Rows fetched per round-trip. Defaults to
+            USER_EXPORT["CHUNK_SIZE"].
+
+    Returns:
+        iterator: ``str`` chunks for CSV, ``bytes`` for NDJSON.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}. Choose from: {', '.join(EXPORT_FORMATS)}.")
+    rows = iter_rows(queryset, chunk_size)
+    return iter_csv(rows) if file_format == "csv" else iter_ndjson(rows)
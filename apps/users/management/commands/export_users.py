@@ -0,0 +1,49 @@
+import argparse
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.base.choices import StatusChoices, UserTypeChoices
+from apps.users.export import EXPORT_FORMATS, export_queryset, export_users
+
+
+def parse_datetime(value: str) -> datetime:
+    """ISO 8601 date or datetime; naive values are in the current time zone."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid ISO 8601 date: {value}")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class Command(BaseCommand):
+    help = "Stream users as CSV or NDJSON, to a file or stdout, in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv", help="Output format.")
+        parser.add_argument("--output", help="Write to this path instead of stdout.")
+        parser.add_argument("--status", choices=StatusChoices.values, help="Only users with this status (deleted included).")
+        parser.add_argument("--user-type", choices=UserTypeChoices.values, help="Only users of this type.")
+        parser.add_argument("--created-after", type=parse_datetime, help="Created at or after (ISO 8601).")
+        parser.add_argument("--created-before", type=parse_datetime, help="Created before (ISO 8601).")
+        parser.add_argument("--chunk-size", type=int, help="Rows fetched per round-trip.")
+
+    def handle(self, *args, **options):
+        queryset = export_queryset(
+            status=options["status"],
+            user_type=options["user_type"],
+            created_after=options["created_after"],
+            created_before=options["created_before"],
+        )
+        chunks = export_users(options["format"], queryset, chunk_size=options["chunk_size"])
+        binary = options["format"] == "ndjson"
+
+        if options["output"]:
+            with open(options["output"], "wb" if binary else "w", newline=None if binary else "") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Exported users to {options['output']}."))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode() if binary else chunk, ending="")
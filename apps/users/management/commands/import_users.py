@@ -0,0 +1,37 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.bulk_import import import_users, parse_import_file
+
+
+class Command(BaseCommand):
+    help = "Bulk import users from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV or JSON file.")
+        parser.add_argument("--format", choices=["csv", "json"], help="File format. Defaults to the file extension.")
+        parser.add_argument("--no-invites", action="store_true", help="Do not queue OTP emails.")
+        parser.add_argument("--report", help="Write the per-row JSON report to this path.")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        try:
+            with path.open("rb") as fileobj:
+                rows = parse_import_file(fileobj, file_format)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        result = import_users(rows, send_invites=not options["no_invites"])
+
+        if options["report"]:
+            Path(options["report"]).write_text(json.dumps(result["results"], indent=2))
+        for entry in result["results"]:
+            if entry["status"] == "error":
+                self.stderr.write(f"Row {entry['row']} ({entry['email']}): {' '.join(entry['errors'])}")
+        self.stdout.write(self.style.SUCCESS(f"Created {result['created']} user(s), {result['failed']} failed."))
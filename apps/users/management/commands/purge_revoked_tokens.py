@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.revocation import purge_expired_revocations
+
+
+class Command(BaseCommand):
+    help = "Delete revoked tokens that have expired anyway. Run periodically, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_revocations(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired token revocation(s)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the user statistics counters from the user table and fix any drift."
+
+    def handle(self, *args, **options):
+        drift = reconcile_counters()
+        for (dimension, bucket), (old, new) in sorted(drift.items()):
+            self.stdout.write(f"{dimension}:{bucket} {old} -> {new}")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled user counters, {len(drift)} corrected."))
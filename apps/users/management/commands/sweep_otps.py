@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.otp import sweep_expired_otps
+
+
+class Command(BaseCommand):
+    help = "Delete expired one-time passwords. Run periodically, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired_otps(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired OTP(s)."))
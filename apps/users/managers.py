@@ -1,7 +1,27 @@
 from django.contrib.auth.models import BaseUserManager
 
+from apps.base.managers import SoftDeleteQuerySet
 
-class UserManager(BaseUserManager):
+
+class UserQuerySet(SoftDeleteQuerySet):
+    def matching(self, status=None, user_type=None, created_after=None, created_before=None):
+        """
+        Users matching the admin filters (export, bulk status changes).
+
+        Deleted users are only included when asked for with ``status``.
+        ``created_after`` is inclusive, ``created_before`` exclusive.
+        """
+        queryset = self.filter(status=status) if status else self.alive()
+        if user_type:
+            queryset = queryset.filter(user_type=user_type)
+        if created_after:
+            queryset = queryset.filter(created__gte=created_after)
+        if created_before:
+            queryset = queryset.filter(created__lt=created_before)
+        return queryset
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     
     
     def create_user(self, email, password, **extra_fields):
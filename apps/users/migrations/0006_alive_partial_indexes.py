@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0005_revoked_token'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_created_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_staff_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_type_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('status', 'deleted'), _negated=True), fields=['created', 'id'], name='user_alive_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('status', 'deleted'), _negated=True), fields=['is_staff', 'created', 'id'], name='user_alive_staff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('status', 'deleted'), _negated=True), fields=['user_type', 'created', 'id'], name='user_alive_type_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Mirrors apps.users.search.
+SEARCH_TABLE = "users_user_search"
+POSTGRES_INDEX = "user_search_trgm_idx"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} ON users_user USING gin ("
+            "lower(email) gin_trgm_ops, lower(first_name) gin_trgm_ops, lower(last_name) gin_trgm_ops"
+            ") WHERE NOT (status = 'deleted')"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            "USING fts5(user_id UNINDEXED, email, first_name, last_name, tokenize='trigram')"
+        )
+        User = apps.get_model("users", "User")
+        alive = User.objects.using(schema_editor.connection.alias).exclude(status="deleted").order_by("pk").values_list("pk", "email", "first_name", "last_name")
+        rows = list(alive[:5000])
+        while rows:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {SEARCH_TABLE} (rowid, user_id, email, first_name, last_name) VALUES (%s, %s, %s, %s, %s)",
+                    [(pk.int >> 65, pk.hex, email, first, last) for pk, email, first, last in rows],
+                )
+            rows = list(alive.filter(pk__gt=rows[-1][0])[:5000])
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_alive_partial_indexes'),
+    ]
+
+    operations = [
+        # Backend specific: a pg_trgm GIN index on Postgres, an FTS5 shadow
+        # table (kept in sync by apps.users.signals) on SQLite.
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
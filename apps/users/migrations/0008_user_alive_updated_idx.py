@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0007_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('status', 'deleted'), _negated=True), fields=['updated'], name='user_alive_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:47
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from apps.base.choices import StatusChoices, UserTypeChoices
+
+
+def seed_counters(apps, schema_editor):
+    # Same buckets as apps.users.counters.recount().
+    User = apps.get_model("users", "User")
+    UserCounter = apps.get_model("users", "UserCounter")
+    db = schema_editor.connection.alias
+    users = User.objects.using(db).order_by()
+    alive = users.exclude(status="deleted")
+    # Fixed buckets exist from the start, at zero if need be.
+    counts = {
+        **{("status", choice): 0 for choice in StatusChoices.values},
+        **{("user_type", choice): 0 for choice in UserTypeChoices.values},
+        ("verified", "verified"): 0,
+        ("verified", "unverified"): 0,
+    }
+    for status, total in users.values_list("status").annotate(total=Count("pk")):
+        counts["status", status] = total
+    for user_type, total in alive.values_list("user_type").annotate(total=Count("pk")):
+        counts["user_type", user_type] = total
+    for otp_verified, total in alive.values_list("otp_verified").annotate(total=Count("pk")):
+        counts["verified", "verified" if otp_verified else "unverified"] = total
+    for day, total in users.values_list(TruncDate("created")).annotate(total=Count("pk")):
+        counts["signups", day.isoformat()] = total
+    UserCounter.objects.using(db).bulk_create(
+        [UserCounter(dimension=dimension, bucket=bucket, value=value) for (dimension, bucket), value in counts.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_user_alive_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounter',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('dimension', models.CharField(max_length=20)),
+                ('bucket', models.CharField(max_length=40)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'bucket'), name='user_counter_unique')],
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
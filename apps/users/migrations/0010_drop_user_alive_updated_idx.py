@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:32
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_user_counter'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_alive_updated_idx',
+        ),
+    ]
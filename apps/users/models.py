@@ -1,8 +1,15 @@
-from django.db import models
+from contextlib import nullcontext
+
+from django.db import models, transaction
+from django.db.models import F
 
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
-from apps.base.choices import UserTypeChoices
+from apps.base import hashing
+from apps.base.choices import OTPPurposeChoices, StatusChoices, UserTypeChoices
+from apps.base.constants import TOKEN_CLAIM_FIELDS, TOKEN_REVOKING_STATUSES
+from apps.base.managers import ALIVE
 from apps.base.models import BaseModel
+from apps.users.counters import COUNTED_FIELDS, adjust_counters, count_change, count_users
 
 from .managers import UserManager
 
@@ -11,24 +18,216 @@ class User(BaseModel, AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
-    otp = models.CharField(max_length=6, blank=True, null=True)
-    otp_created_at  = models.DateTimeField(blank=True, null=True)
     is_student = models.BooleanField(default=False)
     is_active = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
     otp_verified = models.BooleanField(default=False)
-    
+    # Bumped whenever outstanding tokens must stop working (see apps.users.tokens).
+    token_version = models.PositiveIntegerField(default=0)
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name",]
 
-    objects = UserManager() 
-    
+    objects = UserManager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination (see apps.base.pagination) and its common filters.
+            # Partial on ALIVE: the API never lists soft-deleted users.
+            models.Index(fields=["created", "id"], condition=ALIVE, name="user_alive_created_idx"),
+            models.Index(fields=["status", "created", "id"], name="user_status_created_idx"),
+            models.Index(fields=["is_staff", "created", "id"], condition=ALIVE, name="user_alive_staff_idx"),
+            models.Index(fields=["user_type", "created", "id"], condition=ALIVE, name="user_alive_type_idx"),
+        ]
+
     def __str__(self):
         return self.first_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._claims = {
+            field: instance.__dict__[field] for field in ("status", *TOKEN_CLAIM_FIELDS) if field in instance.__dict__
+        }
+        # Deferred fields are left out; _counted_change() fetches them if needed.
+        instance._counted = {field: instance.__dict__[field] for field in COUNTED_FIELDS if field in instance.__dict__}
+        return instance
+
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+        if not self._state.adding:
+            self._revoke_tokens = True
+
+    async def aset_password(self, raw_password):
+        """See set_password()."""
+        self.password = await hashing.amake_password(raw_password)
+        self._password = raw_password
+        if not self._state.adding:
+            self._revoke_tokens = True
+
+    def check_password(self, raw_password):
+        """
+        Verify a password in the hashing pool.
+
+        Hashes made with an outdated hasher profile are transparently
+        upgraded. This is not a password change, so tokens stay valid.
+        """
+        is_correct, must_update = hashing.verify_password(raw_password, self.password)
+        if is_correct and must_update:
+            self.password = hashing.make_password(raw_password)
+            self.save(update_fields=["password"])
+        return is_correct
+
+    async def acheck_password(self, raw_password):
+        """See check_password()."""
+        is_correct, must_update = await hashing.averify_password(raw_password, self.password)
+        if is_correct and must_update:
+            self.password = await hashing.amake_password(raw_password)
+            await self.asave(update_fields=["password"])
+        return is_correct
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        revoke = not self._state.adding and (getattr(self, "_revoke_tokens", False) or self._claims_changed(update_fields))
+        if revoke:
+            # Bumped in SQL so concurrent saves cannot lose a bump; read back below.
+            self.token_version = F("token_version") + 1
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "token_version"}
+            transaction.on_commit(self._publish_token_version)
+
+        adding = self._state.adding
+        counted = None if adding else self._counted_change(kwargs.get("update_fields"))
+        # Counters move in the same transaction as the row they count.
+        with transaction.atomic() if adding or counted or revoke else nullcontext():
+            super().save(*args, **kwargs)
+            if revoke:
+                self.refresh_from_db(fields=["token_version"])
+            if adding:
+                adjust_counters(count_users([self]))
+            elif counted:
+                adjust_counters(count_change(*counted))
+        self._revoke_tokens = False
+        self._claims = {field: getattr(self, field) for field in ("status", *TOKEN_CLAIM_FIELDS) if field in self.__dict__}
+        if adding:
+            self._counted = {field: getattr(self, field) for field in COUNTED_FIELDS}
+        elif counted:
+            self._counted = counted[1]
+
+    def _claims_changed(self, update_fields) -> bool:
+        """
+        Whether this save moves the user into a token revoking status or
+        changes one of TOKEN_CLAIM_FIELDS. Only fields the save writes and
+        that were loaded from the database are compared.
+        """
+        loaded = getattr(self, "_claims", {})
+        written = [
+            field for field in loaded
+            if update_fields is None or field in update_fields
+        ]
+        if "status" in written and self.status != loaded["status"] and self.status in TOKEN_REVOKING_STATUSES:
+            return True
+        return any(loaded[field] != getattr(self, field) for field in written if field != "status")
+
+    def _counted_change(self, update_fields):
+        """
+        ``(before, after)`` values of COUNTED_FIELDS if this save changes
+        any of them, else None. Only fields the save writes are compared.
+        """
+        before = dict(getattr(self, "_counted", {}))
+        saved = [
+            field for field in COUNTED_FIELDS
+            if (field in update_fields if update_fields is not None else field in self.__dict__)
+        ]
+        if not saved:
+            return None
+        after = {**before, **{field: getattr(self, field) for field in saved}}
+        missing = [field for field in COUNTED_FIELDS if field not in before]
+        if missing:
+            stored = type(self)._base_manager.filter(pk=self.pk).values(*missing).first() or {}
+            before.update(stored)
+            after = {**stored, **after}
+        if len(before) < len(COUNTED_FIELDS) or before == after:
+            return None
+        return before, after
+
+    def soft_delete(self):
+        """Also deactivate, so the user can no longer authenticate."""
+        self.is_active = False
+        self.status = StatusChoices.DELETED
+        self.save(update_fields=["status", "is_active", "updated"])
+
+    def _publish_token_version(self):
+        from apps.users.tokens import cache_token_version
+
+        cache_token_version(self.pk, self.token_version)
 
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
 
     def get_short_name(self):
-        return self.first_name    
+        return self.first_name
+
+
+class OneTimePassword(BaseModel):
+    """
+    Live OTP for a user and purpose.
+
+    Kept out of the users table so issuing and checking codes never
+    rewrites the hot user row. Only a keyed hash of the code is stored (see
+    apps.users.otp); expired rows are removed by ``manage.py sweep_otps``.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="otps")
+    purpose = models.CharField(max_length=30, choices=OTPPurposeChoices.choices)
+    code_hash = models.CharField(max_length=64)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "purpose"], name="otp_user_purpose_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.purpose} OTP for {self.user_id}"
+
+
+class UserCounter(models.Model):
+    """
+    Running user totals per ``(dimension, bucket)``, e.g. ``("status", "active")``
+    or ``("signups", "2026-10-17")``.
+
+    Kept in step by apps.users.counters in the same transaction as every
+    user insert, delete and change of a counted field, so the stats endpoint
+    reads a handful of rows instead of counting the user table.
+    ``manage.py reconcile_user_counters`` recomputes them from scratch.
+    """
+    id = models.BigAutoField(primary_key=True)
+    dimension = models.CharField(max_length=20)
+    bucket = models.CharField(max_length=40)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dimension", "bucket"], name="user_counter_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}:{self.bucket} = {self.value}"
+
+
+class RevokedToken(models.Model):
+    """
+    JWT revoked before its expiry (e.g. on logout), keyed by ``jti``.
+
+    Deliberately compact: rows only live until the token would have expired
+    anyway and are purged by ``manage.py purge_revoked_tokens``. Lookups go
+    through the in-process filter in apps.users.revocation first, so the
+    common not-revoked case never reaches this table.
+    """
+    id = models.BigAutoField(primary_key=True)
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,130 @@
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.base.choices import StatusChoices
+from apps.users.models import OneTimePassword
+
+OTP_UPDATE_FIELDS = ["code_hash", "expires_at", "updated"]
+
+
+def hash_otp(user_id, purpose: str, otp: str) -> str:
+    """
+    Keyed hash of an OTP.
+
+    Only the HMAC is stored, bound to the user and purpose, so a leaked row
+    cannot be replayed for another account or flow.
+    """
+    message = f"{user_id}:{purpose}:{otp}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def build_otp(user, purpose: str, otp: str) -> OneTimePassword:
+    return OneTimePassword(
+        user=user,
+        purpose=purpose,
+        code_hash=hash_otp(user.pk, purpose, otp),
+        expires_at=timezone.now() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES),
+    )
+
+
+def store_otps(rows: list):
+    """
+    Upsert OTP rows with a single INSERT ... ON CONFLICT.
+
+    A user has at most one live OTP per purpose; issuing a new one replaces
+    the old code and expiry without touching the users table.
+    """
+    OneTimePassword.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["user", "purpose"],
+        update_fields=OTP_UPDATE_FIELDS,
+    )
+
+
+async def astore_otps(rows: list):
+    """See store_otps()."""
+    await OneTimePassword.objects.abulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["user", "purpose"],
+        update_fields=OTP_UPDATE_FIELDS,
+    )
+
+
+def live_otp_queryset(email: str, purpose: str, active_only: bool = False):
+    # OTPs of soft-deleted users are never accepted.
+    queryset = OneTimePassword.objects.filter(
+        user__email=email, purpose=purpose, expires_at__gt=timezone.now()
+    ).exclude(user__status=StatusChoices.DELETED)
+    if active_only:
+        queryset = queryset.filter(user__is_active=True)
+    return queryset
+
+
+def otp_matches(row: OneTimePassword, otp: str) -> bool:
+    return hmac.compare_digest(row.code_hash, hash_otp(row.user_id, row.purpose, otp))
+
+
+def consume_otp(email: str, otp: str, purpose: str, active_only: bool = False, with_user: bool = False):
+    """
+    Verify and burn an OTP in one indexed lookup and one DELETE.
+
+    Args:
+        email (str): Email of the user the OTP was issued to.
+        otp (str): The code supplied by the user.
+        purpose (str): OTPPurposeChoices value.
+        active_only (bool, optional): Only accept OTPs of active users.
+        with_user (bool, optional): Load the user in the same query.
+
+    Returns:
+        OneTimePassword or None: The consumed row (with ``user`` loaded when
+        requested), or None if the code is wrong, expired or unknown.
+    """
+    queryset = live_otp_queryset(email, purpose, active_only)
+    if with_user:
+        queryset = queryset.select_related("user")
+    row = queryset.first()
+    if row is None or not otp_matches(row, otp):
+        return None
+    # Only the request whose DELETE removes the row gets it, so a code is
+    # accepted once even under concurrent verifications. Matching the hash
+    # too leaves a code reissued meanwhile alone.
+    if OneTimePassword.objects.filter(pk=row.pk, code_hash=row.code_hash).delete()[0] != 1:
+        return None
+    return row
+
+
+async def aconsume_otp(email: str, otp: str, purpose: str, active_only: bool = False, with_user: bool = False):
+    """See consume_otp()."""
+    queryset = live_otp_queryset(email, purpose, active_only)
+    if with_user:
+        queryset = queryset.select_related("user")
+    row = await queryset.afirst()
+    if row is None or not otp_matches(row, otp):
+        return None
+    if (await OneTimePassword.objects.filter(pk=row.pk, code_hash=row.code_hash).adelete())[0] != 1:
+        return None
+    return row
+
+
+def sweep_expired_otps(batch_size: int = 1000) -> int:
+    """
+    Delete expired OTPs in batches.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    deleted = 0
+    while True:
+        expired = list(
+            OneTimePassword.objects.filter(expires_at__lte=timezone.now())
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not expired:
+            return deleted
+        deleted += OneTimePassword.objects.filter(pk__in=expired).delete()[0]
@@ -0,0 +1,176 @@
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.base.bloom import BloomFilter
+from apps.users.models import RevokedToken
+
+REVOCATION_GENERATION_KEY = "users:revocation:generation"
+
+
+def revocation_setting(name: str):
+    return settings.TOKEN_REVOCATION[name]
+
+
+class RevocationIndex:
+    """
+    Per-process bloom filter over the jtis in RevokedToken.
+
+    A jti the filter has never seen is definitely not revoked, which answers
+    almost every check without touching the database. Only filter hits are
+    confirmed against the table.
+
+    Revocations bump a generation counter in the cache; a process that sees
+    a new generation loads the rows added since its last sync, plus the
+    last RELOAD_WINDOW ids before them: a transaction holding a lower id
+    can commit after one holding a higher id. The whole filter is also
+    rebuilt every RESYNC_INTERVAL seconds, which drops purged entries and
+    bounds staleness when the cache is not shared between processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._generation = None
+        self._built_at = 0.0
+
+    def _rebuild(self):
+        # Take the high-water mark first so rows inserted meanwhile are
+        # picked up by the next incremental load rather than skipped.
+        last_id = RevokedToken.objects.aggregate(last=Max("pk"))["last"] or 0
+        live = list(
+            RevokedToken.objects.filter(pk__lte=last_id, expires_at__gt=timezone.now()).values_list("jti", flat=True)
+        )
+        capacity = max(revocation_setting("BLOOM_CAPACITY"), len(live) * 2)
+        bloom = BloomFilter(capacity, revocation_setting("BLOOM_ERROR_RATE"))
+        for jti in live:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._last_id = last_id
+        self._built_at = time.monotonic()
+
+    def _load_new(self):
+        since = max(0, self._last_id - revocation_setting("RELOAD_WINDOW"))
+        rows = RevokedToken.objects.filter(pk__gt=since).order_by("pk").values_list("pk", "jti")
+        for pk, jti in rows:
+            self._bloom.add(jti)
+            self._last_id = max(self._last_id, pk)
+        if self._bloom.is_full:
+            self._rebuild()
+
+    def sync(self):
+        generation = cache.get(REVOCATION_GENERATION_KEY, 0)
+        stale = time.monotonic() - self._built_at > revocation_setting("RESYNC_INTERVAL")
+        if self._bloom is not None and not stale and generation == self._generation:
+            return
+        with self._lock:
+            if self._bloom is None or stale:
+                self._rebuild()
+            elif generation != self._generation:
+                self._load_new()
+            self._generation = generation
+
+    def might_contain(self, jti: str) -> bool:
+        self.sync()
+        return jti in self._bloom
+
+    def add(self, jti: str):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+
+_index = RevocationIndex()
+
+
+def token_expiry(token) -> datetime:
+    return datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+
+
+def revoke_tokens(*tokens):
+    """
+    Revoke validated simplejwt tokens until they expire, with one INSERT.
+
+    The jtis are added to this process's filter immediately; other
+    processes pick them up through the generation counter once the
+    transaction commits.
+
+    Raises:
+        InvalidToken: If one of the tokens was already revoked, e.g. by a
+            concurrent refresh with the same token. Nothing is revoked then.
+    """
+    rows = [RevokedToken(jti=token[api_settings.JTI_CLAIM], expires_at=token_expiry(token)) for token in tokens]
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.bulk_create(rows)
+    except IntegrityError:
+        raise InvalidToken(_("Token is blacklisted"))
+    for row in rows:
+        _index.add(row.jti)
+    transaction.on_commit(bump_generation)
+
+
+def bump_generation():
+    try:
+        cache.incr(REVOCATION_GENERATION_KEY)
+    except ValueError:
+        cache.set(REVOCATION_GENERATION_KEY, 1, None)
+
+
+def is_revoked(jti: str) -> bool:
+    """
+    Whether a token id has been revoked.
+
+    Costs a cache read and a bloom filter probe; the database is only asked
+    to confirm the rare filter hit.
+    """
+    if not jti or not _index.might_contain(jti):
+        return False
+    return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+
+
+def purge_expired_revocations(batch_size: int = 1000) -> int:
+    """
+    Delete revocations whose tokens have expired anyway.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    deleted = 0
+    while True:
+        expired = list(
+            RevokedToken.objects.filter(expires_at__lte=timezone.now()).values_list("pk", flat=True)[:batch_size]
+        )
+        if not expired:
+            break
+        deleted += RevokedToken.objects.filter(pk__in=expired).delete()[0]
+    if deleted:
+        _index.reset()
+    return deleted
+
+
+class RevocableRefreshToken(RefreshToken):
+    """Refresh token checked against, and revoked through, the revocation store."""
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if is_revoked(self.get(api_settings.JTI_CLAIM)):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        revoke_tokens(self)
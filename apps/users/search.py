@@ -0,0 +1,129 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest, Lower
+from django.db.models.lookups import StartsWith
+
+from apps.base.choices import StatusChoices
+
+# SQLite FTS5 shadow table of alive users (created by migration 0007).
+SEARCH_TABLE = "users_user_search"
+SEARCH_FIELDS = ("email", "first_name", "last_name")
+MIN_TERM_LENGTH = 3
+# Only this many matches are ranked, so a very common term costs no more
+# than a specific one; narrow the term to see past them.
+MAX_CANDIDATES = 1000
+
+
+def uses_shadow_table() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def _rowid(user_id: uuid.UUID) -> int:
+    # A positive 63-bit key derived from the UUID, so rows are replaced and
+    # deleted through the rowid index; user_id itself is not indexed.
+    return user_id.int >> 65
+
+
+def index_users(users):
+    """Add or refresh users in the SQLite search table; deleted users are dropped from it."""
+    if not uses_shadow_table():
+        return
+    alive, deleted = [], []
+    for user in users:
+        (deleted if user.status == StatusChoices.DELETED else alive).append(user)
+    if alive:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, user_id, email, first_name, last_name) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [(_rowid(user.pk), user.pk.hex, user.email, user.first_name, user.last_name) for user in alive],
+            )
+    if deleted:
+        unindex_users(user.pk for user in deleted)
+
+
+def unindex_users(user_ids):
+    if not uses_shadow_table():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(_rowid(user_id),) for user_id in user_ids])
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _search_shadow_table(term: str, offset: int, limit: int) -> list:
+    # The trigram tokenizer matches the term anywhere in a column. Prefix
+    # matches rank first, then shorter (closer) values. bm25() is left out:
+    # it reads corpus-wide statistics and costs hundreds of ms on common terms.
+    prefix = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    is_prefix = " OR ".join(f"{field} LIKE %s ESCAPE '\\'" for field in SEARCH_FIELDS)
+    shortest = "min(" + ", ".join(f"length({field})" for field in SEARCH_FIELDS) + ")"
+    candidates = (
+        f"SELECT rowid, user_id, {', '.join(SEARCH_FIELDS)} FROM {SEARCH_TABLE} "
+        f"WHERE {SEARCH_TABLE} MATCH %s LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT user_id FROM ({candidates}) "
+            f"ORDER BY ({is_prefix}) DESC, {shortest}, rowid LIMIT %s OFFSET %s",
+            [_fts_phrase(term), MAX_CANDIDATES, *[prefix] * len(SEARCH_FIELDS), limit, offset],
+        )
+        return [uuid.UUID(row[0]) for row in cursor.fetchall()]
+
+
+def _trigram_queryset(queryset, term: str):
+    # Postgres only; served by the pg_trgm GIN index from migration 0007.
+    from django.contrib.postgres.lookups import TrigramSimilar
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    columns = [Lower(field) for field in SEARCH_FIELDS]
+    is_prefix = Q()
+    is_similar = Q()
+    for column in columns:
+        is_prefix |= Q(StartsWith(column, term))
+        is_similar |= Q(TrigramSimilar(column, term))
+    candidates = queryset.filter(is_prefix | is_similar).values("pk")[:MAX_CANDIDATES]
+    return (
+        queryset.filter(pk__in=candidates)
+        .annotate(
+            search_prefix=Case(When(is_prefix, then=Value(1)), default=Value(0), output_field=IntegerField()),
+            search_rank=Greatest(*[TrigramSimilarity(column, term) for column in columns]),
+        )
+        .order_by("-search_prefix", "-search_rank", "pk")
+    )
+
+
+def _contains_queryset(queryset, term: str):
+    matches = Q()
+    for field in SEARCH_FIELDS:
+        matches |= Q(**{f"{field}__icontains": term})
+    return queryset.filter(matches).order_by("email", "pk")
+
+
+class UserSearch:
+    """
+    Ranked user search results, sliced lazily by the paginator.
+
+    Postgres matches prefixes and trigram similarity on email, first and
+    last name through a GIN index; SQLite uses the FTS5 shadow table, which
+    matches substrings. Other backends fall back to ``icontains``.
+    """
+
+    def __init__(self, term: str, queryset=None):
+        self.term = term.strip().lower()
+        self.queryset = get_user_model().objects.alive() if queryset is None else queryset
+
+    def __getitem__(self, item: slice) -> list:
+        offset, stop = item.start or 0, item.stop
+        if uses_shadow_table():
+            ids = _search_shadow_table(self.term, offset, stop - offset)
+            users = self.queryset.in_bulk(ids)
+            return [users[user_id] for user_id in ids if user_id in users]
+        if connection.vendor == "postgresql":
+            return list(_trigram_queryset(self.queryset, self.term)[offset:stop])
+        return list(_contains_queryset(self.queryset, self.term)[offset:stop])
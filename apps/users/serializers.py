@@ -1,15 +1,26 @@
+import uuid
+
 from rest_framework import serializers
 
+from django.conf import settings
 from django.contrib.auth import get_user_model, authenticate
+from django.db.models import CharField, Value
+from django.db.models.functions import Concat
 
-from apps.base.choices import StatusChoices, UserTypeChoices
-from apps.base.account_utils import complete_password_reset, email_validator, get_tokens_for_user, initiate_password_reset, send_otp_email, set_user_otp
+from apps.base.choices import OTPPurposeChoices, StatusChoices, UserTypeChoices
+from apps.base.metrics import timed
+from apps.base.serializers import SparseFieldsetMixin, TimedSerializerMixin
+from apps.base.account_utils import complete_password_reset, email_validator, get_tokens_for_user, initiate_password_reset, refresh_tokens, send_otp_email, set_user_otp
+from apps.users.bulk_import import import_users, parse_import_file
+from apps.users.bulk_status import TooManyUsers, change_status
+from apps.users.otp import consume_otp
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.CharField(source="get_full_name", read_only=True)
+    field_columns = {"full_name": ("first_name", "last_name")}
     
     class Meta:
         model = User
@@ -18,12 +29,52 @@ class UserSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("id", "is_active", "status", "user_type")
         
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserListValues:
+    """
+    Read-only fast path producing ``UserSerializer(many=True).data``.
+
+    Selects only the serializer's columns (or the requested ``fieldset``)
+    with ``values()``, computes ``full_name`` in SQL and builds plain dicts
+    in the serializer's field order, skipping model instances and
+    per-field serializer dispatch. Keep it in step with UserSerializer; the
+    tests compare both.
+    """
+    fields = UserSerializer.Meta.fields
+
+    @classmethod
+    def annotate(cls, queryset, fields):
+        """Compute ``full_name`` in SQL when ``fields`` includes it."""
+        if "full_name" in fields:
+            full_name = Concat("first_name", Value(" "), "last_name", output_field=CharField())
+            queryset = queryset.annotate(full_name=full_name)
+        return queryset
+
+    @classmethod
+    def queryset(cls, queryset, fieldset=None, extra=()):
+        """``queryset`` as values() rows; ``extra`` columns are selected too (e.g. for pagination)."""
+        fields = cls.fields if fieldset is None else fieldset
+        return cls.annotate(queryset, fields).values(*fields, *extra)
+
+    @classmethod
+    def to_representation(cls, rows, fieldset=None) -> list:
+        fields = cls.fields if fieldset is None else fieldset
+        with_id = "id" in fields
+        data = []
+        with timed("serialize"):
+            for row in rows:
+                item = {field: row[field] for field in fields}
+                if with_id:
+                    item["id"] = str(item["id"])
+                data.append(item)
+        return data
+
+
+class UserDetailSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.CharField(source="get_full_name", read_only=True)
-    meta = serializers.JSONField(read_only=True)  # If meta is a JSONField on User model
+    field_columns = UserSerializer.field_columns
 
     class Meta(UserSerializer.Meta):
-        fields = UserSerializer.Meta.fields + ("meta",)
+        pass
         
         
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -63,9 +114,35 @@ class UserCreateSerializer(serializers.ModelSerializer):
             **validated_data
         )
         otp = set_user_otp(user)
-        send_otp_email(user.id, otp, "email verification")
+        send_otp_email(user, otp, "email verification")
         return user
     
+class UserBulkImportSerializer(serializers.Serializer):
+    file = serializers.FileField(required=False, help_text="CSV or JSON file of users.")
+    users = serializers.ListField(child=serializers.DictField(), required=False)
+    send_invites = serializers.BooleanField(default=True)
+
+    def validate(self, data):
+        upload = data.pop("file", None)
+        if upload is not None:
+            file_format = upload.name.rsplit(".", 1)[-1].lower()
+            try:
+                data["users"] = parse_import_file(upload, file_format)
+            except ValueError as e:
+                raise serializers.ValidationError({"file": str(e)})
+
+        if not data.get("users"):
+            raise serializers.ValidationError({"detail": "Provide a CSV/JSON file or a list of users."})
+        if len(data["users"]) > settings.BULK_IMPORT["MAX_ROWS"]:
+            raise serializers.ValidationError(
+                {"detail": f"Imports are limited to {settings.BULK_IMPORT['MAX_ROWS']} users per request."}
+            )
+        return data
+
+    def save(self):
+        return import_users(self.validated_data["users"], send_invites=self.validated_data["send_invites"])
+
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -151,6 +228,68 @@ class LoginSerializer(serializers.Serializer):
             raise serializers.ValidationError({"detail": "User account is blocked or suspended."})
 
 
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate(self, data):
+        return refresh_tokens(data["refresh"])
+
+
+class UserStatsQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=1, max_value=365, default=30)
+
+
+class UserFilterSerializer(serializers.Serializer):
+    """Filters accepted by ``User.objects.matching()``."""
+    status = serializers.ChoiceField(choices=StatusChoices.choices, required=False)
+    user_type = serializers.ChoiceField(choices=UserTypeChoices.choices, required=False)
+    created_after = serializers.DateTimeField(required=False, help_text="Inclusive, ISO 8601.")
+    created_before = serializers.DateTimeField(required=False, help_text="Exclusive, ISO 8601.")
+
+    def validate(self, data):
+        if data.get("created_after") and data.get("created_before") and data["created_after"] >= data["created_before"]:
+            raise serializers.ValidationError({"created_before": "Must be later than created_after."})
+        return data
+
+
+class UserExportQuerySerializer(UserFilterSerializer):
+    file_format = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+
+
+class UserBulkStatusSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=StatusChoices.choices)
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    filter = UserFilterSerializer(required=False, help_text="Select users by filter instead of ids.")
+
+    def validate(self, data):
+        if ("ids" in data) == ("filter" in data):
+            raise serializers.ValidationError({"detail": "Provide either ids or filter."})
+        if "filter" in data and not data["filter"]:
+            raise serializers.ValidationError({"filter": "Give at least one criterion; an empty filter matches every user."})
+        if len(data.get("ids", ())) > settings.BULK_STATUS["MAX_USERS"]:
+            raise serializers.ValidationError(
+                {"ids": f"At most {settings.BULK_STATUS['MAX_USERS']} users can be changed per request."}
+            )
+        return data
+
+    def save(self):
+        """Apply the change; the requesting admin's own account is never touched."""
+        # Stateless authentication gives the id as the token's string claim.
+        own_pk = uuid.UUID(str(self.context["request"].user.pk))
+        ids = set(self.validated_data.get("ids", ())) - {own_pk}
+        if "ids" in self.validated_data:
+            queryset = User.objects.filter(pk__in=ids)
+        else:
+            queryset = User.objects.matching(**self.validated_data["filter"]).exclude(pk=own_pk)
+        try:
+            summary = change_status(queryset, self.validated_data["status"])
+        except TooManyUsers as e:
+            raise serializers.ValidationError({"detail": str(e)})
+        if "ids" in self.validated_data:
+            summary["not_found"] = len(ids) - summary["matched"]
+        return {"status": self.validated_data["status"], **summary}
+
+
 class OTPVerificationSerializer(serializers.Serializer):
     email = serializers.EmailField(write_only=True)  # Added email field
     otp = serializers.CharField(write_only=True, max_length=6)
@@ -164,19 +303,14 @@ class OTPVerificationSerializer(serializers.Serializer):
         otp = data.get('otp')
         email = data.get('email')
         
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError({"detail": "User not found."})
-        
-        if not user.otp or user.otp != otp:
+        # One indexed lookup on the OTP store; a matching code is consumed,
+        # so a second verification with the same code is rejected.
+        row = consume_otp(email, otp, OTPPurposeChoices.EMAIL_VERIFICATION)
+        if row is None:
             raise serializers.ValidationError({"detail": "Invalid or expired OTP."})
         
-        if user.otp_verified:
-            raise serializers.ValidationError({"detail": "OTP already verified."})
-        
-        # Add user to validated data so it can be accessed in the view
-        data['user'] = user
+        # Add user id to validated data so it can be accessed in the view
+        data['user_id'] = row.user_id
         return data
     
 
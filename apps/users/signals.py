@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.cache import bump_user_list_generation, invalidate_user_detail
+from apps.users.counters import adjust_counters, count_users
+from apps.users.search import SEARCH_FIELDS, index_users, unindex_users
+
+User = get_user_model()
+
+SEARCH_INDEXED_FIELDS = {*SEARCH_FIELDS, "status"}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user_detail(instance.pk)
+    transaction.on_commit(bump_user_list_generation)
+
+
+@receiver(post_save, sender=User)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or SEARCH_INDEXED_FIELDS.intersection(update_fields):
+        index_users([instance])
+
+
+@receiver(post_delete, sender=User)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_users([instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def uncount_deleted_user(sender, instance, **kwargs):
+    # Runs inside the delete's transaction. Soft deletes are saves and are
+    # counted by User.save().
+    adjust_counters(count_users([instance], sign=-1))
@@ -1,3 +1,805 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.base.account_utils import activate_verified_user, get_tokens_for_user, refresh_tokens, set_user_otp
+from apps.base.choices import OTPPurposeChoices, StatusChoices
+from apps.base.db_routing import PRIMARY_PIN_COOKIE, replica_health
+from apps.base.metrics import end_profile, start_profile
+from apps.base.models import EmailOutbox
+from apps.base.renderers import FastJSONRenderer
+from apps.users import urls as users_urls
+from apps.users.activity import activity_buffer
+from apps.users.authentication import JWTAuthentication, StatelessJWTAuthentication
+from apps.users.bulk_import import import_users, parse_import_file
+from apps.users.bulk_status import change_status
+from apps.users.counters import reconcile_counters
+from apps.users.export import export_queryset, export_users
+from apps.users.models import RevokedToken
+from apps.users.otp import aconsume_otp, consume_otp
+from apps.users.revocation import RevocableRefreshToken, _index, bump_generation, is_revoked, revoke_tokens
+from apps.users.search import UserSearch
+from apps.users.serializers import UserListValues, UserSerializer
+from apps.users.views import UserViewSet
+
+User = get_user_model()
+
+QUERY_BUDGETS_FILE = Path(__file__).with_name("query_budgets.json")
+PASSWORD = "Budget-Passw0rd"
+NEW_PASSWORD = "BudgetPassw0rd2"
+HTTP_METHODS = ("get", "post", "put", "patch", "delete")
+
+
+def iter_patterns(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern
+
+
+def registered_endpoints() -> set:
+    """``"METHOD url-name"`` for every route in apps/users/urls.py, router included."""
+    endpoints = set()
+    for pattern in iter_patterns(users_urls.urlpatterns):
+        callback = pattern.callback
+        actions = getattr(callback, "actions", None)
+        if actions:
+            methods = [method for method in actions if method in HTTP_METHODS]
+        else:
+            view_class = callback.view_class
+            methods = [method for method in HTTP_METHODS if hasattr(view_class, method)]
+        endpoints.update(f"{method.upper()} {pattern.name}" for method in methods)
+    return endpoints
+
+
+def is_savepoint(sql: str) -> bool:
+    # TestCase wraps every test in a transaction, turning the views' own
+    # atomic blocks into savepoints that don't happen in production.
+    return "SAVEPOINT" in sql
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every endpoint in apps/users/urls.py stays within the query budget in
+    query_budgets.json and never runs the same SQL twice in one request.
+
+    Raising a budget is a reviewed change to that file; new routes fail
+    ``test_every_endpoint_has_a_budget`` until they get one.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.budgets = json.loads(QUERY_BUDGETS_FILE.read_text())
+        cls.admin = User.objects.create_user(
+            email="admin@budget.local", password=PASSWORD, first_name="Budget", last_name="Admin",
+            is_staff=True, is_superuser=True,
+        )
+        cls.user = User.objects.create_user(
+            email="user@budget.local", password=PASSWORD, first_name="Budget", last_name="User",
+        )
+        # Accounts that get modified (updated, deleted, password changed).
+        cls.target = User.objects.create_user(
+            email="target@budget.local", password=PASSWORD, first_name="Budget", last_name="Target",
+        )
+        cls.other = User.objects.create_user(
+            email="other@budget.local", password=PASSWORD, first_name="Budget", last_name="Other",
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Build the revocation filter up front; a process does that once per
+        # RESYNC_INTERVAL, not per request.
+        is_revoked("warm-up")
+
+    def tearDown(self):
+        # Write buffered last_login updates inside the test's transaction,
+        # not from a timer thread or at exit after the database is gone.
+        activity_buffer.flush()
+
+    def auth(self, user) -> dict:
+        return {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(user)['access']}"}
+
+    def endpoint_requests(self) -> dict:
+        """
+        ``"METHOD url-name"`` -> callable preparing one successful request.
+
+        Preparation (issuing OTPs, tokens) happens when the callable is
+        invoked; it returns a zero-argument function that makes the request,
+        and only that is measured.
+        """
+        client = self.client
+        user = self.user
+        detail = reverse("user-detail", args=[self.target.pk])
+
+        def get(name, data=None, auth=None):
+            headers = self.auth(auth) if auth else {}
+            return lambda: client.get(reverse(name), data, **headers)
+
+        def post(name, data, auth=None):
+            headers = self.auth(auth) if auth else {}
+            return lambda: client.post(reverse(name), data, content_type="application/json", **headers)
+
+        def stream(name, data=None, auth=None):
+            request = get(name, data, auth)
+
+            def send():
+                # Queries of a streamed response run while it is consumed.
+                response = request()
+                b"".join(response.streaming_content)
+                return response
+            return send
+
+        def verify(name):
+            return post(name, {"email": user.email, "otp": set_user_otp(user)})
+
+        def reset(name):
+            otp = set_user_otp(user, purpose=OTPPurposeChoices.PASSWORD_RESET)
+            return post(name, {"email": user.email, "otp": otp, "new_password": PASSWORD, "confirm_password": PASSWORD})
+
+        def on_detail(method, data=None):
+            headers = self.auth(self.admin)
+            send = getattr(client, method)
+            if data is None:
+                return lambda: send(detail, **headers)
+            return lambda: send(detail, data, content_type="application/json", **headers)
+
+        return {
+            "GET api-root": lambda: get("api-root", auth=self.admin),
+            "GET user-list": lambda: get("user-list", auth=self.admin),
+            "POST user-list": lambda: post("user-list", {
+                "email": "signup@budget.local", "first_name": "Sign", "last_name": "Up",
+                "password": PASSWORD, "confirm_password": PASSWORD,
+            }),
+            "GET user-detail": lambda: on_detail("get"),
+            "PUT user-detail": lambda: on_detail("put", {
+                "email": self.target.email, "first_name": "Put", "last_name": "User",
+            }),
+            "PATCH user-detail": lambda: on_detail("patch", {"first_name": "Patch"}),
+            "DELETE user-detail": lambda: on_detail("delete"),
+            "GET user-admin-users": lambda: get("user-admin-users", auth=self.admin),
+            "GET user-cache-stats": lambda: get("user-cache-stats", auth=self.admin),
+            "GET user-stats": lambda: get("user-stats", {"days": 365}, auth=self.admin),
+            "GET user-export": lambda: stream("user-export", {"file_format": "ndjson"}, auth=self.admin),
+            "GET user-search": lambda: get("user-search", {"q": "budget"}, auth=self.admin),
+            "POST user-bulk-import": lambda: post("user-bulk-import", {"users": [
+                {"email": f"bulk{i}@budget.local", "first_name": "Bulk", "last_name": str(i)} for i in range(3)
+            ]}, auth=self.admin),
+            "POST user-bulk-status": lambda: post("user-bulk-status", {
+                "status": "suspended", "ids": [str(self.target.pk)],
+            }, auth=self.admin),
+            "POST login": lambda: post("login", {"email": user.email, "password": PASSWORD}),
+            "POST token_refresh": lambda: post("token_refresh", {"refresh": get_tokens_for_user(user)["refresh"]}),
+            "POST logout": lambda: post("logout", {"refresh": get_tokens_for_user(user)["refresh"]}, auth=user),
+            "POST change_password": lambda: post("change_password", {
+                "old_password": PASSWORD, "new_password": NEW_PASSWORD, "confirm_password": NEW_PASSWORD,
+            }, auth=self.other),
+            "GET email_verification": lambda: get("email_verification", {"email": user.email}),
+            "POST email_verification": lambda: verify("email_verification"),
+            "POST password_reset_request": lambda: post("password_reset_request", {"email": user.email}),
+            "POST password_reset_confirm": lambda: reset("password_reset_confirm"),
+            "POST async_login": lambda: post("async_login", {"email": user.email, "password": PASSWORD}),
+            "GET async_email_verification": lambda: get("async_email_verification", {"email": user.email}),
+            "POST async_email_verification": lambda: verify("async_email_verification"),
+            "POST async_password_reset_request": lambda: post("async_password_reset_request", {"email": user.email}),
+            "POST async_password_reset_confirm": lambda: reset("async_password_reset_confirm"),
+        }
+
+    def measure(self, make_request):
+        token = start_profile()
+        try:
+            response = make_request()
+        finally:
+            profile = end_profile(token)
+        queries = {sql: count for sql, count in profile.queries.items() if not is_savepoint(sql)}
+        return response, queries
+
+    def test_every_endpoint_has_a_budget(self):
+        registered = registered_endpoints()
+        self.assertEqual(set(), registered - set(self.budgets), "Endpoints without a query budget")
+        self.assertEqual(set(), set(self.budgets) - registered, "Budgets for endpoints that no longer exist")
+        self.assertEqual(registered, set(self.endpoint_requests()), "Endpoints the harness does not exercise")
+
+    def test_endpoints_stay_within_query_budget(self):
+        for endpoint, prepare in self.endpoint_requests().items():
+            with self.subTest(endpoint=endpoint):
+                response, queries = self.measure(prepare())
+                self.assertLess(response.status_code, 400, f"{endpoint}: {response.getvalue()[:300]!r}")
+
+                total = sum(queries.values())
+                budget = self.budgets[endpoint]
+                self.assertLessEqual(
+                    total, budget,
+                    f"{endpoint} ran {total} queries, budget is {budget}:\n" + "\n".join(queries),
+                )
+                duplicates = [sql for sql, count in queries.items() if count > 1]
+                self.assertEqual([], duplicates, f"{endpoint} repeated queries")
+
+
+class UserDetailCacheTests(TestCase):
+    """Cached detail payloads are keyed by the user, not by how the URL spells the id."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email="admin@detail.local", password=PASSWORD, first_name="Old", is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(self.admin)['access']}"}
+
+    def test_any_spelling_is_invalidated(self):
+        url = reverse("user-detail", args=[str(self.admin.pk).upper()])
+        self.assertEqual(self.client.get(url, **self.headers).json()["first_name"], "Old")
+        self.admin.first_name = "New"
+        self.admin.save()
+        self.assertEqual(self.client.get(url, **self.headers).json()["first_name"], "New")
+
+    def test_malformed_id(self):
+        self.assertEqual(self.client.get(reverse("user-detail", args=["not-a-uuid"]), **self.headers).status_code, 404)
+
+
+class ConsumeOTPTests(TestCase):
+    """An OTP is accepted once, by whichever verification deletes it first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="otp@consume.local", password=PASSWORD)
+
+    def test_single_use(self):
+        purpose = OTPPurposeChoices.EMAIL_VERIFICATION
+        for consume in (consume_otp, async_to_sync(aconsume_otp)):
+            with self.subTest(consume=consume):
+                otp = set_user_otp(self.user)
+                self.assertIsNone(consume(self.user.email, "000000" if otp != "000000" else "111111", purpose))
+                self.assertEqual(consume(self.user.email, otp, purpose).user_id, self.user.pk)
+                self.assertIsNone(consume(self.user.email, otp, purpose))
+
+
+class RevocationTests(TestCase):
+    """Revoked jtis stay revoked across resyncs; filter hits are confirmed in the table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="revoke@tokens.local", password=PASSWORD)
+
+    def setUp(self):
+        # The filter outlives test transactions, whose row ids get reused.
+        _index.reset()
+
+    def test_revoked_across_resync(self):
+        token = RevocableRefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            revoke_tokens(token)
+        self.assertTrue(is_revoked(token["jti"]))
+        _index.reset()  # a full rebuild, as every RESYNC_INTERVAL
+        self.assertTrue(is_revoked(token["jti"]))
+
+    def test_revoked_by_another_process(self):
+        is_revoked("warm-up")
+        RevokedToken.objects.create(jti="elsewhere", expires_at=timezone.now() + timedelta(hours=1))
+        self.assertFalse(is_revoked("elsewhere"))  # not announced yet
+        bump_generation()
+        self.assertTrue(is_revoked("elsewhere"))
+
+    def test_committed_out_of_id_order(self):
+        is_revoked("warm-up")
+        expires_at = timezone.now() + timedelta(hours=1)
+        first = RevokedToken.objects.create(jti="first", expires_at=expires_at)
+        # Another transaction took the next id but commits after a later one.
+        RevokedToken.objects.create(pk=first.pk + 2, jti="later", expires_at=expires_at)
+        bump_generation()
+        self.assertTrue(is_revoked("later"))
+        RevokedToken.objects.create(pk=first.pk + 1, jti="late", expires_at=expires_at)
+        bump_generation()
+        self.assertTrue(is_revoked("late"))
+
+    def test_false_positive_is_confirmed(self):
+        is_revoked("warm-up")
+        _index.add("never-revoked")
+        self.assertTrue(_index.might_contain("never-revoked"))
+        with self.assertNumQueries(1):
+            self.assertFalse(is_revoked("never-revoked"))
+
+    def test_purge_expired(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti="expired", expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti="live", expires_at=now + timedelta(hours=1))
+        self.assertFalse(is_revoked("expired"))
+
+        out = io.StringIO()
+        call_command("purge_revoked_tokens", "--batch-size", "1", stdout=out)
+        self.assertIn("Deleted 1 expired token revocation(s).", out.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list("jti", flat=True)), ["live"])
+        self.assertTrue(is_revoked("live"))
+
+
+class BulkImportTests(TestCase):
+    """Imports parse CSV/JSON and report every row: created, duplicate, existing or invalid."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email="admin@import.local", password=PASSWORD, is_staff=True)
+        cls.existing = User.objects.create_user(email="Taken@Import.local", password=PASSWORD)
+
+    def test_parse_csv_and_json(self):
+        csv_file = io.BytesIO("\ufeffemail,first_name,last_name\nada@import.local,Ada,Lovelace\n".encode())
+        self.assertEqual(
+            parse_import_file(csv_file, "csv"), [{"email": "ada@import.local", "first_name": "Ada", "last_name": "Lovelace"}]
+        )
+        rows = [{"email": "ada@import.local"}]
+        self.assertEqual(parse_import_file(io.StringIO(json.dumps(rows)), "json"), rows)
+        self.assertEqual(parse_import_file(io.StringIO(json.dumps({"users": rows})), "json"), rows)
+        for content, file_format in (("[{", "json"), ('{"users": 1}', "json"), ("", "xlsx")):
+            with self.subTest(content=content, file_format=file_format), self.assertRaises(ValueError):
+                parse_import_file(io.StringIO(content), file_format)
+
+    def test_report_per_row(self):
+        result = import_users([
+            {"email": "Grace@Import.LOCAL", "first_name": "Grace", "last_name": "Hopper", "user_type": "Student"},
+            {"email": "grace@import.local", "first_name": "Grace", "last_name": "Again"},
+            {"email": "taken@import.local", "first_name": "Taken", "last_name": "Twice"},
+            {"email": "not-an-email", "first_name": "", "last_name": "Nobody", "password": "short"},
+        ])
+        self.assertEqual((result["created"], result["failed"]), (1, 3))
+        self.assertEqual([row["status"] for row in result["results"]], ["created", "error", "error", "error"])
+        self.assertEqual(result["results"][1]["errors"], ["Duplicate email in import."])
+        self.assertEqual(result["results"][2]["errors"], ["A user with this email already exists."])
+        self.assertEqual(
+            result["results"][3]["errors"],
+            ["Invalid email format.", "First name is required.", "Passwords must be at least 8 characters."],
+        )
+
+        user = User.objects.get(pk=result["results"][0]["id"])
+        # Stored the way signups store it: only the domain is lowercased.
+        self.assertEqual((user.email, user.user_type, user.is_student), ("Grace@import.local", "student", True))
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(EmailOutbox.objects.filter(to_email=user.email).count(), 1)
+        self.assertEqual(reconcile_counters(), {})
+
+    def test_upload_endpoint(self):
+        upload = SimpleUploadedFile("users.csv", b"email,first_name,last_name\nlin@import.local,Lin,Upload\n")
+        response = self.client.post(
+            reverse("user-bulk-import"), {"file": upload, "send_invites": False},
+            HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.admin)['access']}",
+        )
+        self.assertEqual(response.json()["created"], 1)
+        self.assertTrue(User.objects.filter(email="lin@import.local", is_active=False).exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+class UserSearchTests(TestCase):
+    """Prefix matches rank first, deleted users drop out, pages link to their neighbours."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email="admin@search.local", password=PASSWORD, is_staff=True)
+        for first_name in ("Joanne", "Annabel", "Ann"):
+            User.objects.create_user(
+                email=f"{first_name.lower()}.smith@search.local", password=PASSWORD, first_name=first_name, last_name="Smith",
+            )
+
+    def setUp(self):
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(self.admin)['access']}"}
+
+    def search(self, **params):
+        response = self.client.get(reverse("user-search"), params, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def first_names(self, **params) -> list:
+        return [user["first_name"] for user in self.search(q="ann", **params)["results"]]
+
+    def test_prefix_matches_rank_first(self):
+        # Ann and Annabel start with the term (shorter value first); Joanne only contains it.
+        self.assertEqual(self.first_names(), ["Ann", "Annabel", "Joanne"])
+
+    def test_deleted_users_drop_out(self):
+        user = User.objects.get(first_name="Annabel")
+        user.status = StatusChoices.DELETED
+        user.save()
+        self.assertEqual(self.first_names(), ["Ann", "Joanne"])
+        # Gone from the search index itself, not just filtered out of the page.
+        self.assertNotIn(user, UserSearch("ann", User.objects.all())[0:10])
+
+    def test_page_links(self):
+        pages = [self.search(q="ann", page_size=1, page=page) for page in (1, 2, 3)]
+        self.assertEqual([[user["first_name"] for user in page["results"]] for page in pages], [["Ann"], ["Annabel"], ["Joanne"]])
+        self.assertIsNone(pages[0]["previous"])
+        self.assertIn("page=2", pages[0]["next"])
+        self.assertIn("page=1", pages[1]["previous"])
+        self.assertIn("page=3", pages[1]["next"])
+        self.assertIn("page=2", pages[2]["previous"])
+        self.assertIsNone(pages[2]["next"])
+        self.assertEqual(self.search(q="ann", page_size=1, page=4)["results"], [])
+
+    def test_short_term_is_rejected(self):
+        self.assertEqual(self.client.get(reverse("user-search"), {"q": "an"}, **self.headers).status_code, 400)
+
+
+class UserListValuesTests(TestCase):
+    """The values() list path renders exactly what UserSerializer did."""
+
+    def test_matches_user_serializer(self):
+        User.objects.create_user(email="plain@list.local", password=PASSWORD, first_name="Plain", last_name="User")
+        User.objects.create_user(
+            email="odd@list.local", password=PASSWORD, first_name="Zoë \u2028", last_name="  \"Ünïcode\"",
+            is_active=False,
+        )
+        queryset = User.objects.order_by("email")
+
+        expected = JSONRenderer().render(UserSerializer(queryset, many=True).data)
+        data = UserListValues.to_representation(UserListValues.queryset(queryset))
+
+        self.assertEqual(data, UserSerializer(queryset, many=True).data)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= / ?omit= narrow both the response and the selected columns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@sparse.local", password=PASSWORD, first_name="Sparse", last_name="Admin",
+            is_staff=True, is_superuser=True,
+        )
+
+    def get(self, url, data):
+        token = get_tokens_for_user(self.admin)["access"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data, HTTP_AUTHORIZATION=f"Bearer {token}")
+        return response, queries[-1]["sql"]
+
+    def test_list_fields(self):
+        response, sql = self.get(reverse("user-list"), {"fields": "email,id"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([{"id": str(self.admin.pk), "email": self.admin.email}], response.json()["results"])
+        self.assertNotIn('"first_name"', sql)
+
+    def test_retrieve_omit(self):
+        response, sql = self.get(reverse("user-detail", args=[self.admin.pk]), {"omit": "full_name,status"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(["id", "email", "first_name", "last_name", "is_active", "user_type"], list(response.json()))
+        self.assertNotIn('"status"', sql.split("WHERE")[0])
+
+    def test_unknown_field(self):
+        response, _ = self.get(reverse("user-list"), {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password", response.json()["fields"])
+
+
+class ConditionalGetTests(TestCase):
+    """Unchanged users are answered with 304 before the page is fetched or serialized."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@conditional.local", password=PASSWORD, first_name="Conditional", last_name="Admin",
+            is_staff=True, is_superuser=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(self.admin)['access']}"}
+
+    def test_list_revalidation(self):
+        url = reverse("user-list")
+        etag = self.client.get(url, **self.headers)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(len(queries), 1)  # authentication only
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(email="new@conditional.local", password=PASSWORD)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.headers).status_code, 200)
+
+    def test_list_generation_expires(self):
+        # Bounds how long a process with its own cache can miss another's writes.
+        url = reverse("user-list")
+        with self.settings(USER_LIST_GENERATION_TIMEOUT=0):
+            etag = self.client.get(url, **self.headers)["ETag"]
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.headers).status_code, 200)
+
+    def test_list_changes_without_save(self):
+        url = reverse("user-list")
+        user = User.objects.create_user(email="member@conditional.local", password=PASSWORD)
+        writes = {
+            "bulk status": lambda: change_status(User.objects.filter(pk=user.pk), StatusChoices.SUSPENDED),
+            "verification": lambda: activate_verified_user(user.pk),
+            "import": lambda: import_users(
+                [{"email": "imported@conditional.local", "first_name": "Imported", "last_name": "User"}], send_invites=False,
+            ),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                etag = self.client.get(url, **self.headers)["ETag"]
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.headers).status_code, 200)
+
+    def test_user_leaving_list(self):
+        # A demotion takes a row out of admin_users without touching the rows left in it.
+        url = reverse("user-admin-users")
+        staff = User.objects.create_user(email="staff@conditional.local", password=PASSWORD, is_staff=True)
+        response = self.client.get(url, **self.headers)
+        self.assertNotIn("Last-Modified", response)
+        staff.is_staff = False
+        with self.captureOnCommitCallbacks(execute=True):
+            staff.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **self.headers).status_code, 200)
+        # Lists ignore If-Modified-Since.
+        since = "Fri, 01 Jan 2100 00:00:00 GMT"
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since, **self.headers).status_code, 200)
+
+    def test_detail_revalidation(self):
+        url = reverse("user-detail", args=[self.admin.pk])
+        response = self.client.get(url, **self.headers)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"], **self.headers).status_code, 304
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **self.headers).status_code, 304)
+
+        self.admin.first_name = "Changed"
+        self.admin.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **self.headers).status_code, 200)
+
+
+@override_settings(COMPRESSION={"MIN_LENGTH": 0, "BROTLI_QUALITY": 4})
+class CompressionTests(TestCase):
+    """Large listings are compressed; responses carrying tokens never are."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email="admin@compression.local", password=PASSWORD, is_staff=True)
+        for number in range(10):
+            User.objects.create_user(email=f"admin{number}@compression.local", password=PASSWORD, is_staff=True)
+
+    def test_compressed_responses(self):
+        headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(self.admin)['access']}", "HTTP_ACCEPT_ENCODING": "gzip",
+        }
+        for url in (reverse("user-list"), reverse("user-admin-users"), reverse("user-search") + "?q=admin"):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, **headers)["Content-Encoding"], "gzip")
+
+        login = self.client.post(
+            reverse("login"), {"email": self.admin.email, "password": PASSWORD},
+            content_type="application/json", HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(login.status_code, 200)
+        self.assertNotIn("Content-Encoding", login)
+        refresh = self.client.post(
+            reverse("token_refresh"), {"refresh": login.json()["tokens"]["refresh"]},
+            content_type="application/json", HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(refresh.status_code, 200)
+        self.assertNotIn("Content-Encoding", refresh)
+
+
+class TokenVersionTests(TestCase):
+    """Saves that change what tokens carry or grant revoke them, without losing bumps."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="staff@version.local", password=PASSWORD, is_staff=True)
+
+    def version(self) -> int:
+        return User.objects.values_list("token_version", flat=True).get(pk=self.user.pk)
+
+    def test_claim_changes_bump(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Renamed"
+        user.save()
+        self.assertEqual(self.version(), 0)
+        for field, value in (("is_staff", False), ("user_type", "student"), ("email", "moved@version.local")):
+            with self.subTest(field=field):
+                before = self.version()
+                setattr(user, field, value)
+                user.save(update_fields=[field])
+                self.assertEqual(user.token_version, before + 1)
+                self.assertEqual(self.version(), before + 1)
+
+    def test_concurrent_bumps_add_up(self):
+        first, second = User.objects.get(pk=self.user.pk), User.objects.get(pk=self.user.pk)
+        first.is_staff = False
+        first.save()
+        second.set_password(NEW_PASSWORD)
+        second.save()
+        self.assertEqual(self.version(), 2)
+
+
+class TokenRefreshTests(TestCase):
+    """Refreshed tokens carry the row's current claims; a refresh token is good for one refresh."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="refresh@tokens.local", password=PASSWORD, status=StatusChoices.PENDING)
+
+    def setUp(self):
+        _index.reset()
+
+    def test_claims_are_reissued(self):
+        refresh = get_tokens_for_user(self.user)["refresh"]
+        self.user.status = StatusChoices.ACTIVE  # not a revoking change
+        self.user.save()
+        tokens = refresh_tokens(refresh)
+        self.assertEqual(AccessToken(tokens["access"])["status"], StatusChoices.ACTIVE)
+        self.assertEqual(RevocableRefreshToken(tokens["refresh"])["status"], StatusChoices.ACTIVE)
+
+    def test_single_use(self):
+        refresh = get_tokens_for_user(self.user)["refresh"]
+        # Two refreshes that both got past verification: only one may rotate.
+        first, second = RevocableRefreshToken(refresh), RevocableRefreshToken(refresh)
+        revoke_tokens(first)
+        with self.assertRaises(InvalidToken):
+            revoke_tokens(second)
+        with self.assertRaises(InvalidToken):
+            refresh_tokens(refresh)
+
+
+class UserCountersTests(TestCase):
+    """The stats counters follow every counted write without a recount."""
+
+    def test_counters_match_recount(self):
+        admin = User.objects.create_user(email="admin@counters.local", password=PASSWORD, is_staff=True)
+        users = [User.objects.create_user(email=f"user{i}@counters.local", password=PASSWORD) for i in range(4)]
+        activate_verified_user(users[0].pk)
+        users[1].user_type = "student"
+        users[1].save()
+        User.objects.only("email").get(pk=users[2].pk).soft_delete()
+        users[3].delete()
+
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(admin)['access']}"}
+        stats = self.client.get(reverse("user-stats"), {"days": 1}, **headers).json()
+        self.assertEqual(stats["total"], 3)
+        self.assertEqual(stats["status"]["deleted"], 1)
+        self.assertEqual(stats["user_type"], {"user": 2, "admin": 0, "staff": 0, "student": 1})
+        self.assertEqual(stats["verified"], {"verified": 1, "unverified": 2})
+        self.assertEqual(stats["signups"][-1]["count"], 4)
+        self.assertEqual(reconcile_counters(), {})
+
+
+class UserExportTests(TestCase):
+    """The export streams the list's fields, filtered, in both formats."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@export.local", password=PASSWORD, first_name="=HYPERLINK()", last_name="Admin", is_staff=True,
+        )
+        cls.student = User.objects.create_user(
+            email="student@export.local", password=PASSWORD, first_name="Stu", last_name="Dent, Jr", user_type="student",
+        )
+
+    def test_csv(self):
+        body = "".join(export_users("csv", export_queryset()))
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], list(UserSerializer.Meta.fields))
+        self.assertEqual([row[1] for row in rows[1:]], [self.admin.email, self.student.email])
+        self.assertEqual(rows[1][2], "'=HYPERLINK()")
+        self.assertEqual(rows[2][4], "Stu Dent, Jr")
+
+    def test_filtered_ndjson_endpoint(self):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(self.admin)['access']}"}
+        response = self.client.get(
+            reverse("user-export"), {"file_format": "ndjson", "user_type": "student"}, **headers,
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], UserSerializer([self.student], many=True).data)
+
+
+class BulkStatusTests(TestCase):
+    """Bulk status changes update, revoke and count in one go, skipping the caller."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email="admin@bulk.local", password=PASSWORD, is_staff=True)
+        cls.students = [
+            User.objects.create_user(email=f"student{i}@bulk.local", password=PASSWORD, user_type="student")
+            for i in range(3)
+        ]
+
+    def bulk_status(self, data):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(self.admin)['access']}"}
+        return self.client.post(reverse("user-bulk-status"), data, content_type="application/json", **headers)
+
+    def test_by_ids(self):
+        for student, authentication in zip(self.students, (JWTAuthentication, StatelessJWTAuthentication)):
+            with (
+                self.subTest(authentication=authentication.__name__),
+                mock.patch.object(UserViewSet, "authentication_classes", [authentication]),
+            ):
+                access = get_tokens_for_user(student)["access"]
+                ids = [str(student.pk), str(self.admin.pk), "00000000-0000-0000-0000-000000000000"]
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.bulk_status({"status": "suspended", "ids": ids})
+                self.assertEqual(response.json(), {
+                    "status": "suspended", "matched": 1, "updated": 1, "unchanged": 0, "tokens_revoked": 1, "not_found": 1,
+                })
+                self.assertEqual(User.objects.get(pk=self.admin.pk).status, "default")
+                response = self.client.get(reverse("user-detail", args=[student.pk]), HTTP_AUTHORIZATION=f"Bearer {access}")
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(reconcile_counters(), {})
+
+    def test_by_filter(self):
+        response = self.bulk_status({"status": "deleted", "filter": {"user_type": "student"}})
+        self.assertEqual(response.json()["updated"], 3)
+        self.assertFalse(User.objects.filter(user_type="student", is_active=True).exists())
+        self.assertEqual(reconcile_counters(), {})
+
+    def test_active_reactivates(self):
+        student = self.students[0]
+        student.soft_delete()
+        response = self.bulk_status({"status": "active", "ids": [str(student.pk)]})
+        self.assertEqual(response.json()["updated"], 1)
+        student.refresh_from_db()
+        self.assertEqual((student.status, student.is_active), ("active", True))
+        self.assertEqual(reconcile_counters(), {})
+
+    def test_needs_ids_or_filter(self):
+        self.assertEqual(self.bulk_status({"status": "blocked"}).status_code, 400)
+        self.assertEqual(self.bulk_status({"status": "blocked", "filter": {}}).status_code, 400)
+
+
+@override_settings(DATABASE_REPLICAS={"ALIASES": ("replica",), "STICKY_SECONDS": 10, "MAX_LAG": 5, "LAG_CHECK_INTERVAL": 5})
+class ReplicaRoutingTests(TransactionTestCase):
+    """User reads go to the replica, except right after a write or while it lags."""
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        replica_health.reset()
+        self.admin = User.objects.create_user(email="admin@replica.local", password=PASSWORD, is_staff=True)
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(self.admin)['access']}"}
+
+    def read_queries(self, url) -> dict:
+        """Queries a GET of ``url`` ran on each database."""
+        with CaptureQueriesContext(connection) as primary, CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.get(url, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return {"default": len(primary), "replica": len(replica)}
+
+    def test_reads_use_replica(self):
+        detail = reverse("user-detail", args=[self.admin.pk])
+        for url in (reverse("user-list"), detail, reverse("user-admin-users")):
+            with self.subTest(url=url):
+                queries = self.read_queries(url)
+                self.assertEqual(queries["default"], 1)  # authentication
+                self.assertGreater(queries["replica"], 0)
+        # Rows read from the replica are not put in the detail cache.
+        self.assertGreater(self.read_queries(detail)["replica"], 0)
+
+    def test_write_pins_client_to_primary(self):
+        response = self.client.patch(
+            reverse("user-detail", args=[self.admin.pk]), {"first_name": "Pinned"},
+            content_type="application/json", **self.headers,
+        )
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+        self.assertEqual(self.read_queries(reverse("user-list"))["replica"], 0)
+        # Pinned by user too, e.g. from a client without the cookie.
+        self.client.cookies.clear()
+        self.assertEqual(self.read_queries(reverse("user-list"))["replica"], 0)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with self.settings(DATABASE_REPLICAS={"ALIASES": ("replica",), "STICKY_SECONDS": 10, "MAX_LAG": -1, "LAG_CHECK_INTERVAL": 5}):
+            self.assertEqual(self.read_queries(reverse("user-list"))["replica"], 0)
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+
+TOKEN_VERSION_CLAIM = "ver"
+TOKEN_VERSION_CACHE_KEY = "users:token-version:{}"
+
+
+def token_claims(user) -> dict:
+    """
+    Claims embedded in every token issued for ``user``.
+
+    These are enough for StatelessJWTAuthentication to build a request user
+    without loading the User row.
+    """
+    return {
+        "email": user.email,
+        "user_type": user.user_type,
+        "is_staff": user.is_staff,
+        "status": user.status,
+        TOKEN_VERSION_CLAIM: user.token_version,
+    }
+
+
+def cache_token_version(user_id, version: int):
+    cache.set(TOKEN_VERSION_CACHE_KEY.format(user_id), version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+
+
+def cache_token_versions(versions: dict):
+    """cache_token_version() for many users (``{user_id: version}``) in one round-trip."""
+    cache.set_many(
+        {TOKEN_VERSION_CACHE_KEY.format(user_id): version for user_id, version in versions.items()},
+        settings.TOKEN_VERSION_CACHE_TIMEOUT,
+    )
+
+
+def get_token_version(user_id):
+    """
+    Current token version for a user.
+
+    Served from the cache; on a miss the version is read with a single
+    narrow query and cached for TOKEN_VERSION_CACHE_TIMEOUT seconds.
+
+    Returns:
+        int or None: The version, or None if the user does not exist.
+    """
+    key = TOKEN_VERSION_CACHE_KEY.format(user_id)
+    version = cache.get(key)
+    if version is not None:
+        return version
+
+    version = (
+        get_user_model().objects.filter(pk=user_id, is_active=True)
+        .values_list("token_version", flat=True)
+        .first()
+    )
+    if version is not None:
+        cache_token_version(user_id, version)
+    return version
@@ -6,21 +6,35 @@ from apps.users.views import (
     UserViewSet,
     LoginView,
     LogoutView,
+    TokenRefreshView,
     ChangePasswordView,
     EmailVerificationView,
     PasswordRequestResetView,
     PasswordResetConfirmView,       
 )
 
+from apps.users.async_views import (
+    AsyncEmailVerificationView,
+    AsyncLoginView,
+    AsyncPasswordRequestResetView,
+    AsyncPasswordResetConfirmView,
+)
+
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
 
 urlpatterns = [
     path("", include(router.urls)),
     path("login/", LoginView.as_view(), name="login"),
+    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("logout/", LogoutView.as_view(), name="logout"),
     path("change-password/", ChangePasswordView.as_view(), name="change_password"),
     path("verify/email/", EmailVerificationView.as_view(), name="email_verification"),
     path("password-reset/request/", PasswordRequestResetView.as_view(), name="password_reset_request"),
     path("password-reset/confirm/", PasswordResetConfirmView.as_view(), name="password_reset_confirm"),
+    # Native async versions of the hot auth flows, for deployments served under ASGI.
+    path("async/login/", AsyncLoginView.as_view(), name="async_login"),
+    path("async/verify/email/", AsyncEmailVerificationView.as_view(), name="async_email_verification"),
+    path("async/password-reset/request/", AsyncPasswordRequestResetView.as_view(), name="async_password_reset_request"),
+    path("async/password-reset/confirm/", AsyncPasswordResetConfirmView.as_view(), name="async_password_reset_confirm"),
 ]
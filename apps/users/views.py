@@ -1,23 +1,63 @@
+import uuid
+
 from rest_framework import viewsets, status, generics, permissions
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
 from django.contrib.auth import get_user_model
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 
-from apps.base.account_utils import send_otp_email, set_user_otp
-from apps.users.serializers import ChangePasswordSerializer, LoginSerializer, OTPVerificationSerializer, PasswordResetCompleteSerializer, PasswordResetRequestSerializer, UserCreateSerializer, UserDetailSerializer, UserSerializer, UserUpdateSerializer
+from apps.base.conditional import ConditionalGetMixin
+from apps.base.db_routing import ReplicaReadMixin
+from apps.base.middleware import CompressedActionsMixin
+from apps.base.pagination import RankedPagination
+from apps.base.serializers import parse_fieldset
+from apps.base.throttling import (
+    LoginThrottle,
+    OTPSendCooldownThrottle,
+    OTPSendThrottle,
+    OTPVerifyThrottle,
+    PasswordResetThrottle,
+    SignupThrottle,
+)
+from apps.base.account_utils import activate_verified_user, send_otp_email, set_user_otp
+from apps.users.activity import record_login
+from apps.users.authentication import get_user_instance
+from apps.users.revocation import RevocableRefreshToken, revoke_tokens
+from apps.users.cache import (
+    USER_DETAIL_CACHE_VERSION, cache_stats, cache_user_detail, get_user_detail_payload, user_list_generation,
+)
+from apps.users.counters import user_stats
+from apps.users.export import EXPORT_FORMATS, export_queryset, export_users
+from apps.users.search import MIN_TERM_LENGTH, UserSearch
+from apps.users.serializers import ChangePasswordSerializer, LoginSerializer, OTPVerificationSerializer, PasswordResetCompleteSerializer, PasswordResetRequestSerializer, TokenRefreshSerializer, UserBulkImportSerializer, UserBulkStatusSerializer, UserCreateSerializer, UserDetailSerializer, UserExportQuerySerializer, UserListValues, UserSerializer, UserStatsQuerySerializer, UserUpdateSerializer
 
 
 User = get_user_model()
 
+FIELDSET_PARAMETERS = [
+    OpenApiParameter("fields", str, description="Comma separated fields to return, e.g. `id,email`."),
+    OpenApiParameter("omit", str, description="Comma separated fields to leave out."),
+]
+
 
 @extend_schema(tags=["Users"])
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.exclude(status='DELETED')
+class UserViewSet(ReplicaReadMixin, ConditionalGetMixin, CompressedActionsMixin, viewsets.ModelViewSet):
+    queryset = User.objects.alive()
     permission_classes = [IsAuthenticated, permissions.IsAdminUser]
+    # Read actions that accept ?fields= / ?omit= (see get_fieldset).
+    sparse_actions = ("list", "retrieve", "admin_users", "search")
+    # Read actions served from a read replica when one is configured.
+    replica_actions = ("list", "retrieve", "admin_users")
+    # Large read responses CompressionMiddleware may compress.
+    compressed_actions = ("list", "admin_users", "search", "export")
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -28,8 +68,37 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserCreateSerializer
         elif self.action == 'admin_users':  # Add this condition
             return UserSerializer
+        elif self.action == 'bulk_import':
+            return UserBulkImportSerializer
+        elif self.action == 'bulk_status':
+            return UserBulkStatusSerializer
         return UserSerializer
 
+    def get_fieldset(self):
+        """Fields requested with ?fields= / ?omit=, or None for all of them."""
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = None
+            if self.action in self.sparse_actions and self.request is not None:
+                self._fieldset = parse_fieldset(self.request, self.get_serializer_class().Meta.fields)
+        return self._fieldset
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fieldset = self.get_fieldset()
+        if fieldset is not None and self.action in ("retrieve", "search"):
+            queryset = queryset.only("updated", *self.get_serializer_class().columns(fieldset))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_actions:
+            kwargs.setdefault("fieldset", self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_throttles(self):
+        if self.action == 'create':
+            return [SignupThrottle()]
+        return super().get_throttles()
+
     def get_permissions(self):
         if self.action in ['create']:
             permission_classes = [AllowAny]
@@ -55,8 +124,10 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
     @extend_schema(
+        parameters=FIELDSET_PARAMETERS,
         responses={
             200: UserSerializer,
+            304: OpenApiResponse(description="Not Modified"),
             400: OpenApiResponse(description="Bad Request"),
             401: OpenApiResponse(description="Unauthorized"),   
         },
@@ -64,12 +135,14 @@ class UserViewSet(viewsets.ModelViewSet):
         description="Retrieve a list of all users. only admin users can access this endpoint."
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        return self.list_values(self.filter_queryset(self.get_queryset()))
 
 
     @extend_schema(
+        parameters=FIELDSET_PARAMETERS,
         responses={
             200: UserDetailSerializer,
+            304: OpenApiResponse(description="Not Modified"),
             400: OpenApiResponse(description="Bad Request"),
             401: OpenApiResponse(description="Unauthorized"),   
         },
@@ -77,7 +150,25 @@ class UserViewSet(viewsets.ModelViewSet):
         description="Retrieve details of a specific user by ID."
     )
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
+        if self.get_fieldset() is not None:
+            # Narrow responses skip the cached full payload and load only their columns.
+            user = self.get_object()
+            not_modified = self.not_modified(user.updated, last_modified=user.updated)
+            if not_modified is not None:
+                return not_modified
+            return Response(self.get_serializer(user).data)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        # Keyed like invalidate_user_detail(), whatever the spelling of the URL.
+        try:
+            user_id = str(uuid.UUID(self.kwargs[lookup_url_kwarg]))
+        except ValueError:
+            raise Http404
+        payload, updated = get_user_detail_payload(user_id, self.get_object)
+        # The cache version is part of the ETag so a changed payload shape is never a 304.
+        not_modified = self.not_modified(USER_DETAIL_CACHE_VERSION, updated, last_modified=updated)
+        if not_modified is not None:
+            return not_modified
+        return HttpResponse(payload, content_type="application/json")
     
 
     @extend_schema(
@@ -106,8 +197,10 @@ class UserViewSet(viewsets.ModelViewSet):
         return super().partial_update(request, *args, **kwargs)
 
     @extend_schema(
+        parameters=FIELDSET_PARAMETERS,
         responses={
             200: UserSerializer(many=True),  # Changed to many=True for list response
+            304: OpenApiResponse(description="Not Modified"),
             400: OpenApiResponse(description="Bad Request"),
             401: OpenApiResponse(description="Unauthorized"),   
         },
@@ -117,18 +210,151 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
     def admin_users(self, request, *args, **kwargs):
         # Filter for admin users only
-        admin_users = self.get_queryset().filter(is_staff=True)  # or however you identify admin users
+        return self.list_values(self.get_queryset().filter(is_staff=True))
+
+    @extend_schema(
+        responses={
+            200: OpenApiResponse(description="User detail cache counters"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+        summary="User Cache Statistics",
+        description="Hit, miss and eviction counters of the user detail cache for the serving process."
+    )
+    @action(detail=False, methods=["get"], url_path="cache-stats", permission_classes=[IsAdminUser])
+    def cache_stats(self, request, *args, **kwargs):
+        return Response(cache_stats(), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[UserStatsQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="User totals by status, type and verification, and daily signups"),
+            400: OpenApiResponse(description="Bad Request"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+        summary="User Statistics",
+        description="Dashboard totals read from counters kept up to date on every write, so the cost does not grow with the number of users."
+    )
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def stats(self, request, *args, **kwargs):
+        query = UserStatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(user_stats(query.validated_data["days"]), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[UserExportQuerySerializer],
+        responses={
+            (200, "text/csv"): OpenApiResponse(OpenApiTypes.STR, description="CSV with a header row, or NDJSON"),
+            (200, "application/x-ndjson"): OpenApiResponse(OpenApiTypes.STR, description="CSV with a header row, or NDJSON"),
+            400: OpenApiResponse(description="Bad Request"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+        summary="Export Users",
+        description="Stream users, oldest first, as CSV or NDJSON in the list's fields. Rows are read and sent in chunks, so exports of any size use constant memory."
+    )
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def export(self, request, *args, **kwargs):
+        query = UserExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        options = dict(query.validated_data)
+        file_format = options.pop("file_format")
+        response = StreamingHttpResponse(
+            export_users(file_format, export_queryset(**options)), content_type=EXPORT_FORMATS[file_format],
+        )
+        filename = timezone.now().strftime(f"users-%Y%m%d-%H%M%S.{file_format}")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @extend_schema(
+        request=UserBulkImportSerializer,
+        responses={
+            200: OpenApiResponse(description="Per-row import report"),
+            400: OpenApiResponse(description="Bad Request"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+        summary="Bulk Import Users",
+        description="Create many users from a CSV/JSON upload or a JSON list. Each created user is sent an email verification OTP."
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-import",
+        permission_classes=[IsAdminUser],
+        serializer_class=UserBulkImportSerializer,
+        parser_classes=[JSONParser, MultiPartParser, FormParser],
+    )
+    def bulk_import(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        request=UserBulkStatusSerializer,
+        responses={
+            200: OpenApiResponse(description="Summary: matched, updated, unchanged, tokens_revoked (and not_found for ids)"),
+            400: OpenApiResponse(description="Bad Request"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+        summary="Bulk Change User Status",
+        description="Block, suspend, activate or soft delete many users, selected by ids or by filter, in one transaction. Blocking, suspending and deleting revoke the users' tokens. Your own account is never changed."
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-status",
+        permission_classes=[IsAdminUser],
+        serializer_class=UserBulkStatusSerializer,
+    )
+    def bulk_status(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", str, required=True, description=f"At least {MIN_TERM_LENGTH} characters of an email, first or last name."),
+            *FIELDSET_PARAMETERS,
+        ],
+        responses={
+            200: UserSerializer(many=True),
+            400: OpenApiResponse(description="Missing or too short search term"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+        summary="Search Users",
+        description="Find users by email, first or last name. Prefix matches rank first, then fuzzy matches."
+    )
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser], pagination_class=RankedPagination)
+    def search(self, request, *args, **kwargs):
+        term = request.query_params.get("q", "").strip()
+        if len(term) < MIN_TERM_LENGTH:
+            return Response(
+                {"detail": f"Search term must be at least {MIN_TERM_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        page = self.paginate_queryset(UserSearch(term, self.get_queryset()))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-        # Learn Pipe Queries 
-        # Use pagination if you have it enabled
-        page = self.paginate_queryset(admin_users)
+    def list_values(self, queryset):
+        """
+        List response in UserSerializer's shape, built from values() rows (see UserListValues).
+
+        The ETag comes from the user list generation (a cache read), so an
+        unchanged list is answered with 304 before any query runs. Lists
+        have no Last-Modified: no timestamp notices users leaving them.
+        """
+        not_modified = self.not_modified(user_list_generation())
+        if not_modified is not None:
+            return not_modified
+        fieldset = self.get_fieldset()
+        # "created" is selected for the cursor position, not returned.
+        rows = UserListValues.queryset(queryset, fieldset, extra=("created",))
+        page = self.paginate_queryset(rows)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        # If no pagination, return all admin users
-        serializer = self.get_serializer(admin_users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            return self.get_paginated_response(UserListValues.to_representation(page, fieldset))
+        return Response(UserListValues.to_representation(rows, fieldset), status=status.HTTP_200_OK)
+
+    def perform_destroy(self, instance):
+        instance.soft_delete()
 
 # list, retrieve, create, update, partial_update, destroy
 
@@ -136,6 +362,7 @@ class UserViewSet(viewsets.ModelViewSet):
 class LoginView(generics.GenericAPIView):
     permission_classes = [AllowAny]
     serializer_class = LoginSerializer
+    throttle_classes = [LoginThrottle]
     
     @extend_schema(
         request=LoginSerializer,
@@ -151,8 +378,9 @@ class LoginView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         tokens = serializer.validated_data['tokens']
+        record_login(user.pk)
         return Response({
-            "user": UserDetailSerializer(user).data,
+            "user": cache_user_detail(user),
             "tokens": {
                 "access": tokens['access'],
                 "refresh": tokens['refresh'],
@@ -160,6 +388,32 @@ class LoginView(generics.GenericAPIView):
         }, status=status.HTTP_200_OK)
 
 
+@extend_schema(tags=["Authentication"])
+class TokenRefreshView(generics.GenericAPIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    serializer_class = TokenRefreshSerializer
+
+    def get_authenticate_header(self, request):
+        # No authenticators here, but token errors should still be a 401.
+        return f'{jwt_settings.AUTH_HEADER_TYPES[0]} realm="api"'
+
+    @extend_schema(
+        request=TokenRefreshSerializer,
+        responses={
+            200: OpenApiResponse(description="New access token, plus a rotated refresh token"),
+            401: OpenApiResponse(description="Invalid, expired or revoked refresh token"),
+        },
+        summary="Refresh Token",
+        description="Exchange a refresh token for a new access token without logging in again. "
+                    "The refresh token is rotated and the old one can no longer be used."
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
 @extend_schema(tags=["Authentication"])
 class LogoutView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
@@ -173,9 +427,19 @@ class LogoutView(generics.GenericAPIView):
         description="Logout a user by invalidating their refresh token."
     )
     def post(self, request, *args, **kwargs):
+        # Revoke the refresh token (if given) and the access token used for
+        # this request until they expire; see apps.users.revocation.
+        tokens = [request.auth] if request.auth is not None else []
         refresh = request.data.get('refresh')
         if refresh:
-            RefreshToken(refresh).blacklist()
+            try:
+                token = RevocableRefreshToken(refresh)
+            except TokenError:
+                return Response({"detail": "Invalid refresh token."}, status=status.HTTP_400_BAD_REQUEST)
+            if str(token.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.id):
+                return Response({"detail": "Invalid refresh token."}, status=status.HTTP_400_BAD_REQUEST)
+            tokens.append(token)
+        revoke_tokens(*tokens)
         return Response(
             {"detail": "Logout successful."},
             status=status.HTTP_200_OK
@@ -200,7 +464,7 @@ class ChangePasswordView(generics.GenericAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = request.user
+        user = get_user_instance(request.user)
         serializer.save(user=user)
         return Response({"detail": "Password changed successfully."}, status=status.HTTP_200_OK)
 
@@ -208,6 +472,11 @@ class ChangePasswordView(generics.GenericAPIView):
 class EmailVerificationView(generics.GenericAPIView):
     permission_classes = [AllowAny]  # Changed from IsAuthenticated to AllowAny
     serializer_class = OTPVerificationSerializer
+
+    def get_throttles(self):
+        if self.request.method == "GET":
+            return [OTPSendCooldownThrottle(), OTPSendThrottle()]
+        return [OTPVerifyThrottle()]
     
     @extend_schema(
         request=None,
@@ -226,12 +495,12 @@ class EmailVerificationView(generics.GenericAPIView):
             return Response({"detail": "Email is required."}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.alive().get(email=email)
         except User.DoesNotExist:
             return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
         
         otp = set_user_otp(user)
-        send_otp_email(user.id, otp, "email verification")
+        send_otp_email(user, otp, "email verification")
         return Response({"detail": "OTP sent to your email."}, status=status.HTTP_200_OK)
     
 
@@ -248,13 +517,8 @@ class EmailVerificationView(generics.GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Get the user from the serializer's validated data
-        user = serializer.validated_data['user']
-        user.otp = None
-        user.otp_created_at = None
-        user.otp_verified = True  # Mark as verified
-        user.is_active = True
-        user.save(update_fields=['otp', 'otp_created_at', 'otp_verified', 'is_active'])
+        # The serializer already consumed the OTP; mark the user verified
+        activate_verified_user(serializer.validated_data['user_id'])
         
         return Response({"detail": "OTP verified successfully."}, status=status.HTTP_200_OK)
 
@@ -263,6 +527,7 @@ class EmailVerificationView(generics.GenericAPIView):
 class PasswordRequestResetView(generics.GenericAPIView):
     permission_classes = [AllowAny]
     serializer_class = PasswordResetRequestSerializer
+    throttle_classes = [OTPSendCooldownThrottle, PasswordResetThrottle]
     
     @extend_schema(
         request=PasswordResetRequestSerializer,
@@ -281,7 +546,8 @@ class PasswordRequestResetView(generics.GenericAPIView):
 
 class PasswordResetConfirmView(generics.GenericAPIView):
     permission_classes = [AllowAny]
-    serializer_class = ChangePasswordSerializer
+    serializer_class = PasswordResetCompleteSerializer
+    throttle_classes = [OTPVerifyThrottle]
     
     @extend_schema(
         request=PasswordResetCompleteSerializer,
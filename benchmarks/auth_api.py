@@ -0,0 +1,266 @@
+"""
+Load test the auth API in-process and compare it against a stored baseline.
+
+A throwaway test database is created (SQLite by default, or a local
+Postgres with DB_ENGINE=postgres), seeded with ``--users`` accounts through
+``User.objects.create_user`` and then every scenario is driven through the
+full Django stack by ``--concurrency`` threads. Email goes to the locmem
+backend, so nothing leaves the machine.
+
+For each scenario the run reports p50/p95/p99 latency, throughput and
+queries per request. With ``--baseline`` the results are checked against a
+previous run: a scenario fails when it issues more queries per request than
+the baseline, or when its p95 latency is more than ``--tolerance`` slower.
+Failures are printed and the process exits non-zero.
+
+Usage:
+    python -m benchmarks.auth_api --users 200 --requests 300 --concurrency 8
+    python -m benchmarks.auth_api --baseline benchmarks/baseline.json
+    python -m benchmarks.auth_api --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.database import setup_django, test_database
+
+PASSWORD = "Benchmark-Passw0rd"
+SCENARIOS = ("login", "refresh", "list", "list_revalidate", "retrieve", "search", "otp_send", "otp_verify", "password_reset")
+# Scenarios that use up their user's OTP, so no two requests may share a user.
+ONE_SHOT_SCENARIOS = ("otp_verify", "password_reset")
+
+
+class Context:
+    """Seeded users plus an admin token shared by the scenarios."""
+
+    def __init__(self, users: list, admin_token: str):
+        self.users = users
+        self.admin_token = admin_token
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        from django.test import Client
+
+        if not hasattr(self._local, "client"):
+            self._local.client = Client()
+        return self._local.client
+
+    def user(self, i: int):
+        return self.users[i % len(self.users)]
+
+    def own_user(self, i: int):
+        """The user of request ``i`` alone (``--users`` must cover ``--requests``)."""
+        return self.users[i]
+
+
+def seed(count: int, concurrency: int) -> Context:
+    from django.contrib.auth import get_user_model
+
+    from apps.base.account_utils import get_tokens_for_user
+
+    User = get_user_model()
+    admin = User.objects.create_user(
+        email="admin@bench.local", password=PASSWORD, first_name="Bench", last_name="Admin",
+        is_staff=True, is_superuser=True,
+    )
+
+    def create(i):
+        return User.objects.create_user(
+            email=f"user{i}@bench.local", password=PASSWORD, first_name="Bench", last_name=f"User{i}",
+        )
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        users = list(pool.map(create, range(count)))
+    return Context(users, get_tokens_for_user(admin)["access"])
+
+
+def build_scenarios(ctx: Context) -> dict:
+    """
+    Map scenario name -> (prepare, request).
+
+    ``prepare(i)`` runs untimed (e.g. issuing the OTP a verify request
+    needs) and returns the argument passed to ``request``, which performs
+    one HTTP request and returns the response.
+    """
+    from django.urls import NoReverseMatch, reverse
+
+    from apps.base.account_utils import get_tokens_for_user, set_user_otp
+    from apps.base.choices import OTPPurposeChoices
+
+    admin = {"HTTP_AUTHORIZATION": f"Bearer {ctx.admin_token}"}
+
+    def post(url, data):
+        return ctx.client.post(url, data, content_type="application/json")
+
+    scenarios = {
+        "login": (
+            ctx.user,
+            lambda user: post(reverse("login"), {"email": user.email, "password": PASSWORD}),
+        ),
+        "list": (
+            lambda i: None,
+            lambda _: ctx.client.get(reverse("user-list"), **admin),
+        ),
+        # A client polling an unchanged list with the ETag it already holds.
+        "list_revalidate": (
+            lambda i: ctx.client.get(reverse("user-list"), **admin)["ETag"],
+            lambda etag: ctx.client.get(reverse("user-list"), HTTP_IF_NONE_MATCH=etag, **admin),
+        ),
+        "retrieve": (
+            ctx.user,
+            lambda user: ctx.client.get(reverse("user-detail", args=[user.pk]), **admin),
+        ),
+        "search": (
+            lambda i: f"user{i % 100}",
+            lambda term: ctx.client.get(reverse("user-search"), {"q": term}, **admin),
+        ),
+        "otp_send": (
+            ctx.user,
+            lambda user: ctx.client.get(reverse("email_verification"), {"email": user.email}),
+        ),
+        "otp_verify": (
+            lambda i: (ctx.own_user(i), set_user_otp(ctx.own_user(i))),
+            lambda args: post(reverse("email_verification"), {"email": args[0].email, "otp": args[1]}),
+        ),
+        "password_reset": (
+            lambda i: (ctx.own_user(i), set_user_otp(ctx.own_user(i), purpose=OTPPurposeChoices.PASSWORD_RESET)),
+            lambda args: post(reverse("password_reset_confirm"), {
+                "email": args[0].email, "otp": args[1],
+                "new_password": PASSWORD, "confirm_password": PASSWORD,
+            }),
+        ),
+    }
+    try:
+        refresh_url = reverse("token_refresh")
+    except NoReverseMatch:
+        pass
+    else:
+        # Refresh tokens are single use once rotated, so each request gets its own.
+        scenarios["refresh"] = (
+            lambda i: get_tokens_for_user(ctx.user(i))["refresh"],
+            lambda token: post(refresh_url, {"refresh": token}),
+        )
+    return scenarios
+
+
+def percentile(ordered: list, pct: float) -> float:
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_scenario(prepare, request, requests: int, concurrency: int) -> dict:
+    from django.core.cache import caches
+
+    from apps.base.metrics import end_profile, start_profile
+
+    # Every scenario starts cold, so its numbers don't depend on which ran before it.
+    for cache in caches.all():
+        cache.clear()
+
+    def one(i):
+        arg = prepare(i)
+        token = start_profile()
+        start = time.perf_counter()
+        try:
+            response = request(arg)
+        finally:
+            elapsed = time.perf_counter() - start
+            profile = end_profile(token)
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.content[:200]!r}")
+        return elapsed * 1000, profile.query_count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "rps": round(requests / wall, 1),
+        "queries": round(statistics.mean(queries for _, queries in results), 2),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["queries"] > expected["queries"]:
+            failures.append(f"{name}: {result['queries']} queries/request, baseline {expected['queries']}")
+        limit = expected["p95_ms"] * (1 + tolerance)
+        if result["p95_ms"] > limit:
+            failures.append(f"{name}: p95 {result['p95_ms']} ms, baseline {expected['p95_ms']} ms (limit {limit:.3f} ms)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=300, help="Accounts to seed.")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Client threads.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Run only these scenarios.")
+    parser.add_argument("--baseline", help="Fail on regressions against this JSON file.")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed p95 slowdown vs baseline (0.5 = 50%%).")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+    one_shot = [name for name in args.scenario or SCENARIOS if name in ONE_SHOT_SCENARIOS]
+    if one_shot and args.requests > args.users:
+        parser.error(f"{', '.join(one_shot)} need a user per request: pass --users >= --requests.")
+
+    setup_django()
+
+    from apps.users.activity import activity_buffer
+
+    with test_database() as connection:
+        try:
+            print(f"Seeding {args.users} users on {connection.vendor}...")
+            ctx = seed(args.users, args.concurrency)
+            scenarios = build_scenarios(ctx)
+
+            results = {}
+            print(f"{'scenario':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>10}")
+            for name in args.scenario or SCENARIOS:
+                if name not in scenarios:
+                    print(f"{name:<16}  skipped (endpoint not available)")
+                    continue
+                result = results[name] = run_scenario(*scenarios[name], args.requests, args.concurrency)
+                print(f"{name:<16}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+                      f"{result['rps']:>10}{result['queries']:>10}")
+        finally:
+            activity_buffer.flush()
+
+    run = {"vendor": connection.vendor, "users": args.users, "requests": args.requests, "concurrency": args.concurrency}
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"_run": run, **results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("_run") != run:
+            print(f"Warning: baseline was recorded with {baseline.get('_run')}, this run used {run}.")
+        failures = compare(results, baseline, args.tolerance)
+        if failures:
+            print("\nREGRESSIONS against " + args.baseline, file=sys.stderr)
+            for failure in failures:
+                print(f"  {failure}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure what connection setup costs a request.
+
+Simulates request cycles the way Django's handler does: ``request_started``
+and ``request_finished`` fire around a trivial query, which is where Django
+closes connections older than CONN_MAX_AGE. The same cycle is timed with
+CONN_MAX_AGE=0 (a new connection per request) and with the configured
+settings (persistent or pooled).
+
+Usage:
+    DJANGO_ENVIRONMENT=stage python -m benchmarks.db_connections --requests 500
+"""
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+
+def run_cycles(requests: int, conn_max_age) -> list:
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    connection.close()
+    original = connection.settings_dict["CONN_MAX_AGE"]
+    if conn_max_age is not None:
+        connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+
+    timings = []
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            request_started.send(sender=None)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            request_finished.send(sender=None)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        connection.close()
+        connection.settings_dict["CONN_MAX_AGE"] = original
+    return timings
+
+
+def summarize(label: str, timings: list):
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<28} mean {statistics.mean(ordered):7.3f} ms   p50 {statistics.median(ordered):7.3f} ms   p95 {p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    django.setup()
+    from django.db import connection
+
+    print(f"Engine: {connection.vendor}, configured CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}, "
+          f"pool={'pool' in connection.settings_dict['OPTIONS']}")
+    summarize("new connection per request", run_cycles(args.requests, 0))
+    summarize("configured", run_cycles(args.requests, None))
+
+
+if __name__ == "__main__":
+    main()
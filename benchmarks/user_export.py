@@ -0,0 +1,44 @@
+"""
+Measure the streaming user export on a large table.
+
+Seeds ``--users`` rows into a throwaway database (bulk inserted, no password
+hashing), then drains ``export_users`` in each format and reports the time,
+bytes produced and peak memory allocated while streaming (tracemalloc).
+The peak should not grow with ``--users``.
+
+Usage:
+    python -m benchmarks.user_export --users 50000
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.database import setup_django, test_database
+from benchmarks.user_list import seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50_000, help="Rows to export.")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from apps.users.export import EXPORT_FORMATS, export_queryset, export_users
+
+    with test_database() as connection:
+        print(f"Seeding {args.users} users on {connection.vendor}...")
+        seed(args.users)
+
+        for file_format in EXPORT_FORMATS:
+            tracemalloc.start()
+            start = time.perf_counter()
+            size = sum(len(chunk) for chunk in export_users(file_format, export_queryset()))
+            elapsed = (time.perf_counter() - start) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{file_format:<8}{elapsed:>10.1f} ms{size / 1e6:>10.1f} MB out{peak / 1e6:>10.2f} MB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare the user list serialization paths on a large result set.
+
+Seeds ``--users`` rows into a throwaway database (bulk inserted, no password
+hashing) and times, best of ``--repeat``:
+
+- serializer: ``UserSerializer(many=True)`` over model instances, rendered
+  with DRF's JSONRenderer (the previous list path);
+- values: ``UserListValues`` rows rendered with FastJSONRenderer (the
+  current path, orjson when installed).
+
+Both outputs are checked to be byte-identical before timing.
+
+Usage:
+    python -m benchmarks.user_list --users 10000
+"""
+import argparse
+import time
+
+from benchmarks.database import setup_django, test_database
+
+
+def seed(count: int):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    User = get_user_model()
+    password = make_password(None)
+    User.objects.bulk_create(
+        [
+            User(
+                email=f"user{i}@bench.local", first_name="Bench", last_name=f"Usér {i}",
+                password=password, is_active=i % 3 != 0,
+            )
+            for i in range(count)
+        ],
+        batch_size=1000,
+    )
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000, help="Rows to serialize.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path; the fastest counts.")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+
+    from apps.base.renderers import FastJSONRenderer, orjson
+    from apps.users.serializers import UserListValues, UserSerializer
+
+    User = get_user_model()
+    with test_database() as connection:
+        print(f"Seeding {args.users} users on {connection.vendor}...")
+        seed(args.users)
+        queryset = User.objects.alive().order_by("-created", "-id")
+
+        def serializer_path():
+            return JSONRenderer().render(UserSerializer(queryset.all(), many=True).data)
+
+        def values_path():
+            return FastJSONRenderer().render(UserListValues.to_representation(UserListValues.queryset(queryset.all())))
+
+        if serializer_path() != values_path():
+            raise SystemExit("Outputs differ; UserListValues is out of step with UserSerializer.")
+
+        before = best_of(args.repeat, serializer_path)
+        after = best_of(args.repeat, values_path)
+
+    print(f"{'serializer':<12}{before:>10.1f} ms")
+    print(f"{'values':<12}{after:>10.1f} ms   ({'orjson' if orjson else 'json'})")
+    print(f"speedup     {before / after:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
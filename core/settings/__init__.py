@@ -14,5 +14,7 @@ elif DJANGO_ENVIRONMENT == "stage":
     from .stage import *  # noqa
 elif DJANGO_ENVIRONMENT == "prod":
     from .prod import *  # noqa
+elif DJANGO_ENVIRONMENT == "test":
+    from .test import *  # noqa
 else:
     raise ValueError("Django Environment Not Specified")
@@ -32,6 +32,7 @@ DJANGO_APPS = [
     
 ]
 CUSTOM_APPS = [
+    "apps.base",
     "apps.users",
 ]
 
@@ -45,6 +46,9 @@ THIRD_PARTY_APPS = [
 INSTALLED_APPS = DJANGO_APPS + CUSTOM_APPS + THIRD_PARTY_APPS
 
 MIDDLEWARE = [
+    'apps.base.middleware.RequestMetricsMiddleware',
+    'apps.base.middleware.CompressionMiddleware',
+    'apps.base.db_routing.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,6 +83,30 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Password hashing
+# PROFILE picks the preferred hasher; the others stay listed so existing
+# hashes still verify and are upgraded on the next login. By default hashes
+# run inline on the request thread. WORKERS > 0 moves them into a bounded
+# process pool per web process (apps.base.hashing): a server with N worker
+# processes then runs N * WORKERS hashing processes, so keep N * WORKERS at
+# or below the CPU count (e.g. WORKERS=1 or 2 under gunicorn).
+PASSWORD_HASHING = {
+    "PROFILE": config("PASSWORD_HASHER_PROFILE", "pbkdf2"),  # pbkdf2 | argon2 | bcrypt
+    "PBKDF2_ITERATIONS": config("PBKDF2_ITERATIONS", 0, cast=int),  # 0 keeps Django's default
+    "WORKERS": config("PASSWORD_HASHING_WORKERS", 0, cast=int),  # hashing processes per web process; 0 hashes inline
+    "MAX_PENDING": config("PASSWORD_HASHING_MAX_PENDING", 32, cast=int),
+    "QUEUE_TIMEOUT": config("PASSWORD_HASHING_QUEUE_TIMEOUT", 2, cast=float),  # seconds before a 503
+}
+
+_PROFILE_HASHERS = {
+    "pbkdf2": "apps.base.hashers.ConfigurablePBKDF2PasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",  # requires argon2-cffi
+    "bcrypt": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",  # requires bcrypt
+}
+PASSWORD_HASHERS = [_PROFILE_HASHERS[PASSWORD_HASHING["PROFILE"]]] + [
+    hasher for profile, hasher in _PROFILE_HASHERS.items() if profile != PASSWORD_HASHING["PROFILE"]
+] + ["django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -123,21 +151,155 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
 AUTH_USER_MODEL = "users.User"
 
+# Cache
+# Local memory by default so no external service is required; point
+# CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached to share across processes.
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", "ncc-dashboard"),
+    }
+}
+
+USER_DETAIL_CACHE_TIMEOUT = config("USER_DETAIL_CACHE_TIMEOUT", 300, cast=int)
+
+# Lifetime of the user list generation behind list ETags (apps.users.cache).
+# Writes invalidate lists at once only for processes sharing the cache; with
+# the per-process default (LocMemCache) and several workers, set a shared
+# CACHE_BACKEND, or other workers may answer 304 for a changed list for up
+# to this many seconds, until the generation expires and starts afresh.
+USER_LIST_GENERATION_TIMEOUT = config("USER_LIST_GENERATION_TIMEOUT", 60, cast=int)
+
+# Lifetime of email verification and password reset codes (apps.users.otp).
+OTP_EXPIRY_MINUTES = config("OTP_EXPIRY_MINUTES", 15, cast=int)
+
+# Opt-in: authenticate from signed token claims instead of loading the User
+# row on every request (see apps.users.authentication).
+JWT_STATELESS_AUTH = config("JWT_STATELESS_AUTH", False, cast=bool)
+
+# How long a user's token version is cached. Blocking, suspending, a password
+# change or a change of email, user type or staff/superuser flags takes
+# effect in other processes within this window.
+TOKEN_VERSION_CACHE_TIMEOUT = config("TOKEN_VERSION_CACHE_TIMEOUT", 60, cast=int)
+
+# Logout revocations (apps.users.revocation). Each process keeps a bloom
+# filter of revoked jtis, fully rebuilt every RESYNC_INTERVAL seconds.
+# Between rebuilds, a revocation announced through the cache is loaded with
+# the last RELOAD_WINDOW revocation ids before it, which catches rows that
+# committed out of id order. A revocation missed any other way (e.g. an
+# unshared cache) is picked up by the next rebuild, so revoked tokens keep
+# working in other processes for at most RESYNC_INTERVAL seconds.
+TOKEN_REVOCATION = {
+    "BLOOM_CAPACITY": config("TOKEN_REVOCATION_BLOOM_CAPACITY", 100_000, cast=int),
+    "BLOOM_ERROR_RATE": config("TOKEN_REVOCATION_BLOOM_ERROR_RATE", 0.001, cast=float),
+    "RESYNC_INTERVAL": config("TOKEN_REVOCATION_RESYNC_INTERVAL", 30, cast=int),
+    "RELOAD_WINDOW": config("TOKEN_REVOCATION_RELOAD_WINDOW", 100, cast=int),
+}
+
+# Soft-deleted rows older than this are moved to the archive table by
+# ``manage.py archive_deleted``.
+ARCHIVE_DELETED_AFTER_DAYS = config("ARCHIVE_DELETED_AFTER_DAYS", 90, cast=int)
+
+# last_login writes (apps.users.activity) are buffered per process and
+# flushed in bulk every FLUSH_INTERVAL seconds or once MAX_PENDING users wait.
+ACTIVITY_BUFFER = {
+    "FLUSH_INTERVAL": config("ACTIVITY_FLUSH_INTERVAL", 30, cast=int),
+    "MAX_PENDING": config("ACTIVITY_MAX_PENDING", 1000, cast=int),
+    "CHUNK_SIZE": 500,
+}
+
+# Response compression (apps.base.middleware.CompressionMiddleware), for the
+# actions views opt in with CompressedActionsMixin. Brotli needs the optional
+# ``brotli`` package; gzip is used without it.
+COMPRESSION = {
+    "MIN_LENGTH": config("COMPRESSION_MIN_LENGTH", 1024, cast=int),
+    "BROTLI_QUALITY": config("COMPRESSION_BROTLI_QUALITY", 4, cast=int),
+}
+
+# Read replicas (apps.base.db_routing), configured with DB_REPLICAS (see
+# core/settings/database.py). User list/detail reads go to a replica unless
+# the client wrote within STICKY_SECONDS or every replica is more than
+# MAX_LAG seconds behind, checked every LAG_CHECK_INTERVAL seconds.
+DATABASE_ROUTERS = ["apps.base.db_routing.ReplicaRouter"]
+DATABASE_REPLICAS = {
+    "ALIASES": None,  # every database but default
+    "STICKY_SECONDS": config("DB_REPLICA_STICKY_SECONDS", 10, cast=int),
+    "MAX_LAG": config("DB_REPLICA_MAX_LAG", 5, cast=float),
+    "LAG_CHECK_INTERVAL": config("DB_REPLICA_LAG_CHECK_INTERVAL", 5, cast=int),
+}
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.StatelessJWTAuthentication"
+        if JWT_STATELESS_AUTH
+        else "apps.users.authentication.JWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # FastJSONRenderer encodes with orjson (a project dependency) and only
+    # falls back to the slower json module when it cannot be imported.
+    "DEFAULT_RENDERER_CLASSES": (
+        "apps.base.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",        
-    )   
+    ),
+    "DEFAULT_PAGINATION_CLASS": "apps.base.pagination.CreatedCursorPagination",
+    "PAGE_SIZE": config("PAGE_SIZE", 50, cast=int),
+    # Reverse proxies in front of the app. Throttles identify clients by
+    # REMOTE_ADDR when 0; behind a load balancer set it to the number of
+    # proxies, or X-Forwarded-For can be spoofed to dodge the IP limits.
+    "NUM_PROXIES": config("NUM_PROXIES", 0, cast=int),
+    # Scopes used by the throttles in apps.base.throttling.
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": config("THROTTLE_LOGIN_IP", "60/min"),
+        "login_email": config("THROTTLE_LOGIN_EMAIL", "10/min"),
+        "signup_ip": config("THROTTLE_SIGNUP_IP", "20/hour"),
+        "otp_send_ip": config("THROTTLE_OTP_SEND_IP", "20/hour"),
+        "otp_send_email": config("THROTTLE_OTP_SEND_EMAIL", "5/hour"),
+        "otp_send_cooldown": config("THROTTLE_OTP_SEND_COOLDOWN", "1/min"),
+        "otp_verify_ip": config("THROTTLE_OTP_VERIFY_IP", "60/hour"),
+        "otp_verify_email": config("THROTTLE_OTP_VERIFY_EMAIL", "10/hour"),
+        "password_reset_ip": config("THROTTLE_PASSWORD_RESET_IP", "20/hour"),
+        "password_reset_email": config("THROTTLE_PASSWORD_RESET_EMAIL", "5/hour"),
+    },
+}
+
+# Request instrumentation (apps.base.middleware.RequestMetricsMiddleware).
+# Latency is recorded for every request; SQL, hashing and serializer timings
+# only for a SAMPLE_RATE fraction of them. Metrics are exposed at /metrics,
+# to staff users or with "Authorization: Bearer <TOKEN>".
+METRICS = {
+    "ENABLED": config("METRICS_ENABLED", True, cast=bool),
+    "SAMPLE_RATE": config("METRICS_SAMPLE_RATE", 0.05, cast=float),
+    "SERVER_TIMING": config("METRICS_SERVER_TIMING", False, cast=bool),
+    "DUPLICATE_QUERY_THRESHOLD": config("METRICS_DUPLICATE_QUERY_THRESHOLD", 5, cast=int),
+    "TOKEN": config("METRICS_TOKEN", ""),
+}
+
+SPECTACULAR_SETTINGS = {
+    "TITLE": "NewCode Backend Dashboard API",
+    "VERSION": config("API_VERSION", "1.0.0"),
+}
+
+# /api/schema/ serves the files written by `manage.py build_openapi_schema`
+# unless LIVE is set, in which case the schema is generated per request.
+OPENAPI_SCHEMA = {
+    "DIR": config("OPENAPI_SCHEMA_DIR", str(BASE_DIR / "openapi")),
+    "LIVE": config("OPENAPI_SCHEMA_LIVE", False, cast=bool),
+    "MAX_AGE": config("OPENAPI_SCHEMA_MAX_AGE", 300, cast=int),
 }
 
+# "local" keeps throttle state in process memory (no I/O per check);
+# "cache" shares it across processes through THROTTLE_CACHE_ALIAS.
+THROTTLE_STORE = config("THROTTLE_STORE", "local")
+THROTTLE_CACHE_ALIAS = config("THROTTLE_CACHE_ALIAS", "default")
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=int(config("TOKEN_EXPIRY", 30))),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
-    "ROTATE_REFRESH_TOKENS": False,
-    "BLACKLIST_AFTER_ROTATION": False,
+    "ROTATE_REFRESH_TOKENS": True,
+    "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": True,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": config("SECRET_KEY", ""),
@@ -168,3 +330,32 @@ SIMPLE_JWT = {
 }
 
 REST_USE_JWT = True
+
+# Email outbox
+# Emails are queued in apps.base.models.EmailOutbox and delivered by
+# `python manage.py process_email_outbox`.
+EMAIL_OUTBOX = {
+    "BATCH_SIZE": config("EMAIL_OUTBOX_BATCH_SIZE", 50, cast=int),
+    "MAX_ATTEMPTS": config("EMAIL_OUTBOX_MAX_ATTEMPTS", 5, cast=int),
+    "RETRY_BACKOFF": config("EMAIL_OUTBOX_RETRY_BACKOFF", 30, cast=int),  # seconds, doubled per attempt
+    "MAX_BACKOFF": config("EMAIL_OUTBOX_MAX_BACKOFF", 3600, cast=int),
+    "LEASE": config("EMAIL_OUTBOX_LEASE", 300, cast=int),  # seconds a claimed batch stays invisible
+    "POLL_INTERVAL": config("EMAIL_OUTBOX_POLL_INTERVAL", 5, cast=int),
+}
+
+# Bulk user import (apps.users.bulk_import)
+BULK_IMPORT = {
+    "CHUNK_SIZE": config("BULK_IMPORT_CHUNK_SIZE", 500, cast=int),
+    "MAX_ROWS": config("BULK_IMPORT_MAX_ROWS", 10000, cast=int),
+}
+
+# Bulk status changes (apps.users.bulk_status). The ids go into one IN (...)
+# clause, so keep MAX_USERS below the database's bound parameter limit.
+BULK_STATUS = {
+    "MAX_USERS": config("BULK_STATUS_MAX_USERS", 10000, cast=int),
+}
+
+# Streaming user export (apps.users.export)
+USER_EXPORT = {
+    "CHUNK_SIZE": config("USER_EXPORT_CHUNK_SIZE", 2000, cast=int),  # rows per cursor round-trip
+}
@@ -0,0 +1,139 @@
+import copy
+
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer, and NORMAL sync is durable enough under WAL for a
+# single-node deployment.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",  # ~20MB page cache
+    "PRAGMA mmap_size=134217728",  # 128MB
+)
+
+
+def postgres_config() -> dict:
+    """
+    PostgreSQL settings from the SQL_* / DB_* environment variables.
+
+    With DB_POOL=True connections come from a psycopg 3 pool (requires
+    ``psycopg[pool]``); otherwise they are kept open for DB_CONN_MAX_AGE
+    seconds and health-checked before reuse.
+    """
+    database = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": config("SQL_DATABASE"),
+        "USER": config("SQL_USER"),
+        "PASSWORD": config("SQL_PASSWORD"),
+        "HOST": config("SQL_HOST", "localhost"),
+        "PORT": config("SQL_PORT", "5432"),
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", 60, cast=int),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", True, cast=bool),
+        "OPTIONS": {
+            "connect_timeout": config("DB_CONNECT_TIMEOUT", 5, cast=int),
+        },
+        # "OPTIONS": {
+        #     "sslmode": "require",
+        #     "sslrootcert": "global-bundle.pem",  # Path to your RDS CA certificate
+        # },
+    }
+
+    if config("DB_POOL", False, cast=bool):
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            raise ImproperlyConfigured("DB_POOL=True requires psycopg 3 with pooling: pip install 'psycopg[binary,pool]'")
+        # The pool owns connection lifetime; Django refuses persistent connections with it.
+        database["CONN_MAX_AGE"] = 0
+        database["OPTIONS"]["pool"] = {
+            "min_size": config("DB_POOL_MIN_SIZE", 2, cast=int),
+            "max_size": config("DB_POOL_MAX_SIZE", 10, cast=int),
+            "timeout": config("DB_POOL_TIMEOUT", 10, cast=int),
+        }
+    return database
+
+
+def sqlite_config(default_path) -> dict:
+    """
+    SQLite settings tuned for a single-node deployment.
+
+    Connections are persistent so the pragmas run once per connection
+    rather than once per request, and writes take the lock up front
+    (IMMEDIATE) instead of failing on upgrade under concurrency.
+    """
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": config("SQLITE_PATH", str(default_path)),
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", 600, cast=int),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", True, cast=bool),
+        "OPTIONS": {
+            "init_command": ";".join(SQLITE_PRAGMAS),
+            "transaction_mode": "IMMEDIATE",
+            "timeout": config("SQLITE_BUSY_TIMEOUT", 5, cast=int),
+        },
+    }
+
+
+def database_config(default_engine: str, sqlite_path) -> dict:
+    """
+    The ``default`` database for an environment.
+
+    Args:
+        default_engine (str): "postgres" or "sqlite", used when DB_ENGINE is unset.
+        sqlite_path: Database file used by the SQLite engine unless SQLITE_PATH is set.
+
+    Returns:
+        dict: A DATABASES entry.
+    """
+    engine = config("DB_ENGINE", default_engine)
+    if engine == "postgres":
+        return postgres_config()
+    if engine == "sqlite":
+        return sqlite_config(sqlite_path)
+    raise ImproperlyConfigured(f"Unsupported DB_ENGINE: {engine}")
+
+
+def replica_configs(primary: dict) -> dict:
+    """
+    Read replica entries for DATABASES, from DB_REPLICAS.
+
+    DB_REPLICAS is a comma separated list of replicas, ``host[:port][/name]``
+    for PostgreSQL or database files for SQLite. Every
+    other setting is copied from ``primary``. Replicas are named
+    ``replica_1``, ``replica_2``, ... and mirror ``default`` under test.
+
+    Args:
+        primary (dict): The ``default`` DATABASES entry.
+
+    Returns:
+        dict: DATABASES entries, empty when DB_REPLICAS is unset.
+    """
+    locations = [location.strip() for location in config("DB_REPLICAS", "").split(",") if location.strip()]
+    replicas = {}
+    for number, location in enumerate(locations, start=1):
+        replica = copy.deepcopy(primary)
+        if primary["ENGINE"] == "django.db.backends.sqlite3":
+            replica["NAME"] = location
+        else:
+            address, _, name = location.partition("/")
+            host, _, port = address.partition(":")
+            replica["HOST"] = host
+            replica["PORT"] = port or primary["PORT"]
+            replica["NAME"] = name or primary["NAME"]
+        replica["TEST"] = {"MIRROR": "default"}
+        replicas[f"replica_{number}"] = replica
+    return replicas
+
+
+def databases_config(default_engine: str, sqlite_path) -> dict:
+    """
+    DATABASES for an environment: ``default`` (see database_config) plus any
+    read replicas (see replica_configs).
+    """
+    default = database_config(default_engine, sqlite_path)
+    return {"default": default, **replica_configs(default)}
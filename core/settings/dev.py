@@ -4,24 +4,24 @@ from .base import *
 
 from decouple import config
 
+from .database import databases_config
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": config("SQL_DATABASE"),
-        "USER": config("SQL_USER"),
-        "PASSWORD": config("SQL_PASSWORD"),
-        "HOST": config("SQL_HOST", "localhost"),
-        "PORT": config("SQL_PORT", "5432"),
-        # "OPTIONS": {
-        #     "sslmode": "require",
-        #     "sslrootcert": "global-bundle.pem",  # Path to your RDS CA certificate
-        # },
-    }
-}
+# Defaults to PostgreSQL; set DB_ENGINE to switch, and DB_REPLICAS to add
+# read replicas. See core/settings/database.py.
+DATABASES = databases_config("postgres", BASE_DIR / "db.sqlite3")
+
+
+# Generate the OpenAPI schema per request so view changes show up immediately.
+OPENAPI_SCHEMA["LIVE"] = config("OPENAPI_SCHEMA_LIVE", True, cast=bool)
+
+
+# Profile every request and report it in Server-Timing headers.
+METRICS["SAMPLE_RATE"] = config("METRICS_SAMPLE_RATE", 1.0, cast=float)
+METRICS["SERVER_TIMING"] = config("METRICS_SERVER_TIMING", True, cast=bool)
 
 
 # Email configuration
@@ -2,15 +2,15 @@ from .base import *
 
 from decouple import config
 
+from .database import databases_config
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Defaults to SQLite; set DB_ENGINE to switch, and DB_REPLICAS to add
+# read replicas. See core/settings/database.py.
+DATABASES = databases_config("sqlite", BASE_DIR / "db.sqlite3")
+
 
 # Email configuration
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
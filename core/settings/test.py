@@ -0,0 +1,33 @@
+from .base import *
+
+from decouple import config
+
+from .database import database_config
+
+# Settings for the test suite and benchmarks (DJANGO_ENVIRONMENT=test).
+# Everything runs offline: SQLite by default (DB_ENGINE=postgres for a local
+# server), the in-memory email backend and no throttling.
+
+DATABASES = {
+    "default": database_config("sqlite", BASE_DIR / "test.sqlite3"),
+}
+# A replica mirroring default. Tests read the primary unless they enable it
+# (see ReplicaRoutingTests); DB_REPLICAS is not used under test.
+DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+DATABASE_REPLICAS["ALIASES"] = ()
+
+ALLOWED_HOSTS = ["testserver", "localhost", "127.0.0.1"]
+
+SIMPLE_JWT["SIGNING_KEY"] = SIMPLE_JWT["SIGNING_KEY"] or SECRET_KEY
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", "noreply@example.com")
+
+# Load tests would otherwise be rejected by the login/OTP throttles.
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {scope: None for scope in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]}
+
+# Cheaper hashes keep seeding fast; override PBKDF2_ITERATIONS to benchmark the real cost.
+PASSWORD_HASHING["PBKDF2_ITERATIONS"] = config("PBKDF2_ITERATIONS", 20000, cast=int)
+
+# Query counts are measured by the harnesses themselves.
+METRICS["SAMPLE_RATE"] = 0.0
@@ -2,14 +2,16 @@ from django.contrib import admin
 from django.urls import include, path
 
 from drf_spectacular.views import (
-    SpectacularAPIView,
     SpectacularSwaggerView,
     SpectacularRedocView
 )
 
+from apps.base.views import PrebuiltSchemaView, metrics_view
+
 urlpatterns = [
     path('internal/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name="schema"),
+    path('metrics', metrics_view, name="metrics"),
+    path('api/schema/', PrebuiltSchemaView.as_view(), name="schema"),
     path('api/schema/swagger-ui', SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path('api/schema/redoc', SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
     path('api/auth/', include('apps.users.urls')),